@@ -1,29 +1,369 @@
 import os
-from Bio import SeqIO
-from Bio import Entrez
+import time
+import hashlib
+import threading
+from urllib.parse import urlencode
+from urllib.request import urlopen
+from concurrent.futures import ThreadPoolExecutor
 
-def download(id):
+# Default cache location and size limit (bytes). Both can be overridden
+# with NCBI_CACHE and NCBI_CACHE_SIZE environment variables.
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bi2", "ncbi")
+CACHE_SIZE = 512 * 1024 * 1024
+
+class EntrezTransport():
+    '''
+        EntrezTransport class
+
+        Fetches records from NCBI with Biopython's Entrez.efetch.
+    '''
+
+    def __init__(self, email = "", db = "nucleotide"):
+        self.email = email
+        self.db = db
+
+    def fetch(self, ids):
+        '''
+            Fetches .fasta text of all ids in a single efetch call.
+
+            Input:
+                ids: list of string - NCBI ids.
+
+            Output:
+                string: .fasta text with all records
+        '''
+
+        from Bio import Entrez
+
+        Entrez.email = self.email
+
+        net_handle = Entrez.efetch(
+            db=self.db, id=",".join(ids), rettype="fasta", retmode="text"
+        )
+
+        text = net_handle.read()
+        net_handle.close()
+
+        return text
+
+class HTTPTransport():
+    '''
+        HTTPTransport class
+
+        Fetches records from server exposing efetch-like interface
+        (GET url?db=...&id=...&rettype=fasta&retmode=text), e.g. local
+        stand-in of NCBI.
+    '''
+
+    def __init__(self, url, db = "nucleotide"):
+        self.url = url
+        self.db = db
+
+    def fetch(self, ids):
+        query = urlencode({"db": self.db, "id": ",".join(ids), "rettype": "fasta", "retmode": "text"})
+
+        with urlopen(self.url + "?" + query) as net_handle:
+            return net_handle.read().decode("utf-8")
+
+class DirectoryTransport():
+    '''
+        DirectoryTransport class
+
+        Reads records from <id>.fasta files in local directory (fixtures).
+        Missing ids are skipped, like unknown ids are by NCBI.
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, ids):
+        text = ""
+
+        for id in ids:
+            path = os.path.join(self.directory, id + ".fasta")
+
+            if os.path.isfile(path):
+                with open(path, "r") as file_handle:
+                    text += file_handle.read().rstrip("\n") + "\n"
+
+        return text
+
+class RateLimiter():
+    '''
+        RateLimiter class
+
+        Allows at most `rate` calls per second across threads.
+    '''
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_call = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+
+        if delay > 0:
+            time.sleep(delay)
+
+class Cache():
+    '''
+        Cache class
+
+        Content-addressed cache of downloaded records. Every record is
+        stored once in objects/<sha256 of content>.fasta and request keys
+        (db, id) point to it through refs/<sha256 of key>. When total size
+        of objects exceeds the limit, least recently used ones are removed.
+        Total size is counted once and then updated by put and evict, so
+        the directory is scanned again only when the limit is exceeded.
+    '''
+
+    def __init__(self, directory = None, max_size = None):
+        '''
+            Constructor of Cache class
+
+            Input:
+                directory: string - cache directory (default: NCBI_CACHE
+                    environment variable or ~/.cache/bi2/ncbi).
+                max_size: int - size limit of cached records in bytes
+                    (default: NCBI_CACHE_SIZE environment variable or 512 MB).
+
+            Output:
+                Cache: Constructed object of class Cache
+        '''
+
+        self.directory = directory or os.environ.get("NCBI_CACHE", CACHE_DIR)
+        self.max_size = max_size if max_size is not None else int(os.environ.get("NCBI_CACHE_SIZE", CACHE_SIZE))
+
+        os.makedirs(os.path.join(self.directory, "objects"), exist_ok = True)
+        os.makedirs(os.path.join(self.directory, "refs"), exist_ok = True)
+
+        # Total size of objects (None - not counted yet).
+        self.size = None
+
+    def ref_path(self, db, id):
+        key = hashlib.sha256((db + "\n" + id).encode("utf-8")).hexdigest()
+
+        return os.path.join(self.directory, "refs", key)
+
+    def get(self, db, id):
+        '''
+            Returns path of cached record or None. Hit marks record as
+            recently used.
+        '''
+
+        ref = self.ref_path(db, id)
+
+        try:
+            with open(ref, "r") as file_handle:
+                path = os.path.join(self.directory, "objects", file_handle.read().strip() + ".fasta")
+
+            os.utime(path)
+
+        except OSError:
+            return None
+
+        return path
+
+    def put(self, db, id, text):
+        '''
+            Stores record and returns its path.
+        '''
+
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        path = os.path.join(self.directory, "objects", digest + ".fasta")
+
+        if self.size is None:
+            self.size = sum(size for _, size, _ in self.entries())
+
+        if not os.path.isfile(path):
+            self.write(path, text)
+            self.size += os.path.getsize(path)
+        else:
+            os.utime(path)
 
+        self.write(self.ref_path(db, id), digest)
+
+        if self.size > self.max_size:
+            self.evict(keep = path)
+
+        return path
+
+    def write(self, path, text):
+        temporary = path + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+
+        with open(temporary, "w") as file_handle:
+            file_handle.write(text)
+
+        os.replace(temporary, path)
+
+    def entries(self):
+        '''
+            Returns (modification time, size, path) of every cached record.
+        '''
+
+        entries = []
+
+        for entry in os.scandir(os.path.join(self.directory, "objects")):
+            if entry.name.endswith(".fasta"):
+                stat = entry.stat()
+                entries.append( (stat.st_mtime, stat.st_size, entry.path) )
+
+        return entries
+
+    def evict(self, keep = None):
+        '''
+            Removes least recently used records (except `keep`) until cache
+            fits the limit. Size is recounted first, cache directory can be
+            shared by several processes.
+        '''
+
+        entries = self.entries()
+
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+
+            if path == keep:
+                continue
+
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+            total -= size
+
+        self.size = total
+
+def default_transport():
+    '''
+        Returns transport selected by environment: NCBI_FIXTURES (directory
+        with <id>.fasta files), NCBI_URL (efetch-like server) or NCBI itself.
     '''
-        Downloads .fasta file from NCBI database
+
+    if os.environ.get("NCBI_FIXTURES"):
+        return DirectoryTransport(os.environ["NCBI_FIXTURES"])
+
+    if os.environ.get("NCBI_URL"):
+        return HTTPTransport(os.environ["NCBI_URL"])
+
+    return EntrezTransport()
+
+def split_records(text):
+    '''
+        Splits .fasta text into list of (name, record text) pairs.
+    '''
+
+    records = []
+
+    for chunk in text.split("\n>"):
+        chunk = chunk.strip()
+
+        if len(chunk) == 0:
+            continue
+
+        if not chunk.startswith(">"):
+            chunk = ">" + chunk
+
+        records.append( (chunk[1:].split(None, 1)[0] if len(chunk) > 1 else "", chunk + "\n") )
+
+    return records
+
+def match_records(ids, records):
+    '''
+        Assigns fetched records to requested ids. Records are matched by
+        accession (with or without version). Ids without record were not
+        found. Only if no record matches any id (e.g. ids are not
+        accessions) and the numbers of records and ids are equal, records
+        are assigned in order; any other unmatched record raises ValueError.
+    '''
+
+    matched = {}
+    unmatched = []
+
+    for name, record in records:
+        for id in ids:
+            if id not in matched and (name == id or name.split(".")[0] == id.split(".")[0]):
+                matched[id] = record
+                break
+        else:
+            unmatched.append(name)
+
+    if len(matched) == 0 and len(records) == len(ids):
+        return dict(zip(ids, [record for _, record in records]))
+
+    if len(unmatched) > 0:
+        raise ValueError("Can not match fetched records " + ", ".join(unmatched) + " to requested ids " + ", ".join(ids) + ".")
+
+    return matched
+
+def download_many(ids, batch_size = 100, workers = 3, rate = 3, transport = None, cache = None):
+    '''
+        Downloads many .fasta records from NCBI database
+
+        Cached ids are not fetched again. Missing ones are fetched in batches
+        (one comma-joined efetch call per batch) on a thread pool, with at
+        most `rate` calls per second (NCBI allows 3 without API key).
 
         Input:
-            id: string - NCBI id of .fasta file
+            ids: list of string - NCBI ids.
+            batch_size: int - ids per request.
+            workers: int - number of concurrent requests.
+            rate: float - requests per second.
+            transport: object with fetch(ids) method (default: default_transport()).
+            cache: Cache - records cache (default: Cache()).
 
         Output:
-            string: path to downloaded file
+            dict: id -> path to .fasta file (ids not found are skipped)
     '''
 
-    Entrez.email = ""
+    transport = transport or default_transport()
+    cache = cache or Cache()
+    db = getattr(transport, "db", "")
+
+    paths = {}
+    missing = []
+
+    for id in dict.fromkeys(ids):
+        path = cache.get(db, id)
 
-    net_handle = Entrez.efetch(
-        db="nucleotide", id=id, rettype="fasta", retmode="text"
-    )
+        if path is not None:
+            paths[id] = path
+        else:
+            missing.append(id)
 
-    out_handle = open(id + ".fasta", "w")
-    out_handle.write(net_handle.read())
+    limiter = RateLimiter(rate)
 
-    out_handle.close()
-    net_handle.close()
+    def fetch(batch):
+        limiter.wait()
+
+        return batch, transport.fetch(batch)
+
+    batches = [ missing[it:it + batch_size] for it in range(0, len(missing), batch_size) ]
+
+    with ThreadPoolExecutor(max_workers = max(1, workers)) as executor:
+        for batch, text in executor.map(fetch, batches):
+            for id, record in match_records(batch, split_records(text)).items():
+                paths[id] = cache.put(db, id, record)
+
+    return paths
+
+def download(id):
+
+    '''
+        Downloads .fasta file from NCBI database (or takes it from cache)
+
+        Input:
+            id: string - NCBI id of .fasta file
+
+        Output:
+            string: path to downloaded file (None if id was not found)
+    '''
 
-    return id + ".fasta"
+    return download_many([id]).get(id)
@@ -0,0 +1,197 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import numpy as np
+
+from kernels import DIAGONAL, LEFT, UP
+
+def banded(seq1, seq2, scoring, gap_score, band, auto_widen = False):
+    '''
+        banded
+
+        Finds global alignment computing only cells close to the main
+        diagonal. Cell (i, j) is computed if
+
+            min(0, m - n) - band <= j - i <= max(0, m - n) + band
+
+        where n, m are lengths of Sequence 2 and Sequence 1, so time and
+        memory are O(n * band). If auto_widen is set and the path touches
+        the band edge, band is doubled and the alignment is recomputed.
+
+        Result is exact if the band covers the whole matrix or if no path
+        leaving the band can score better than the one found (upper bound
+        for paths which need that many gaps). Otherwise it is heuristic.
+
+        Input:
+            seq1: string - Sequence 1 string (without padding).
+            seq2: string - Sequence 2 string (without padding).
+            scoring: Scoring - substitution scores.
+            gap_score: int - score for gap.
+            band: int - band width (K).
+            auto_widen: bool - widen band while path touches its edge.
+
+        Output:
+            list (2) of string: aligned sequences
+            float: alignment score
+            bool: True if the score is proven optimal
+            int: band width used
+    '''
+
+    while True:
+        path, score, touches = _align(seq1, seq2, scoring, gap_score, band)
+        covered = _limits(len(seq1), len(seq2), band)[2]
+
+        if not (auto_widen and touches) or covered:
+            break
+
+        band = max(2 * band, 1)
+
+    exact = covered or score >= _outside_bound(len(seq1), len(seq2), scoring.best(), gap_score, band)
+
+    return path, score, exact, band
+
+
+def _limits(m, n, band):
+    '''
+        _limits
+
+        Returns lowest and highest diagonal (j - i) of the band and whether
+        the band covers the whole matrix.
+    '''
+
+    low = min(0, m - n) - band
+    high = max(0, m - n) + band
+
+    return low, high, low <= -n and high >= m
+
+
+def _outside_bound(m, n, best, gap_score, band):
+    '''
+        _outside_bound
+
+        Upper bound of the score of any path visiting a cell outside the
+        band. Such path needs at least G gaps, so it has at most
+        (n + m - G) / 2 aligned pairs, each scoring at most `best`.
+        Returns infinity if the bound cannot be given.
+    '''
+
+    low, high, covered = _limits(m, n, band)
+
+    if covered:
+        return -np.inf
+
+    if 2 * gap_score > best:
+        return np.inf
+
+    gaps = []
+
+    if low - 1 >= -n:
+        gaps.append((m - n) - 2 * (low - 1))
+
+    if high + 1 <= m:
+        gaps.append(2 * (high + 1) - (m - n))
+
+    gaps = min(gaps)
+
+    return (n + m - gaps) / 2 * best + gaps * gap_score
+
+
+def _align(seq1, seq2, scoring, gap_score, band):
+    '''
+        _align
+
+        Fills the band row by row and traces the alignment back. Row i of
+        band matrices stores cells j = i + low ... i + high.
+
+        Output:
+            list (2) of string: aligned sequences
+            float: alignment score
+            bool: True if path touches the band edge
+    '''
+
+    m = len(seq1)
+    n = len(seq2)
+
+    low, high, _ = _limits(m, n, band)
+    width = high - low + 1
+
+    profile = scoring.profile(scoring.encode(seq1))
+    codes2 = scoring.encode(seq2)
+
+    offsets = np.arange(width)
+    gaps = offsets * gap_score
+
+    output = np.full( (n + 1, width), -np.inf )
+    trace = np.zeros( (n + 1, width), dtype = np.uint8 )
+
+    columns = low + offsets
+    valid = (columns >= 0) & (columns <= m)
+    output[0, valid] = columns[valid] * gap_score
+    trace[0, valid & (columns > 0)] = LEFT
+
+    up = np.full(width, -np.inf)
+
+    for i in range(1, n + 1):
+        prev = output[i - 1]
+        row = output[i]
+
+        columns = i + low + offsets
+        valid = (columns >= 0) & (columns <= m)
+        inner = valid & (columns > 0)
+
+        diagonal = np.full(width, -np.inf)
+        diagonal[inner] = prev[inner] + profile[codes2[i - 1], columns[inner] - 1]
+
+        up[:-1] = prev[1:] + gap_score
+
+        np.maximum(diagonal, up, out = row)
+        row[~inner] = -np.inf
+
+        if columns[0] <= 0:
+            row[-low - i] = i * gap_score
+
+        row -= gaps
+        np.maximum.accumulate(row, out = row)
+        row += gaps
+
+        row[~valid] = -np.inf
+
+        bits = trace[i]
+        bits[inner] = (diagonal[inner] == row[inner]) * np.uint8(DIAGONAL)
+        bits[1:][inner[1:]] |= (row[:-1][inner[1:]] + gap_score == row[1:][inner[1:]]) * np.uint8(LEFT)
+        bits[valid] |= (up[valid] == row[valid]) * np.uint8(UP)
+
+    letters_x = []
+    letters_y = []
+
+    touches = False
+
+    i = n
+    j = m
+
+    while i > 0 or j > 0:
+        offset = j - i - low
+
+        if (offset == 0 and low > -n) or (offset == width - 1 and high < m):
+            touches = True
+
+        bits = trace[i, offset]
+
+        if bits & DIAGONAL:
+            letters_x.append(seq1[j - 1])
+            letters_y.append(seq2[i - 1])
+            i -= 1
+            j -= 1
+
+        elif bits & LEFT:
+            letters_x.append(seq1[j - 1])
+            letters_y.append("-")
+            j -= 1
+
+        else:
+            letters_x.append("-")
+            letters_y.append(seq2[i - 1])
+            i -= 1
+
+    score = float(output[n, m - n - low])
+
+    return ["".join(reversed(letters_x)), "".join(reversed(letters_y))], score, touches
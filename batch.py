@@ -0,0 +1,260 @@
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import click
+
+from needleman_wunch import NeedlemanWunch
+from main import validate_score
+from fasta import FastaReader
+from results import ResultWriter
+from result_cache import ResultCache
+
+# Result caches of worker process (by directory).
+caches = {}
+
+
+def read_records(directory, full_header = False):
+    '''
+        read_records
+
+        Reads all records from .fasta file. Records are named by the first word
+        of their header (or by their position in file if header is empty).
+
+        input:
+            directory: string - path to .fasta file.
+            full_header: bool - name records by whole header (with description).
+
+        output:
+            list of (string, string): (name, sequence) pairs
+    '''
+
+    records = []
+
+    with FastaReader(directory) as reader:
+        for it, (header, sequence) in enumerate(reader):
+            if len(sequence) != 0:
+                name = (header if full_header else header.split()[0]) if header else str(it)
+
+                records.append( (name, sequence.decode("ascii")) )
+
+    return records
+
+
+def make_pairs(records1, records2):
+    '''
+        make_pairs
+
+        Generates pairs of records to align. Without second set every pair
+        from the first set is generated once (all-vs-all), otherwise every
+        record of the first set is paired with every record of the second one
+        (query x database).
+
+        input:
+            records1: list of (string, string) - first set of records.
+            records2: list of (string, string) - second set of records or None.
+
+        output:
+            generator of ((string, string), (string, string)): pairs of records
+    '''
+
+    if records2 is None:
+        return itertools.combinations(records1, 2)
+
+    return itertools.product(records1, records2)
+
+
+def worker_cache(directory, limit):
+    '''
+        worker_cache
+
+        Returns result cache of worker process, opened once per directory.
+
+        input:
+            directory: string - cache directory (None - no cache).
+            limit: int - size limit of cache database (MB).
+
+        output:
+            ResultCache: cache or None
+    '''
+
+    if directory is None:
+        return None
+
+    if directory not in caches:
+        caches[directory] = ResultCache(directory, disk_limit = limit * 2 ** 20)
+
+    return caches[directory]
+
+
+def align_chunk(chunk, options):
+    '''
+        align_chunk
+
+        Aligns chunk of pairs in worker process. In score-only mode only the
+        score is computed (statistics are NA, score of pairs abandoned by
+        X-drop too). Cached results are not aligned again.
+
+        input:
+            chunk: list of ((string, string), (string, string)) - pairs of records.
+            options: dict - NeedlemanWunch arguments (scores, engine, ...) and
+                cache_dir, cache_limit.
+
+        output:
+            list of dict: result records (see make_record)
+            dict: cache counters of the chunk (empty without cache)
+    '''
+
+    records = []
+
+    cache = worker_cache(options.get('cache_dir'), options.get('cache_limit', 256))
+
+    for (name1, seq1), (name2, seq2) in chunk:
+        aligner = NeedlemanWunch(sequence1 = seq1, sequence2 = seq2, cache = cache, **options)
+
+        records.append(aligner.align().to_record(name1, name2))
+
+    return records, cache.take_counters() if cache is not None else {}
+
+
+def run(pairs, options, writer, workers, chunk_size, counters = None):
+    '''
+        run
+
+        Aligns pairs on process pool and streams result records to writer
+        as soon as chunks are finished. Number of chunks in flight is limited,
+        so pairs are generated lazily.
+
+        input:
+            pairs: iterable - pairs of records (see make_pairs).
+            options: dict - NeedlemanWunch arguments.
+            writer: ResultWriter - output of records.
+            workers: int - number of worker processes.
+            chunk_size: int - number of pairs sent to worker at once.
+            counters: dict - cache counters of workers are added to it.
+
+        output:
+            int: number of aligned pairs
+    '''
+
+    pairs = iter(pairs)
+    done = 0
+
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        pending = set()
+
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(itertools.islice(pairs, chunk_size))
+
+                if len(chunk) == 0:
+                    break
+
+                pending.add(executor.submit(align_chunk, chunk, options))
+
+            if len(pending) == 0:
+                break
+
+            finished, pending = wait(pending, return_when = FIRST_COMPLETED)
+
+            for future in finished:
+                records, chunk_counters = future.result()
+
+                for record in records:
+                    writer.write(record)
+                    done += 1
+
+                if counters is not None:
+                    for name, value in chunk_counters.items():
+                        counters[name] = counters.get(name, 0) + value
+
+    return done
+
+
+@click.command()
+
+@click.option('--fasta1', '--f1', required = True, type = click.Path(exists = True, dir_okay = False), help = 'Multi-record .fasta file.')
+@click.option('--fasta2', '--f2', default = None, type = click.Path(exists = True, dir_okay = False), help = 'Database .fasta file. If not given all pairs from --fasta1 are aligned.')
+
+@click.option('--match_score', '--ms',     required = True, help = 'Match score',    type = int, callback = validate_score)
+@click.option('--mismatch_score', '--mms', required = True, help = 'Mismatch score', type = int, callback = validate_score)
+@click.option('--gap_score', '--gs',       required = True, help = 'Gap score',      type = int, callback = validate_score)
+
+@click.option('--matrix', '--mx',         default = None, help = 'Substitution matrix name (e.g. BLOSUM62, PAM250) or path to matrix file. Replaces match/mismatch scores.')
+@click.option('--gap_open', '--go',       default = None, help = 'Gap opening score (gotoh and local engines, default: gap score)',   type = int)
+@click.option('--gap_extend', '--ge',     default = None, help = 'Gap extension score (gotoh and local engines, default: gap score)', type = int)
+
+@click.option('--engine', '--e', default = "full", show_default = True, type = click.Choice(['full', 'hirschberg', 'banded', 'gotoh', 'local'], case_sensitive=False), help = 'Alignment engine.')
+@click.option('--band', '--b', default = 32, show_default = True, type = click.IntRange(min = 0), help = 'Band width (K) of banded engine.')
+@click.option('--auto_widen', '--aw', is_flag = True, help = 'Double band width while path touches band edge (banded engine).')
+
+@click.option('--score_only', '--so', is_flag = True, help = 'Compute only global scores in linear memory (screening).')
+@click.option('--xdrop', '--xd', default = None, type = click.IntRange(min = 0), help = 'X-drop threshold of score-only mode (abandoned pairs get NA score).')
+
+@click.option('--workers', '--w', default = os.cpu_count(), show_default = True, type = click.IntRange(min = 1), help = 'Number of worker processes.')
+@click.option('--chunk_size', '--cs', default = 16, show_default = True, type = click.IntRange(min = 1), help = 'Pairs sent to worker at once.')
+@click.option('--output', '--o', default = "batch_out.tsv", show_default = True, type = click.Path(dir_okay = False), help = 'Output file ("-" for standard output).')
+@click.option('--format', '--f', default = "tsv", show_default = True, type = click.Choice(['jsonl', 'tsv', 'sam'], case_sensitive=False), help = 'Output format (JSON Lines with aligned sequences, TSV statistics or SAM with CIGAR).')
+@click.option('--cache_dir', '--cd', default = None, type = click.Path(file_okay = False), help = 'Result cache directory (pairs aligned before with the same parameters are not aligned again).')
+@click.option('--cache_limit', '--cl', default = 256, show_default = True, type = click.IntRange(min = 1), help = 'Size limit of result cache (MB).')
+
+def batch(fasta1, fasta2, workers, chunk_size, output, format, **kwargs):
+
+    '''
+        Batch Needleman-Wunch alignment
+
+        Aligns all pairs of records from one multi-record .fasta file, or every
+        record of the first file with every record of the second one. Pairs are
+        aligned on process pool and results are written as they are finished.
+
+        Examples:
+
+         \b
+         # All vs all
+         python batch.py --f1=family.fasta --ms=1 --mms=-1 --gs=-2
+
+         \b
+         # Query x database on 8 processes
+         python batch.py --f1=queries.fasta --f2=database.fasta --ms=1 --mms=-1 --gs=-2 --w=8 --o=hits.tsv
+
+         \b
+         # Screening: scores only, pairs falling 50 below the best score are dropped
+         python batch.py --f1=queries.fasta --f2=database.fasta --ms=1 --mms=-1 --gs=-2 --so --xd=50
+
+         \b
+         # SAM-like output with CIGAR strings
+         python batch.py --f1=queries.fasta --f2=database.fasta --ms=1 --mms=-1 --gs=-2 --f=sam --o=hits.sam
+
+         \b
+         # Reruns align only pairs which are not in the cache
+         python batch.py --f1=family.fasta --ms=1 --mms=-1 --gs=-2 --cd=.cache
+    '''
+
+    gap_open = kwargs['gap_open'] if kwargs['gap_open'] is not None else kwargs['gap_score']
+    gap_extend = kwargs['gap_extend'] if kwargs['gap_extend'] is not None else kwargs['gap_score']
+
+    if kwargs['engine'] in ("gotoh", "local") and gap_open > gap_extend:
+        raise click.BadParameter("Gap opening score can not be higher than gap extension score.", param_hint = "'--gap_open'")
+
+    if kwargs['engine'] == "local" and (gap_open >= 0 or gap_extend > 0):
+        raise click.BadParameter("Gap scores of local alignment must be negative.", param_hint = "'--gap_open'")
+
+    records1 = read_records(fasta1)
+    records2 = read_records(fasta2) if fasta2 is not None else None
+
+    options = dict(kwargs, mode = "top_score", print_graph = False)
+
+    with ResultWriter(output, format, append = False) as writer:
+        counters = {}
+        done = run(make_pairs(records1, records2), options, writer, workers, chunk_size, counters)
+
+    print("Aligned", done, "pairs. Results saved to", output)
+
+    if kwargs['cache_dir'] is not None:
+        print("Cache:", counters.get("memory_hits", 0) + counters.get("disk_hits", 0), "hits,", counters.get("misses", 0), "misses,",
+              counters.get("evictions", 0), "evictions")
+
+
+if __name__ == "__main__":
+
+    batch()
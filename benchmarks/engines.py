@@ -0,0 +1,340 @@
+import os
+import sys
+import json
+import time
+import random
+import resource
+import platform
+import tempfile
+import contextlib
+import subprocess
+import statistics
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENGINES = ["graph", "bitmask", "hirschberg", "banded", "gotoh", "score_only"]
+MODES = ["all", "full_path", "top_score"]
+
+# Engines which fill whole score matrix.
+FULL_ENGINES = ["graph", "bitmask"]
+
+# Engines which depend on mode (bitmask traceback reports optimal global
+# paths in every mode).
+MODE_ENGINES = ["graph"]
+
+
+def synthetic_pair(length, identity, seed):
+    '''
+        synthetic_pair
+
+        Generates pair of related DNA sequences. Every position of the first
+        sequence is kept in the second one with probability `identity`,
+        otherwise it is substituted, deleted or followed by an insertion.
+
+        input:
+            length: int - length of the first sequence.
+            identity: float - probability of keeping a position.
+            seed: int - random seed.
+
+        output:
+            (string, string): pair of sequences
+    '''
+
+    generator = random.Random(seed)
+
+    seq1 = "".join(generator.choice("ACGT") for it in range(length))
+    seq2 = []
+
+    for letter in seq1:
+        event = generator.random()
+
+        if event < identity:
+            seq2.append(letter)
+        elif event < identity + (1 - identity) * 2 / 3:
+            seq2.append(generator.choice("ACGT".replace(letter, "")))
+        elif event < identity + (1 - identity) * 5 / 6:
+            continue
+        else:
+            seq2.append(letter + generator.choice("ACGT"))
+
+    return seq1, "".join(seq2)
+
+
+def make_cases(lengths, identities, modes, engines, graph_limit, full_limit, graph_lengths = (), max_paths = 1000):
+    '''
+        make_cases
+
+        Generates benchmark cases. Graph traceback is run in every mode, other
+        engines once. Graph traceback is run at its own (short) lengths as
+        well, stored paths grow exponentially. Cases too large for an engine
+        are marked as skipped.
+
+        input:
+            lengths: list of int - sequence lengths.
+            identities: list of float - identity levels.
+            modes: list of string - path finding modes of graph traceback.
+            engines: list of string - engines (see ENGINES).
+            graph_limit: int - longest sequence aligned with graph traceback.
+            full_limit: int - longest sequence aligned with full matrix.
+            graph_lengths: list of int - additional lengths of graph traceback.
+            max_paths: int - paths reported by matrix engines.
+
+        output:
+            list of dict: cases
+    '''
+
+    cases = []
+
+    for length in sorted(set(lengths) | set(graph_lengths)):
+        for identity in identities:
+            for engine in engines:
+                if engine != "graph" and length not in lengths:
+                    continue
+
+                for mode in (modes if engine in MODE_ENGINES else [None]):
+                    case = {"engine": engine, "mode": mode, "length": length, "identity": identity}
+
+                    if engine in FULL_ENGINES:
+                        case["max_paths"] = max_paths
+
+                    if engine == "graph" and length > graph_limit:
+                        case["skip"] = "length > graph limit (" + str(graph_limit) + ")"
+                    elif engine in FULL_ENGINES + ["gotoh"] and length > full_limit:
+                        case["skip"] = "length > full matrix limit (" + str(full_limit) + ")"
+
+                    cases.append(case)
+
+    return cases
+
+
+def run_case(case, seed):
+    '''
+        run_case
+
+        Runs single case in current process (called in a fresh subprocess,
+        so peak RSS belongs to this case only). Output of forward is
+        discarded.
+
+        input:
+            case: dict - benchmark case (see make_cases).
+            seed: int - random seed.
+
+        output:
+            dict: wall time (seconds), peak and base RSS (kB)
+    '''
+
+    from needleman_wunch import NeedlemanWunch
+
+    seq1, seq2 = synthetic_pair(case["length"], case["identity"], seed)
+
+    kwargs = dict(sequence1 = seq1, sequence2 = seq2, match_score = 1, mismatch_score = -1, gap_score = -2,
+                  mode = case["mode"] or "top_score", print_graph = False, plot = False)
+
+    if case["engine"] in FULL_ENGINES:
+        kwargs.update(engine = "full", traceback = case["engine"], max_paths = case.get("max_paths", 1000))
+    elif case["engine"] == "score_only":
+        kwargs.update(score_only = True)
+    else:
+        kwargs.update(engine = case["engine"], gap_open = -3, gap_extend = -1)
+
+    aligner = NeedlemanWunch(**kwargs)
+
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        start = time.perf_counter()
+        aligner.forward()
+        elapsed = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {"time": elapsed, "peak_rss_kb": peak, "base_rss_kb": base}
+
+
+def measure(case, seed, repeat, timeout):
+    '''
+        measure
+
+        Runs case `repeat` times, every time in a fresh interpreter (offline:
+        NCBI transport points to an empty fixture directory).
+
+        input:
+            case: dict - benchmark case.
+            seed: int - random seed.
+            repeat: int - number of runs.
+            timeout: float - time limit of a single run (seconds).
+
+        output:
+            dict: case with status, median wall time, peak RSS and cells/second
+    '''
+
+    result = dict(case)
+
+    if "skip" in case:
+        result["status"] = "skipped"
+        return result
+
+    runs = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, PYTHONPATH = ROOT, NCBI_FIXTURES = directory, MPLBACKEND = "Agg")
+        env.pop("NCBI_URL", None)
+
+        for it in range(repeat):
+            try:
+                process = subprocess.run([sys.executable, "-m", "benchmarks.engines", "--case", json.dumps(case), "--seed", str(seed)],
+                                         cwd = directory, env = env, capture_output = True, text = True, timeout = timeout)
+
+            except subprocess.TimeoutExpired:
+                result["status"] = "timeout"
+                return result
+
+            if process.returncode != 0:
+                result["status"] = "error"
+                result["error"] = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else str(process.returncode)
+                return result
+
+            runs.append(json.loads(process.stdout.splitlines()[-1]))
+
+    seq1, seq2 = synthetic_pair(case["length"], case["identity"], seed)
+
+    elapsed = statistics.median(run["time"] for run in runs)
+    cells = len(seq1) * len(seq2)
+
+    result.update(status = "ok", time = elapsed, runs = [run["time"] for run in runs],
+                  peak_rss_kb = max(run["peak_rss_kb"] for run in runs),
+                  base_rss_kb = min(run["base_rss_kb"] for run in runs),
+                  cells_per_s = cells / elapsed if elapsed > 0 else None)
+
+    return result
+
+
+def case_key(result):
+    return (result["engine"], result["mode"] or "-", result["length"], result["identity"])
+
+
+def print_results(results):
+    '''
+        print_results
+
+        Prints results table.
+    '''
+
+    print("%-10s %-9s %6s %5s %-8s %10s %12s %12s" % ("engine", "mode", "length", "ident", "status", "time_s", "peak_rss_mb", "Mcells/s"))
+
+    for result in results:
+        engine, mode, length, identity = case_key(result)
+
+        if result["status"] == "ok":
+            print("%-10s %-9s %6d %5.2f %-8s %10.4f %12.1f %12.2f" % (engine, mode, length, identity, "ok", result["time"],
+                  result["peak_rss_kb"] / 1024, (result["cells_per_s"] or 0) / 1e6))
+        else:
+            print("%-10s %-9s %6d %5.2f %-8s" % (engine, mode, length, identity, result["status"]))
+
+
+def compare(old, new):
+    '''
+        compare
+
+        Prints time and peak RSS ratios (new / old) of cases present in both
+        result files.
+
+        input:
+            old: dict - previous results (JSON of this benchmark).
+            new: dict - current results.
+
+        output:
+            None
+    '''
+
+    previous = { case_key(result): result for result in old["results"] }
+
+    print()
+    print("%-10s %-9s %6s %5s %10s %10s %8s %8s" % ("engine", "mode", "length", "ident", "old_s", "new_s", "time", "rss"))
+
+    for result in new["results"]:
+        key = case_key(result)
+
+        if key not in previous or result["status"] != "ok" or previous[key]["status"] != "ok":
+            continue
+
+        before = previous[key]
+
+        print("%-10s %-9s %6d %5.2f %10.4f %10.4f %7.2fx %7.2fx" % (key + (before["time"], result["time"],
+              result["time"] / max(before["time"], 1e-9), result["peak_rss_kb"] / max(before["peak_rss_kb"], 1))))
+
+
+@click.command()
+
+@click.option('--length', '--l', default = [100, 1000, 10000], show_default = True, multiple = True, type = click.IntRange(min = 1), help = 'Sequence length (can be repeated).')
+@click.option('--identity', '--i', default = [0.9, 0.7], show_default = True, multiple = True, type = click.FloatRange(0, 1), help = 'Identity level (can be repeated).')
+@click.option('--mode', '--m', default = MODES, show_default = True, multiple = True, type = click.Choice(MODES), help = 'Mode of graph traceback (can be repeated).')
+@click.option('--engine', '--e', default = ENGINES, show_default = True, multiple = True, type = click.Choice(ENGINES), help = 'Engine (can be repeated).')
+@click.option('--repeat', '--r', default = 3, show_default = True, type = click.IntRange(min = 1), help = 'Runs of every case (median time is reported).')
+@click.option('--seed', '--s', default = 0, show_default = True, type = int, help = 'Random seed of synthetic sequences.')
+@click.option('--timeout', '--t', default = 600, show_default = True, type = float, help = 'Time limit of a single run (seconds).')
+@click.option('--graph_limit', '--gl', default = 40, show_default = True, type = int, help = 'Longest sequence aligned with graph traceback (stored paths grow exponentially).')
+@click.option('--graph_length', '--gln', default = [10, 20, 40], show_default = True, multiple = True, type = click.IntRange(min = 1), help = 'Additional sequence length of graph traceback only (can be repeated).')
+@click.option('--max_paths', '--mp', default = 1000, show_default = True, type = click.IntRange(min = 1), help = 'Paths reported by graph and bitmask engines.')
+@click.option('--full_limit', '--fl', default = 5000, show_default = True, type = int, help = 'Longest sequence aligned with full matrix engines.')
+@click.option('--output', '--o', default = "benchmark.json", show_default = True, type = click.Path(dir_okay = False), help = 'Output .json file.')
+@click.option('--compare', '--c', 'previous', default = None, type = click.Path(exists = True, dir_okay = False), help = 'Previous .json results to compare with.')
+@click.option('--case', default = None, hidden = True)
+
+def engines(length, identity, mode, engine, repeat, seed, timeout, graph_limit, graph_length, max_paths, full_limit, output, previous, case):
+
+    '''
+        Alignment engines benchmark
+
+        Aligns synthetic sequence pairs of several lengths and identity levels
+        with every engine (and every mode of graph traceback, which is also run
+        at its own short lengths). Every run is done
+        in a fresh interpreter, offline. Wall time, peak RSS and cells/second
+        are reported and saved as JSON, which can be compared with a previous run.
+
+        Examples:
+
+         \b
+         python -m benchmarks.engines --o=before.json
+         python -m benchmarks.engines --o=after.json --c=before.json
+
+         \b
+         # Quick run
+         python -m benchmarks.engines --l=100 --l=1000 --r=1 --e=bitmask --e=hirschberg
+    '''
+
+    if case is not None:
+        print(json.dumps(run_case(json.loads(case), seed)))
+        return
+
+    import numpy as np
+
+    results = []
+
+    for item in make_cases(length, identity, mode, engine, graph_limit, full_limit, graph_length, max_paths):
+        results.append(measure(item, seed, repeat, timeout))
+
+    report = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+                 "seed": seed, "repeat": repeat, "scores": [1, -1, -2], "gotoh": [-3, -1], "max_paths": max_paths},
+        "results": results,
+    }
+
+    print_results(results)
+
+    with open(output, "w") as file_handle:
+        json.dump(report, file_handle, indent = 1)
+
+    print()
+    print("Results saved to", output)
+
+    if previous is not None:
+        with open(previous, "r") as file_handle:
+            compare(json.load(file_handle), report)
+
+
+if __name__ == "__main__":
+
+    engines()
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import random
+import tracemalloc
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from needleman_wunch import NeedlemanWunch
+from kernels import fill_score_matrix
+
+# Imported by build_graph, imported here so that it is not traced.
+import tqdm
+
+
+def random_pair(length, seed):
+    '''
+        random_pair
+
+        Generates pair of related DNA sequences (second one is mutated copy
+        of the first one).
+
+        input:
+            length: int - length of sequences.
+            seed: int - random seed.
+
+        output:
+            (string, string): pair of sequences
+    '''
+
+    generator = random.Random(seed)
+
+    seq1 = "".join(generator.choice("ACGT") for it in range(length))
+    seq2 = "".join(letter if generator.random() > 0.1 else generator.choice("ACGT") for letter in seq1)
+
+    return seq1, seq2
+
+
+def letters_size(graph):
+    '''
+        letters_size
+
+        Returns memory of path letters stored in graph nodes (the same for
+        every node representation).
+
+        input:
+            graph: BinaryGraph - built graph.
+
+        output:
+            (int, int): number of stored paths, their size in bytes
+    '''
+
+    paths = 0
+    size = 0
+
+    for node in list(graph.roots.values()) + list(graph.nodes.values()):
+        paths += len(node.letter_x)
+        size += sys.getsizeof(node.letter_x) + sys.getsizeof(node.letter_y)
+        size += sum(sys.getsizeof(letters) for letters in node.letter_x + node.letter_y)
+
+    return paths, size
+
+
+def measure(length, retain, seed, scores):
+    '''
+        measure
+
+        Builds BinaryGraph of a random pair of sequences under tracemalloc.
+        Score and traceback matrices are computed before tracing starts,
+        so only the graph is measured.
+
+        input:
+            length: int - length of sequences.
+            retain: bool - retain whole graph (as with --print_graph).
+            seed: int - random seed.
+            scores: (int, int, int) - match, mismatch and gap scores.
+
+        output:
+            dict: nodes, paths, build time, peak and current traced memory
+            and size of stored letters (bytes)
+    '''
+
+    seq1, seq2 = random_pair(length, seed)
+
+    aligner = NeedlemanWunch(sequence1 = seq1, sequence2 = seq2, match_score = scores[0], mismatch_score = scores[1], gap_score = scores[2],
+                             mode = "top_score", print_graph = retain)
+
+    output, trace = fill_score_matrix(aligner.seq1, aligner.seq2, aligner.scoring, aligner.gap_score, traceback = True)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    graph = aligner.build_graph(output, trace)
+
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    paths, letters = letters_size(graph)
+
+    return {"nodes": len(graph.nodes) + len(graph.roots), "paths": paths, "time": elapsed,
+            "peak": peak, "current": current, "letters": letters}
+
+
+@click.command()
+
+@click.option('--length', '--l', default = [30, 40, 50], show_default = True, multiple = True, type = click.IntRange(min = 1), help = 'Length of aligned sequences (can be repeated).')
+@click.option('--match_score', '--ms',     default = 2,  show_default = True, type = int, help = 'Match score')
+@click.option('--mismatch_score', '--mms', default = -3, show_default = True, type = int, help = 'Mismatch score')
+@click.option('--gap_score', '--gs',       default = -5, show_default = True, type = int, help = 'Gap score')
+@click.option('--seed', '--s', default = 0, show_default = True, type = int, help = 'Random seed.')
+
+def graph_memory(length, match_score, mismatch_score, gap_score, seed):
+
+    '''
+        BinaryGraph memory benchmark
+
+        Measures memory (tracemalloc) of BinaryGraph built for random pairs of
+        related sequences, with retained graph (--print_graph) and without it.
+        Stored path letters grow exponentially with length and are the same
+        for every node representation, so memory of graph structure itself
+        (overhead: total minus letters) is reported per node.
+
+        Examples:
+
+         \b
+         python -m benchmarks.graph_memory --l=40 --l=60
+    '''
+
+    scores = (match_score, mismatch_score, gap_score)
+
+    print("length\tretain\tnodes\tpaths\ttime_s\tpeak_kb\tgraph_kb\tletters_kb\toverhead/node")
+
+    for size in length:
+        for retain in (True, False):
+            result = measure(size, retain, seed, scores)
+
+            overhead = (result["current"] - result["letters"]) / max(result["nodes"], 1)
+
+            print("%d\t%s\t%d\t%d\t%.3f\t%.1f\t%.1f\t%.1f\t%.1f" % (size, retain, result["nodes"], result["paths"], result["time"],
+                  result["peak"] / 1024, result["current"] / 1024, result["letters"] / 1024, overhead))
+
+
+if __name__ == "__main__":
+
+    graph_memory()
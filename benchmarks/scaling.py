@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import time
+import platform
+import statistics
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from kernels import fill_score_matrix
+from wavefront import fill_wavefront
+from substitution import match_mismatch
+from benchmarks.engines import synthetic_pair
+
+
+def measure(fill, repeat):
+    '''
+        measure
+
+        Runs fill `repeat` times.
+
+        input:
+            fill: function - fills score and traceback matrices.
+            repeat: int - number of runs.
+
+        output:
+            float: median wall time (seconds)
+            (np.ndarray, np.ndarray): matrices of the last run
+    '''
+
+    times = []
+
+    for it in range(repeat):
+        start = time.perf_counter()
+        result = fill()
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times), result
+
+
+@click.command()
+
+@click.option('--length', '--l', default = 10000, show_default = True, type = click.IntRange(min = 1), help = 'Sequence length.')
+@click.option('--identity', '--i', default = 0.9, show_default = True, type = click.FloatRange(0, 1), help = 'Identity level.')
+@click.option('--workers', '--w', default = [1, 2, 4, 8, 16, 32], show_default = True, multiple = True, type = click.IntRange(min = 1), help = 'Worker count (can be repeated).')
+@click.option('--backend', '--bk', default = ["thread", "process"], show_default = True, multiple = True, type = click.Choice(['thread', 'process']), help = 'Backend (can be repeated).')
+@click.option('--tile', '--tl', default = 1024, show_default = True, type = click.IntRange(min = 1), help = 'Tile size.')
+@click.option('--repeat', '--r', default = 3, show_default = True, type = click.IntRange(min = 1), help = 'Runs of every case (median time is reported).')
+@click.option('--seed', '--s', default = 0, show_default = True, type = int, help = 'Random seed of synthetic sequences.')
+@click.option('--output', '--o', default = "scaling.json", show_default = True, type = click.Path(dir_okay = False), help = 'Output .json file.')
+
+def scaling(length, identity, workers, backend, tile, repeat, seed, output):
+
+    '''
+        Wavefront engine scaling benchmark
+
+        Fills score and traceback matrices of a synthetic pair with the serial
+        kernel and with the wavefront engine for every worker count, checks
+        that the matrices are identical and reports speedup versus the serial
+        kernel. Worker counts above the number of CPUs are skipped.
+
+        Examples:
+
+         \b
+         python -m benchmarks.scaling --l=10000 --w=1 --w=4 --w=16 --bk=thread
+
+         \b
+         # Quick run
+         python -m benchmarks.scaling --l=2000 --w=1 --w=2 --r=1
+    '''
+
+    seq1, seq2 = synthetic_pair(length, identity, seed)
+    seq1 = " " + seq1
+    seq2 = " " + seq2
+
+    scoring = match_mismatch(1, -1)
+
+    serial, expected = measure(lambda: fill_score_matrix(seq1, seq2, scoring, -2, traceback = True), repeat)
+
+    results = [{"backend": "serial", "workers": 1, "time": serial, "speedup": 1.0, "identical": True}]
+
+    for name in backend:
+        for count in workers:
+            if count > os.cpu_count():
+                continue
+
+            elapsed, matrices = measure(lambda: fill_wavefront(seq1, seq2, scoring, -2, count, tile, name), repeat)
+
+            identical = all(np.array_equal(a, b) for a, b in zip(expected, matrices))
+
+            results.append({"backend": name, "workers": count, "time": elapsed, "speedup": serial / elapsed, "identical": identical})
+
+            del matrices
+
+    print("%-8s %7s %10s %8s %9s" % ("backend", "workers", "time_s", "speedup", "identical"))
+
+    for result in results:
+        print("%-8s %7d %10.4f %7.2fx %9s" % (result["backend"], result["workers"], result["time"], result["speedup"], result["identical"]))
+
+    report = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "length": length, "identity": identity, "tile": tile, "seed": seed, "repeat": repeat},
+        "results": results,
+    }
+
+    with open(output, "w") as file_handle:
+        json.dump(report, file_handle, indent = 1)
+
+    print()
+    print("Results saved to", output)
+
+    if not all(result["identical"] for result in results):
+        raise SystemExit("Wavefront result differs from serial kernel.")
+
+
+if __name__ == "__main__":
+
+    scaling()
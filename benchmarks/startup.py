@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import statistics
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Startup budget (seconds) of a short headless alignment.
+BUDGET = 0.5
+
+COMMAND = ["main.py", "--s1=ACGCGCG", "--s2=ACACGCA", "--ms=1", "--mms=-1", "--gs=-2",
+           "--m=top_score", "--pg=False", "--tb=bitmask", "--no-plot"]
+
+
+def measure(repeat):
+    '''
+        measure
+
+        Runs short headless alignment in fresh interpreter `repeat` times.
+
+        input:
+            repeat: int - number of runs.
+
+        output:
+            list of float: wall time of every run (seconds)
+    '''
+
+    times = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for it in range(repeat):
+            start = time.perf_counter()
+
+            subprocess.run([sys.executable, os.path.join(ROOT, COMMAND[0])] + COMMAND[1:], cwd = directory,
+                           check = True, stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
+
+            times.append(time.perf_counter() - start)
+
+    return times
+
+
+def heavy_modules():
+    '''
+        heavy_modules
+
+        Returns modules which should not be imported on headless path.
+    '''
+
+    code = ("import sys; sys.argv = " + repr(COMMAND) + "; import main\n"
+            "try:\n    main.main()\nexcept SystemExit:\n    pass\n"
+            "print('modules:', *[m for m in ('matplotlib', 'scipy', 'Bio', 'tqdm') if m in sys.modules])")
+
+    with tempfile.TemporaryDirectory() as directory:
+        result = subprocess.run([sys.executable, "-c", code], cwd = directory, env = dict(os.environ, PYTHONPATH = ROOT),
+                                check = True, capture_output = True, text = True)
+
+    return result.stdout.splitlines()[-1].split()[1:]
+
+
+@click.command()
+
+@click.option('--repeat', '--r', default = 10, show_default = True, type = click.IntRange(min = 1), help = 'Number of runs.')
+@click.option('--budget', '--b', default = BUDGET, show_default = True, type = float, help = 'Allowed median startup time (seconds).')
+
+def startup(repeat, budget):
+
+    '''
+        Startup time benchmark
+
+        Measures wall time of a short headless alignment (python main.py ... --no-plot)
+        and fails if its median exceeds the budget or if plotting/network modules
+        are imported.
+
+        Examples:
+
+         \b
+         python -m benchmarks.startup --repeat=20
+    '''
+
+    times = measure(repeat)
+    median = statistics.median(times)
+
+    print("runs:  ", repeat)
+    print("min:    %.3f s" % min(times))
+    print("median: %.3f s" % median)
+    print("budget: %.3f s" % budget)
+
+    modules = heavy_modules()
+
+    if len(modules) != 0:
+        print("heavy modules imported:", " ".join(modules))
+
+    if median > budget or len(modules) != 0:
+        print("FAILED")
+        sys.exit(1)
+
+    print("OK")
+
+
+if __name__ == "__main__":
+
+    startup()
@@ -1,5 +1,7 @@
 # Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
 
+import random
+
 import numpy as np
 class BinaryGraph():
     '''
@@ -7,7 +9,8 @@ class BinaryGraph():
 
         Data structure class. Specific type of binary tree 
         where every node can have multiple parents as well 
-        as children.
+        as children. Nodes are indexed by integer keys
+        (x * len(seq1) + y).
     '''
 
     def __init__(self, seq1, seq2, retainGraph):
@@ -25,6 +28,8 @@ class BinaryGraph():
         self.seq1 = seq1
         self.seq2 = seq2
 
+        self.columns = len(seq1)
+
         self.scores = []
 
         self.roots = {}
@@ -33,6 +38,24 @@ class BinaryGraph():
 
         self.retainGraph = retainGraph
 
+        self.path_count = 0
+
+    def key(self, x, y):
+        '''
+            key method
+
+            Returns key of (x, y) coordinates in roots and nodes dictionaries.
+
+            Input:
+                x: int - vertical coordinate of sequences matrix
+                y: int - horizontal coordinate of sequences matrix
+
+            Output:
+                int: node key
+        '''
+
+        return x * self.columns + y
+
     def addLeaf(self, x, y):
         '''
             addLeaf method
@@ -48,9 +71,9 @@ class BinaryGraph():
                 None
         '''
 
-        coordinates = str(x) + "," + str(y)
-        if coordinates in self.nodes:
-            self.leafs.append(self.nodes[coordinates])
+        key = self.key(x, y)
+        if key in self.nodes:
+            self.leafs.append(self.nodes[key])
 
     def addRoot(self, x, y):
         '''
@@ -72,14 +95,10 @@ class BinaryGraph():
 
         if x != 1:
             if self.retainGraph:
-                node = Node(self, self, 1, 0)
+                node = Node(1, 0)
                 node.addLetters("-", self.seq2[1])
 
-                if(node.getCoordinates not in self.roots):
-                    self.roots[node.getCoordinates()] = node
-
-                else:
-                    node = self.roots[node.getCoordinates]
+                self.roots[self.key(1, 0)] = node
 
                 for it in range(2, x):
                     node = self.addNode(it, 0, it - 1, 0, "-", self.seq2[it])
@@ -91,14 +110,10 @@ class BinaryGraph():
         
         elif y != 1:
             if self.retainGraph:
-                node = Node(self, self, 0, 1)
+                node = Node(0, 1)
                 node.addLetters(self.seq1[1], "-")
 
-                if(node.getCoordinates not in self.roots):
-                    self.roots[node.getCoordinates()] = node
-
-                else:
-                    node = self.roots[node.getCoordinates]
+                self.roots[self.key(0, 1)] = node
 
                 for it in range(2, y):
                     node = self.addNode(0, it, 0, it - 1, self.seq1[it], "-")
@@ -109,14 +124,10 @@ class BinaryGraph():
                     s2 += "-"
 
         if node == None:        
-            node = Node(self, self, x, y)
+            node = Node(x, y)
             node.addLetters(s1 + self.seq1[y], s2 + self.seq2[x])
 
-            if(node.getCoordinates not in self.roots):
-                self.roots[node.getCoordinates()] = node
-
-            else:
-                node = self.roots[node.getCoordinates]
+            self.roots[self.key(x, y)] = node
 
         else: 
             node = self.addNode(x, y, node.x, node.y, self.seq1[y], self.seq2[x])
@@ -134,10 +145,10 @@ class BinaryGraph():
                 None
         '''
         
-        coordinates = node.getCoordinates()
+        key = self.key(node.x, node.y)
         
-        if coordinates not in self.nodes:
-            self.nodes[coordinates] = node
+        if key not in self.nodes:
+            self.nodes[key] = node
 
     # @timer
     def addNode(self, node_x, node_y, parent_x, parent_y, letter_x, letter_y):
@@ -160,59 +171,83 @@ class BinaryGraph():
 
         parents = []
         
-        parent_coordinates = str(parent_x) + "," + str(parent_y)
+        parent_key = self.key(parent_x, parent_y)
         
-        if parent_coordinates in self.roots:
-            parents.append(self.roots[parent_coordinates])
+        if parent_key in self.roots:
+            parents.append(self.roots[parent_key])
 
-        if parent_coordinates in self.nodes:
-            parents.append(self.nodes[parent_coordinates])
+        if parent_key in self.nodes:
+            parents.append(self.nodes[parent_key])
 
         if len(parents) == 0:
             return None
 
-        node_coordinates = str(node_x) + "," + str(node_y)
+        node_key = self.key(node_x, node_y)
 
-        if node_coordinates in self.nodes:
-            node = self.nodes[node_coordinates]
+        if node_key in self.nodes:
+            node = self.nodes[node_key]
         else:
-            node = Node(parents[0], self, node_x, node_y)
+            node = Node(node_x, node_y)
 
         for parent in parents:
             for it in range( len(parent.letter_x) ):
                 node.addLetters(parent.letter_x[it] + letter_x, parent.letter_y[it] + letter_y)
             
             parent.regiserChild(node)
+            self.registerNode(node)
 
         if not self.retainGraph:
-            diagonal_coordinates = str(node_x - 1) + "," + str(node_y - 1)
+            diagonal_key = self.key(node_x - 1, node_y - 1)
             
-            if diagonal_coordinates in self.nodes and len(self.nodes[diagonal_coordinates].children) != 0:
-                del self.nodes[diagonal_coordinates]
+            if diagonal_key in self.nodes and len(self.nodes[diagonal_key].children) != 0:
+                del self.nodes[diagonal_key]
 
         return node
 
-    def getPaths(self, mode, gap_score):
+    def getPaths(self, mode, gap_score, max_paths = None, sample = None):
         '''
             getPaths method
 
-            Finds and prints determined paths in respect to the specified mode.
+            Finds and prints determined paths in respect to the specified mode
+            (see findPaths).
 
             Input:
-                mode: string - Mode for path finding. One of:
-                    "all" - prints all paths.
-                    "full_paths" - prints only paths that covers both sequences fully. 
-                    "top_score" - prints only full paths with best scores.
+                mode: string - Mode for path finding (see findPaths).
                 gap_score: float - score for gap.
+                max_paths: int - print at most max_paths first paths (None - no limit).
+                sample: int - print `sample` randomly chosen paths instead.
 
             Output:
                 First registered path string
         '''
 
+        s = self.printPaths(self.findPaths(mode, gap_score, max_paths, sample))
+
+        return(s.split("\n\n")[0].split("\n")[:2])
+
+    def findPaths(self, mode, gap_score, max_paths = None, sample = None):
+        '''
+            findPaths method
+
+            Finds determined paths in respect to the specified mode.
+            All matching paths are counted (path_count), but only a bounded
+            number of them is returned.
+
+            Input:
+                mode: string - Mode for path finding. One of:
+                    "all" - all paths.
+                    "full_paths" - only paths that covers both sequences fully. 
+                    "top_score" - only full paths with best scores.
+                gap_score: float - score for gap.
+                max_paths: int - return at most max_paths first paths (None - no limit).
+                sample: int - return `sample` randomly chosen paths instead.
+
+            Output:
+                list of [string, string, float]: aligned sequences and score
+        '''
+
         l1 = len( self.seq1 ) - 1
         l2 = len( self.seq2 ) - 1
-        
-        s = ""
 
         if mode == "top_score":
             
@@ -239,6 +274,9 @@ class BinaryGraph():
                 elif sc == max_score:
                     max_coordinates += [[it, l1]]                
 
+        found = []
+        self.path_count = 0
+
         for node in self.nodes.values():
             if len(node.children) == 0:
                 for it in range( len(node.letter_x) ):
@@ -246,13 +284,39 @@ class BinaryGraph():
                     if  ( mode == "full_path"  and ( l1 == len( node.letter_x[it].replace("-", "") ) or l2 == len( node.letter_y[it].replace("-", "") ))) or \
                         ( mode == "top_score" and [node.x, node.y] in max_coordinates and ( l1 == len( node.letter_x[it].replace("-", "") ) or l2 == len( node.letter_y[it].replace("-", "") ))) or \
                         ( mode == "all" ):
-                            s += node.letter_x[it] + "\n" 
-                            s += node.letter_y[it] + "\n"
-                            s += "score: " + str( self.scores[node.x, node.y] ) + "\n\n"
+                            self.path_count += 1
+
+                            if sample is not None or max_paths is None or len(found) < max_paths:
+                                found.append( (node, it) )
+
+        if sample is not None and len(found) > sample:
+            found = [ found[it] for it in sorted(random.sample(range(len(found)), sample)) ]
+
+        return [ [node.letter_x[it], node.letter_y[it], float(self.scores[node.x, node.y])] for node, it in found ]
+
+    def printPaths(self, paths):
+        '''
+            printPaths method
+
+            Prints paths found by findPaths.
+
+            Input:
+                paths: list of [string, string, float] - paths.
+
+            Output:
+                string: printed text
+        '''
+
+        s = ""
+
+        for letters_x, letters_y, score in paths:
+            s += letters_x + "\n" 
+            s += letters_y + "\n"
+            s += "score: " + str( score ) + "\n\n"
                         
         print(s)
 
-        return(s.split("\n\n")[0].split("\n")[:2])
+        return s
 
     def printTree(self):
         '''
@@ -318,25 +382,23 @@ class Node():
 
         Node for binary graph. It stores information about
         node coordinates (in sequences plane), corresponding 
-        letters, and children.
+        letters, and children. Nodes do not point back to parents
+        or graph, so unreachable nodes can be freed.
     '''
 
-    def __init__(self, parent, tree, x, y):
+    __slots__ = ("x", "y", "letter_x", "letter_y", "children")
+
+    def __init__(self, x, y):
         '''
             Constructor of Node class
 
             Input: 
-                parent: Node - parent node.
-                tree: BinaryGraph - pointer to main data structure.
                 x: int - horizontal coordinate of node
                 y: int - vertical coordinate of node
 
             Output:
                 Node: Constructed object of class Node
         '''
-        
-        self.tree = tree
-        self.parent = parent
 
         self.x = x
         self.y = y
@@ -374,7 +436,6 @@ class Node():
         '''
 
         self.children.append( node )
-        self.tree.registerNode( node )
 
     def printNode(self, heading):
         '''
@@ -398,16 +459,3 @@ class Node():
                 self.children[it].printNode(heading + "├")
             else:
                 self.children[it].printNode(heading + "└")
-
-    def getCoordinates(self):
-        '''
-            Returns node coordinates string.
-
-            Input: 
-                None
-
-            Output:
-                string: coordinates string (used in BinaryGraph for indexing node dictionary)
-        '''
-
-        return str(self.x) + "," + str(self.y)
\ No newline at end of file
@@ -0,0 +1,209 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import json
+import time
+import socket
+import http.client
+
+class UnixConnection(http.client.HTTPConnection):
+    '''
+        UnixConnection class
+
+        HTTP connection over Unix socket.
+    '''
+
+    def __init__(self, path, timeout = None):
+        super().__init__("localhost", timeout = timeout)
+
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+class ServerError(Exception):
+    '''
+        ServerError class
+
+        Error response of alignment server.
+    '''
+
+    def __init__(self, status, message):
+        super().__init__(str(status) + ": " + message)
+
+        self.status = status
+
+class Client():
+    '''
+        Client class
+
+        Client of alignment server (see server.py). Connection is kept open
+        between requests; requests rejected because the server is busy (503)
+        are retried with growing delay.
+    '''
+
+    def __init__(self, host = "127.0.0.1", port = 8765, socket = None, timeout = 60, retries = 5):
+        '''
+            Constructor of Client class
+
+            Input:
+                host: string - server address.
+                port: int - server port.
+                socket: string - path of Unix socket (used instead of TCP).
+                timeout: float - timeout of a request (seconds).
+                retries: int - number of retries of rejected requests.
+
+            Output:
+                Client: Constructed object of class Client
+        '''
+
+        self.host = host
+        self.port = port
+        self.socket = socket
+        self.timeout = timeout
+        self.retries = retries
+
+        self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def connect(self):
+        '''
+            connect method
+
+            Opens connection (if it is not open).
+        '''
+
+        if self.connection is None:
+            if self.socket is not None:
+                self.connection = UnixConnection(self.socket, timeout = self.timeout)
+            else:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout = self.timeout)
+
+        return self.connection
+
+    def request(self, method, path, payload = None):
+        '''
+            request method
+
+            Sends request and returns decoded JSON response.
+
+            Input:
+                method: string - HTTP method.
+                path: string - request path.
+                payload: dict - JSON body.
+
+            Output:
+                dict: response
+        '''
+
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+
+        for attempt in range(self.retries + 1):
+            try:
+                connection = self.connect()
+                connection.request(method, path, body = body, headers = headers)
+
+                response = connection.getresponse()
+                data = json.loads(response.read() or b"{}")
+
+            except (ConnectionError, http.client.HTTPException):
+                # Server closed keep-alive connection, connect again once.
+                self.close()
+
+                if attempt == self.retries:
+                    raise
+
+                continue
+
+            if response.status == 503 and attempt < self.retries:
+                time.sleep(0.05 * 2 ** attempt)
+                continue
+
+            if response.status != 200:
+                raise ServerError(response.status, data.get("error", ""))
+
+            return data
+
+    def align(self, sequence1, sequence2, name1 = "sequence1", name2 = "sequence2", **options):
+        '''
+            align method
+
+            Aligns one pair.
+
+            Input:
+                sequence1: string - Sequence 1.
+                sequence2: string - Sequence 2.
+                name1: string - name of Sequence 1.
+                name2: string - name of Sequence 2.
+                **options: dictionary - options overriding server defaults
+                    (match_score, gap_score, engine, ...).
+
+            Output:
+                dict: result record (see results.make_record)
+        '''
+
+        return self.align_many([ (sequence1, sequence2, name1, name2) ], **options)[0]
+
+    def align_many(self, pairs, **options):
+        '''
+            align_many method
+
+            Aligns pairs in one request (server batches them with pairs of
+            other requests).
+
+            Input:
+                pairs: list of (string, string) or (string, string, string, string) -
+                    sequences (and names) of pairs.
+                **options: dictionary - options overriding server defaults.
+
+            Output:
+                list of dict: result records in order of pairs
+        '''
+
+        items = []
+
+        for pair in pairs:
+            item = {"sequence1": pair[0], "sequence2": pair[1]}
+
+            if len(pair) > 2:
+                item.update(name1 = pair[2], name2 = pair[3])
+
+            items.append(item)
+
+        return self.request("POST", "/align", {"pairs": items, "options": options})["results"]
+
+    def health(self):
+        '''
+            health method
+
+            Returns server status (queue length and batches in flight).
+        '''
+
+        return self.request("GET", "/health")
+
+    def stats(self):
+        '''
+            stats method
+
+            Returns server counters.
+        '''
+
+        return self.request("GET", "/stats")
+
+    def close(self):
+        '''
+            close method
+
+            Closes connection.
+        '''
+
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,229 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import os
+import mmap
+
+import numpy as np
+
+# Bytes removed from sequence lines.
+WHITESPACE = b" \t\r\n"
+
+class FastaReader():
+    '''
+        FastaReader class
+
+        Streaming reader of .fasta files. File is memory-mapped and records
+        are yielded one by one, so only the current record is copied to
+        memory. Records can also be accessed by index or name through
+        offset index, which can be stored next to the file (<file>.idx).
+    '''
+
+    def __init__(self, directory, encode = False):
+        '''
+            Constructor of FastaReader class
+
+            Input:
+                directory: string - path to .fasta file.
+                encode: bool - if True sequences are returned as np.ndarray
+                    (uint8) of ASCII codes instead of bytes.
+
+            Output:
+                FastaReader: Constructed object of class FastaReader
+        '''
+
+        self.directory = directory
+        self.encode = encode
+
+        self.file_handle = open(directory, "rb")
+
+        if os.fstat(self.file_handle.fileno()).st_size == 0:
+            self.data = b""
+        else:
+            self.data = mmap.mmap(self.file_handle.fileno(), 0, access = mmap.ACCESS_READ)
+
+        self.index = None
+        self.names = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        '''
+            close method
+
+            Unmaps and closes the file.
+
+            Input:
+                None
+
+            Output:
+                None
+        '''
+
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+        self.file_handle.close()
+
+    def __iter__(self):
+        '''
+            Yields records of the file.
+
+            Output:
+                generator of (string, bytes or np.ndarray): header (without
+                ">") and uppercase sequence without whitespace
+        '''
+
+        for name, header, start, end in self.offsets():
+            yield header, self.sequence(start, end)
+
+    def offsets(self):
+        '''
+            offsets method
+
+            Scans the file and yields positions of records. Text before the
+            first header is treated as a record with empty header.
+
+            Input:
+                None
+
+            Output:
+                generator of (string, string, int, int): name (first word
+                of header), header, start and end offset of sequence lines
+        '''
+
+        data = self.data
+        size = len(data)
+
+        position = 0
+
+        while position < size:
+            if data[position:position + 1] == b">":
+                line_end = data.find(b"\n", position)
+
+                if line_end == -1:
+                    line_end = size
+
+                header = data[position + 1:line_end].decode("utf-8", "replace").strip()
+                start = line_end + 1
+
+            else:
+                header = ""
+                start = position
+
+            end = data.find(b"\n>", max(start - 1, 0))
+
+            if end == -1:
+                end = size
+
+            name = header.split()[0] if header else ""
+
+            yield name, header, min(start, size), end
+
+            position = end + 1
+
+    def sequence(self, start, end):
+        '''
+            sequence method
+
+            Reads sequence lines between offsets and removes whitespace.
+
+            Input:
+                start: int - offset of the first sequence byte.
+                end: int - offset after the last sequence byte.
+
+            Output:
+                bytes or np.ndarray (uint8): uppercase sequence
+        '''
+
+        sequence = self.data[start:end].translate(None, WHITESPACE).upper()
+
+        if self.encode:
+            return np.frombuffer(sequence, dtype = np.uint8)
+
+        return sequence
+
+    def index_path(self):
+        '''
+            index_path method
+
+            Returns path of sidecar offset index.
+        '''
+
+        return self.directory + ".idx"
+
+    def load_index(self, save = True):
+        '''
+            load_index method
+
+            Loads offset index from sidecar file. If the file does not exist
+            or is older than .fasta file, index is built and (optionally)
+            saved.
+
+            Input:
+                save: bool - save built index next to .fasta file.
+
+            Output:
+                list of (string, int, int): name, start and end offset of
+                every record
+        '''
+
+        if self.index is not None:
+            return self.index
+
+        path = self.index_path()
+
+        if os.path.isfile(path) and os.path.getmtime(path) >= os.path.getmtime(self.directory):
+            self.index = []
+
+            with open(path, "r") as file_handle:
+                for line in file_handle:
+                    name, start, end = line.rstrip("\n").split("\t")
+                    self.index.append( (name, int(start), int(end)) )
+
+        else:
+            self.index = [ (name, start, end) for name, header, start, end in self.offsets() ]
+
+            if save:
+                try:
+                    with open(path, "w") as file_handle:
+                        for name, start, end in self.index:
+                            file_handle.write(name + "\t" + str(start) + "\t" + str(end) + "\n")
+
+                except OSError:
+                    pass
+
+        return self.index
+
+    def __len__(self):
+        return len(self.load_index())
+
+    def __getitem__(self, key):
+        '''
+            Returns sequence of record with given index or name.
+
+            Input:
+                key: int or string - index of record or its name (first
+                    word of header).
+
+            Output:
+                bytes or np.ndarray (uint8): uppercase sequence
+        '''
+
+        index = self.load_index()
+
+        if isinstance(key, str):
+            if self.names is None:
+                self.names = {}
+
+                for it in range(len(index) - 1, -1, -1):
+                    self.names[index[it][0]] = it
+
+            key = self.names[key]
+
+        name, start, end = index[key]
+
+        return self.sequence(start, end)
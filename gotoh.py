@@ -0,0 +1,166 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import numpy as np
+
+
+# Minus infinity of int32 score matrices (far from overflow when gap
+# scores are added to it).
+NEG = -2 ** 30
+
+# Traceback nibble of a cell: source state of the best score (2 bits)
+# and whether horizontal/vertical gap ending in the cell is extended.
+FROM_DIAGONAL = 0
+FROM_LEFT = 1
+FROM_UP = 2
+LEFT_EXTENDED = 4
+UP_EXTENDED = 8
+
+def gotoh(seq1, seq2, scoring, gap_open, gap_extend):
+    '''
+        gotoh
+
+        Global alignment with affine gap penalties (Gotoh). Gap of length L
+        scores gap_open + (L - 1) * gap_extend. Three states are used:
+        H (best score), E (gap in Sequence 2, horizontal move) and
+        F (gap in Sequence 1, vertical move). Only H is kept as full int32
+        matrix (for the heatmap), E and F are kept as rows, traceback is
+        packed to 4 bits per cell (two cells per byte).
+
+        Horizontal gaps are resolved for the whole row with running maximum,
+        which requires gap_open <= gap_extend.
+
+        Input:
+            seq1: string - Sequence 1 string (without padding).
+            seq2: string - Sequence 2 string (without padding).
+            scoring: Scoring - substitution scores.
+            gap_open: int - score for the first position of a gap.
+            gap_extend: int - score for every next position of a gap.
+
+        Output:
+            list (2) of string: aligned sequences
+            float: alignment score
+            np.ndarray (int32) (len(seq2) + 1, len(seq1) + 1): H matrix
+    '''
+
+    if gap_open > gap_extend:
+        raise ValueError("gap_open can not be higher than gap_extend")
+
+    n = len(seq2)
+    m = len(seq1)
+
+    profile = scoring.profile(scoring.encode(seq1))
+    codes2 = scoring.encode(seq2)
+
+    output = np.empty( (n + 1, m + 1), dtype = np.int32 )
+    trace = np.zeros( (n + 1, m // 2 + 1), dtype = np.uint8 )
+
+    extensions = np.arange(m + 1, dtype = np.int32) * np.int32(gap_extend)
+
+    bits = np.zeros(m + 2, dtype = np.uint8)
+
+    # Row 0: horizontal gap only.
+    output[0, 0] = 0
+    output[0, 1:] = gap_open + extensions[:-1]
+
+    horizontal = np.full(m + 1, NEG, dtype = np.int32)
+    horizontal[1:] = output[0, 1:]
+
+    vertical = np.full(m + 1, NEG, dtype = np.int32)
+
+    bits[1:m + 1] = FROM_LEFT
+    bits[2:m + 1] |= LEFT_EXTENDED
+    _pack(bits, trace[0])
+
+    best = np.empty(m + 1, dtype = np.int32)
+
+    diagonal = np.full(m + 1, NEG, dtype = np.int32)
+
+    for i in range(1, n + 1):
+        prev = output[i - 1]
+        row = output[i]
+
+        # Vertical gaps come from the previous row.
+        opened = prev + np.int32(gap_open)
+        extended = vertical + np.int32(gap_extend)
+        np.maximum(opened, extended, out = vertical)
+
+        # Best score without horizontal move.
+        diagonal[1:] = prev[:-1] + profile[codes2[i - 1]]
+
+        np.maximum(diagonal, vertical, out = best)
+        best[0] = vertical[0]
+
+        # Horizontal gaps: E[j] = max_k<j( best[k] + open + (j - 1 - k) * extend ).
+        running = np.maximum.accumulate(best - extensions)
+        horizontal[1:] = running[:-1] + extensions[:-1] + np.int32(gap_open)
+
+        np.maximum(best, horizontal, out = row)
+
+        bits[:m + 1] = np.where(row == diagonal, FROM_DIAGONAL, np.where(row == horizontal, FROM_LEFT, FROM_UP))
+        bits[2:m + 1] |= (horizontal[1:-1] + np.int32(gap_extend) == horizontal[2:]) * np.uint8(LEFT_EXTENDED)
+        bits[:m + 1] |= (extended == vertical) * np.uint8(UP_EXTENDED)
+
+        _pack(bits, trace[i])
+
+    path = _traceback(seq1, seq2, trace)
+
+    return path, float(output[n, m]), output
+
+
+def _pack(bits, packed):
+    '''
+        _pack
+
+        Packs row of 4 bit values, two cells per byte.
+    '''
+
+    packed[:] = bits[0:2 * len(packed):2] | (bits[1:2 * len(packed):2] << 4)
+
+
+def _traceback(seq1, seq2, trace):
+    '''
+        _traceback
+
+        Follows packed traceback from the last cell in H state.
+
+        Output:
+            list (2) of string: aligned sequences
+    '''
+
+    letters_x = []
+    letters_y = []
+
+    i = len(seq2)
+    j = len(seq1)
+
+    state = FROM_DIAGONAL
+
+    while i > 0 or j > 0:
+        bits = (int(trace[i, j >> 1]) >> ((j & 1) * 4)) & 15
+
+        if state == FROM_DIAGONAL:
+            state = bits & 3
+
+            if state == FROM_DIAGONAL:
+                letters_x.append(seq1[j - 1])
+                letters_y.append(seq2[i - 1])
+                i -= 1
+                j -= 1
+
+        elif state == FROM_LEFT:
+            letters_x.append(seq1[j - 1])
+            letters_y.append("-")
+            j -= 1
+
+            if not bits & LEFT_EXTENDED:
+                state = FROM_DIAGONAL
+
+        else:
+            letters_x.append("-")
+            letters_y.append(seq2[i - 1])
+            i -= 1
+
+            if not bits & UP_EXTENDED:
+                state = FROM_DIAGONAL
+
+    return ["".join(reversed(letters_x)), "".join(reversed(letters_y))]
@@ -0,0 +1,158 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import numpy as np
+
+# Largest matrix drawn with letters as ticks and scores as cell labels.
+LABELS_LIMIT = 30
+
+# Longest sequence used as axis label.
+AXIS_LABEL_LIMIT = 200
+
+def pool_matrix(matrix, size, method = "max"):
+    '''
+        pool_matrix
+
+        Downsamples matrix with block pooling, so that none of its sides
+        is longer than size. Matrix is read in bands of `step` rows, so
+        a memory-mapped matrix is streamed from disk instead of loaded.
+
+        Input:
+            matrix: 2d vector - score matrix (np.ndarray or np.memmap).
+            size: int - maximal number of pixels along an axis.
+            method: string - "max" or "mean" pooling.
+
+        Output:
+            np.ndarray: pooled matrix
+            int: block size (step) in cells
+    '''
+
+    if method not in ("max", "mean"):
+        raise ValueError("Unknown pooling method: " + method)
+
+    rows, cols = matrix.shape
+
+    step = max(1, -(-max(rows, cols) // size))
+
+    if step == 1:
+        return np.asarray(matrix), 1
+
+    starts = np.arange(0, cols, step)
+    widths = np.diff(np.append(starts, cols))
+
+    pooled = np.empty( (len(range(0, rows, step)), len(starts)) )
+
+    for it, r in enumerate(range(0, rows, step)):
+        band = np.asarray(matrix[r:r + step], dtype = np.float64)
+
+        if method == "max":
+            pooled[it] = np.maximum.reduceat(band.max(axis = 0), starts)
+        else:
+            pooled[it] = np.add.reduceat(band.sum(axis = 0), starts) / (widths * band.shape[0])
+
+    return pooled, step
+
+
+def path_line(path, origin = (0, 0)):
+    '''
+        path_line
+
+        Computes cells visited by alignment (one vectorized pass): every
+        column of alignment moves right if Sequence 1 letter is not a gap
+        and down if Sequence 2 letter is not a gap.
+
+        Input:
+            path: list (2) of string - aligned sequences.
+            origin: (int, int) - cell where the path starts (Sequence 1,
+                Sequence 2).
+
+        Output:
+            np.ndarray: x coordinates (columns) of visited cells
+            np.ndarray: y coordinates (rows) of visited cells
+    '''
+
+    a = np.frombuffer(path[0].encode("ascii"), dtype = np.uint8)
+    b = np.frombuffer(path[1].encode("ascii"), dtype = np.uint8)
+
+    x = np.concatenate(([0], np.cumsum(a != ord("-")))) + origin[0]
+    y = np.concatenate(([0], np.cumsum(b != ord("-")))) + origin[1]
+
+    return x, y
+
+
+def render(matrix, path, seq1, seq2, origin = (0, 0), directory = None, size = 1000, method = "max"):
+    '''
+        render
+
+        Draws score matrix heatmap (pooled to size pixels) with alignment
+        path as one polyline. Figure is shown in a window, or saved to
+        file (format from extension, e.g. .png, .svg) without interactive
+        backend.
+
+        Input:
+            matrix: 2d vector - score matrix (None - only the path is drawn).
+            path: list (2) of string - aligned sequences.
+            seq1: string - Sequence 1 (with leading padding character).
+            seq2: string - Sequence 2 (with leading padding character).
+            origin: (int, int) - cell where the path starts.
+            directory: string - path to output image (None - show window).
+            size: int - maximal number of heatmap pixels along an axis.
+            method: string - pooling of large matrices ("max" or "mean").
+
+        Output:
+            None
+    '''
+
+    if directory is not None:
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize = (min(16, 6 + len(seq1) // 15), min(16, 6 + len(seq2) // 15)))
+        ax = fig.subplots()
+
+    else:
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize = (min(16, 6 + len(seq1) // 15), min(16, 6 + len(seq2) // 15)))
+
+    rows = len(seq2)
+    cols = len(seq1)
+
+    if matrix is not None:
+        pooled, step = pool_matrix(matrix, size, method)
+
+        ax.imshow(pooled, extent = (-0.5, cols - 0.5, rows - 0.5, -0.5), interpolation = "nearest")
+
+    else:
+        ax.set_xlim(-0.5, cols - 0.5)
+        ax.set_ylim(rows - 0.5, -0.5)
+        ax.set_aspect("equal")
+
+    ax.xaxis.tick_top()
+    ax.xaxis.set_label_position('top')
+
+    if cols < LABELS_LIMIT and rows < LABELS_LIMIT:
+        ax.set_xticks(np.arange(cols))
+        ax.set_yticks(np.arange(rows))
+
+        ax.set_xticklabels(list(seq1))
+        ax.set_yticklabels(list(seq2))
+
+        if matrix is not None:
+            for i in range(rows):
+                for j in range(cols):
+                    ax.text(j, i, matrix[i, j], ha = "center", va = "center", color = "w")
+
+    else:
+        ax.set_xlabel(seq1 if cols <= AXIS_LABEL_LIMIT else "Sequence 1 (" + str(cols - 1) + ")")
+        ax.set_ylabel(seq2 if rows <= AXIS_LABEL_LIMIT else "Sequence 2 (" + str(rows - 1) + ")")
+
+    x, y = path_line(path, origin)
+
+    ax.plot(x, y, color = "black", linewidth = max(0.5, 2 - len(x) / 2000), marker = "o" if len(x) < LABELS_LIMIT * 2 else None, markersize = 4)
+
+    fig.tight_layout()
+
+    if directory is not None:
+        fig.savefig(directory)
+
+    else:
+        plt.show()
@@ -0,0 +1,78 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import numpy as np
+
+from kernels import fill_score_matrix, score_last_row
+from traceback_matrix import TracebackMatrix
+
+# Subproblems with less cells than this are solved with full matrix.
+BASE_CELLS = 4096
+
+def hirschberg(seq1, seq2, scoring, gap_score):
+    '''
+        hirschberg
+
+        Finds one optimal global alignment with Hirschberg's divide and
+        conquer algorithm. Only a few rows of score matrix are kept in
+        memory, so memory usage is linear in sequences length.
+
+        Input:
+            seq1: string - Sequence 1 string (without padding).
+            seq2: string - Sequence 2 string (without padding).
+            scoring: Scoring - substitution scores.
+            gap_score: int - score for gap.
+
+        Output:
+            list (2) of string: aligned sequences
+            float: alignment score
+    '''
+
+    letters_x = []
+    letters_y = []
+
+    score = _split(seq1, seq2, scoring, gap_score, letters_x, letters_y)
+
+    return ["".join(letters_x), "".join(letters_y)], score
+
+
+def _split(seq1, seq2, scoring, gap_score, letters_x, letters_y):
+    '''
+        _split
+
+        Aligns seq1 with seq2 and appends the alignment to letters_x and
+        letters_y.
+
+        Output:
+            float: alignment score
+    '''
+
+    if len(seq2) == 0 or len(seq1) == 0:
+        letters_x.append(seq1 + "-" * len(seq2))
+        letters_y.append("-" * len(seq1) + seq2)
+
+        return float(gap_score * (len(seq1) + len(seq2)))
+
+    if len(seq2) == 1 or (len(seq1) + 1) * (len(seq2) + 1) <= BASE_CELLS:
+        output, trace = fill_score_matrix(" " + seq1, " " + seq2, scoring, gap_score, traceback = True)
+        path = next(TracebackMatrix(" " + seq1, " " + seq2, trace).iterPaths())
+
+        letters_x.append(path[0])
+        letters_y.append(path[1])
+
+        return float(output[-1, -1])
+
+    middle = len(seq2) // 2
+
+    codes1 = scoring.encode(seq1)
+    codes2 = scoring.encode(seq2)
+
+    upper = score_last_row(scoring.profile(codes1), codes2[:middle], gap_score)
+    lower = score_last_row(scoring.profile(codes1[::-1]), codes2[:middle - 1:-1], gap_score)
+
+    total = upper + lower[::-1]
+    split = int(np.argmax(total))
+
+    _split(seq1[:split], seq2[:middle], scoring, gap_score, letters_x, letters_y)
+    _split(seq1[split:], seq2[middle:], scoring, gap_score, letters_x, letters_y)
+
+    return float(total[split])
@@ -0,0 +1,245 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import numpy as np
+
+# Traceback directions. Every cell of traceback matrix stores sum of
+# directions leading to its optimal score.
+DIAGONAL = 1
+LEFT = 2
+UP = 4
+
+
+def fill_score_matrix(seq1, seq2, scoring, gap_score, traceback = False):
+    '''
+        fill_score_matrix
+
+        Fills Needleman-Wunch score matrix row by row. Diagonal and vertical
+        moves of the whole row are computed at once, horizontal gaps are
+        resolved with running maximum:
+
+            output[i, j] = max_k<=j( t[k] - k * gap ) + j * gap
+
+        where t is the row computed without horizontal moves. Result is equal
+        to the cell by cell recurrence. Substitution scores of row i are one
+        row of the query profile of Sequence 1.
+
+        Input:
+            seq1: string - Sequence 1 string (with leading padding character).
+            seq2: string - Sequence 2 string (with leading padding character).
+            scoring: Scoring - substitution scores.
+            gap_score: int - score for gap.
+            traceback: bool - if True, direction bitmask of every cell is
+                recorded alongside the scores (see DIAGONAL, LEFT, UP).
+
+        Output:
+            np.ndarray (len(seq2), len(seq1)): score matrix
+            np.ndarray (uint8) (len(seq2), len(seq1)): traceback matrix, returned
+                only if traceback is True
+    '''
+
+    rows = len(seq2)
+    cols = len(seq1)
+
+    profile = scoring.profile(scoring.encode(seq1[1:]))
+    codes2 = scoring.encode(seq2[1:])
+
+    gaps = np.arange(cols) * gap_score
+
+    output = np.empty( (rows, cols) )
+    output[0, :] = gaps
+    output[:, 0] = np.arange(rows) * gap_score
+
+    if traceback:
+        trace = np.empty( (rows, cols), dtype = np.uint8 )
+        trace[0, :] = LEFT
+        trace[:, 0] = UP
+        trace[0, 0] = 0
+
+    for i in range(1, rows):
+        prev = output[i - 1]
+        row = output[i]
+
+        diagonal = prev[:-1] + profile[codes2[i - 1]]
+        up = prev[1:] + gap_score
+
+        np.maximum(diagonal, up, out = row[1:])
+
+        row -= gaps
+        np.maximum.accumulate(row, out = row)
+        row += gaps
+
+        if traceback:
+            bits = trace[i, 1:]
+            np.multiply(diagonal == row[1:], np.uint8(DIAGONAL), out = bits)
+            bits |= (row[:-1] + gap_score == row[1:]) * np.uint8(LEFT)
+            bits |= (up == row[1:]) * np.uint8(UP)
+
+    if traceback:
+        return output, trace
+
+    return output
+
+
+def fill_profile_matrix(scores, gaps1, gaps2):
+    '''
+        fill_profile_matrix
+
+        Profile against profile version of fill_score_matrix (e.g. groups of
+        already aligned sequences). Substitution scores are given for every
+        pair of columns and gap scores for every column, so gap aligned with
+        column which is mostly gaps costs little. Horizontal gaps use the same
+        running maximum, over cumulative gap scores:
+
+            output[i, j] = max_k<=j( t[k] - G[k] ) + G[j]
+
+        Integer scores keep the traceback exact.
+
+        Input:
+            scores: np.ndarray (n, m) - scores of pairs of columns (row i -
+                column i of profile 2, column j - column j of profile 1).
+            gaps1: np.ndarray (m) - scores of columns of profile 1 aligned
+                with gap.
+            gaps2: np.ndarray (n) - scores of columns of profile 2 aligned
+                with gap.
+
+        Output:
+            np.ndarray (n + 1, m + 1): score matrix
+            np.ndarray (uint8) (n + 1, m + 1): traceback matrix
+    '''
+
+    rows = scores.shape[0] + 1
+    cols = scores.shape[1] + 1
+
+    gaps = np.concatenate(([0], np.cumsum(gaps1, dtype = np.float64)))
+
+    output = np.empty( (rows, cols) )
+    output[0, :] = gaps
+    output[:, 0] = np.concatenate(([0], np.cumsum(gaps2, dtype = np.float64)))
+
+    trace = np.empty( (rows, cols), dtype = np.uint8 )
+    trace[0, :] = LEFT
+    trace[:, 0] = UP
+    trace[0, 0] = 0
+
+    for i in range(1, rows):
+        prev = output[i - 1]
+        row = output[i]
+
+        diagonal = prev[:-1] + scores[i - 1]
+        up = prev[1:] + gaps2[i - 1]
+
+        np.maximum(diagonal, up, out = row[1:])
+
+        row -= gaps
+        np.maximum.accumulate(row, out = row)
+        row += gaps
+
+        bits = trace[i, 1:]
+        np.multiply(diagonal == row[1:], np.uint8(DIAGONAL), out = bits)
+        bits |= (row[:-1] + gaps1 == row[1:]) * np.uint8(LEFT)
+        bits |= (up == row[1:]) * np.uint8(UP)
+
+    return output, trace
+
+
+def score_last_row(profile, codes2, gap_score):
+    '''
+        score_last_row
+
+        Computes last row of Needleman-Wunch score matrix keeping only one
+        row in memory.
+
+        Input:
+            profile: np.ndarray (alphabet, m) - query profile of Sequence 1
+                (see Scoring.profile).
+            codes2: np.ndarray (uint8) - encoded Sequence 2 (without padding).
+            gap_score: int - score for gap.
+
+        Output:
+            np.ndarray (m + 1): scores of aligning whole Sequence 2 with every
+                prefix of Sequence 1
+    '''
+
+    gaps = np.arange(profile.shape[1] + 1) * gap_score
+
+    row = gaps.astype(np.float64)
+    new = np.empty_like(row)
+
+    for i in range(len(codes2)):
+        new[0] = row[0] + gap_score
+
+        np.maximum(row[:-1] + profile[codes2[i]], row[1:] + gap_score, out = new[1:])
+
+        new -= gaps
+        np.maximum.accumulate(new, out = new)
+        new += gaps
+
+        row, new = new, row
+
+    return row
+
+
+def score_only(seq1, seq2, scoring, gap_score, xdrop = None):
+    '''
+        score_only
+
+        Computes global alignment score keeping only two rows of the score
+        matrix. The shorter sequence is placed along the row, so memory is
+        O(min(n, m)).
+
+        With X-drop the pair is abandoned as soon as every cell of the
+        current row is more than xdrop below the best score seen so far
+        (including the starting cell). Score of a pair which is not
+        abandoned is exact.
+
+        Input:
+            seq1: string - Sequence 1 string (without padding).
+            seq2: string - Sequence 2 string (without padding).
+            scoring: Scoring - substitution scores.
+            gap_score: int - score for gap.
+            xdrop: int - X-drop threshold (None - never abandon).
+
+        Output:
+            float: alignment score (None if pair was abandoned)
+            int: number of computed rows
+    '''
+
+    codes1 = scoring.encode(seq1)
+    codes2 = scoring.encode(seq2)
+
+    # Scores are taken as matrix[letter of seq2, letter of seq1], as in
+    # fill_score_matrix, also when sequences are swapped.
+    if len(codes1) <= len(codes2):
+        profile = scoring.matrix[:, codes1].astype(np.int64)
+        codes = codes2
+    else:
+        profile = scoring.matrix.T[:, codes2].astype(np.int64)
+        codes = codes1
+
+    gaps = np.arange(profile.shape[1] + 1, dtype = np.int64) * gap_score
+
+    row = gaps.copy()
+    new = np.empty_like(row)
+
+    best = int(row.max())
+
+    for i in range(len(codes)):
+        new[0] = row[0] + gap_score
+
+        np.maximum(row[:-1] + profile[codes[i]], row[1:] + gap_score, out = new[1:])
+
+        new -= gaps
+        np.maximum.accumulate(new, out = new)
+        new += gaps
+
+        row, new = new, row
+
+        if xdrop is not None:
+            top = int(row.max())
+
+            if top < best - xdrop:
+                return None, i + 1
+
+            best = max(best, top)
+
+    return float(row[-1]), len(codes)
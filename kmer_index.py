@@ -0,0 +1,284 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import os
+import json
+
+import numpy as np
+
+from substitution import DEFAULT_ALPHABET
+
+# Every letter takes 5 bits of k-mer code, so k-mers up to 12 letters
+# fit uint64.
+BITS = 5
+MAX_K = 64 // BITS
+
+# Letters outside the alphabet are treated as X.
+LOOKUP = np.full(256, DEFAULT_ALPHABET.index("X"), dtype = np.uint64)
+
+for it, letter in enumerate(DEFAULT_ALPHABET):
+    LOOKUP[ord(letter)] = it
+    LOOKUP[ord(letter.lower())] = it
+
+class KmerIndex():
+    '''
+        KmerIndex class
+
+        Index of k-mers of database records. All k-mers are kept in one
+        sorted array (k-mer code, record, position), so hits of a k-mer are
+        found with binary search and the index can be saved as .npy files
+        and memory-mapped instead of loaded.
+    '''
+
+    def __init__(self, k, names, lengths, kmers, records, positions):
+        '''
+            Constructor of KmerIndex class
+
+            Input:
+                k: int - k-mer length.
+                names: list of string - record names.
+                lengths: np.ndarray (int64) - record lengths.
+                kmers: np.ndarray (uint64) - sorted k-mer codes.
+                records: np.ndarray (int32) - record of every k-mer.
+                positions: np.ndarray (int32) - position of every k-mer.
+
+            Output:
+                KmerIndex: Constructed object of class KmerIndex
+        '''
+
+        self.k = k
+        self.names = names
+        self.lengths = lengths
+        self.kmers = kmers
+        self.records = records
+        self.positions = positions
+
+    def save(self, directory, source = None):
+        '''
+            save method
+
+            Saves index to directory (.npy arrays and meta.json).
+
+            Input:
+                directory: string - index directory.
+                source: string - path of indexed .fasta file (its size and
+                    modification time are stored to detect stale index).
+
+            Output:
+                None
+        '''
+
+        os.makedirs(directory, exist_ok = True)
+
+        for name in ("lengths", "kmers", "records", "positions"):
+            np.save(os.path.join(directory, name + ".npy"), getattr(self, name))
+
+        meta = {"k": self.k, "names": self.names}
+
+        if source is not None:
+            meta["size"] = os.path.getsize(source)
+            meta["mtime"] = os.path.getmtime(source)
+
+        with open(os.path.join(directory, "meta.json"), "w") as file_handle:
+            json.dump(meta, file_handle)
+
+    def candidates(self, sequence, min_hits = 2, diagonal_width = 16, max_occurrences = 1000):
+        '''
+            candidates method
+
+            Finds records sharing k-mers with sequence on nearby diagonals.
+            Hits are counted in diagonal bins of diagonal_width (and bins
+            shifted by half of it, so that close hits are not split).
+
+            Input:
+                sequence: string or bytes - query sequence.
+                min_hits: int - minimal number of hits on one diagonal bin.
+                diagonal_width: int - width of diagonal bin.
+                max_occurrences: int - k-mers occurring more often in the
+                    database are ignored (repeats).
+
+            Output:
+                list of (int, int): record index and number of hits, sorted
+                by number of hits (descending)
+        '''
+
+        query = kmer_codes(sequence, self.k)
+
+        if len(query) == 0 or len(self.kmers) == 0:
+            return []
+
+        start = np.searchsorted(self.kmers, query, side = "left")
+        end = np.searchsorted(self.kmers, query, side = "right")
+
+        counts = end - start
+        counts[counts > max_occurrences] = 0
+
+        total = int(counts.sum())
+
+        if total == 0:
+            return []
+
+        # Expand (start, end) ranges to positions in index.
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        hits = np.repeat(start, counts) + (np.arange(total) - offsets)
+
+        records = self.records[hits].astype(np.int64)
+        diagonals = self.positions[hits].astype(np.int64) - np.repeat(np.arange(len(query)), counts)
+
+        best = np.zeros(len(self.names), dtype = np.int64)
+
+        for shift in (0, diagonal_width // 2):
+            bins = (diagonals + shift) // max(diagonal_width, 1)
+            keys = (records << 32) | (bins - bins.min())
+
+            keys, numbers = np.unique(keys, return_counts = True)
+
+            np.maximum.at(best, keys >> 32, numbers)
+
+        found = np.flatnonzero(best >= min_hits)
+        found = found[np.argsort(-best[found], kind = "stable")]
+
+        return [ (int(record), int(best[record])) for record in found ]
+
+
+def kmer_codes(sequence, k):
+    '''
+        kmer_codes
+
+        Computes codes of all k-mers of sequence (BITS bits per letter).
+
+        Input:
+            sequence: string or bytes - sequence.
+            k: int - k-mer length.
+
+        Output:
+            np.ndarray (uint64) (len(sequence) - k + 1): k-mer codes
+    '''
+
+    if isinstance(sequence, str):
+        sequence = sequence.encode("ascii")
+
+    letters = LOOKUP[np.frombuffer(sequence, dtype = np.uint8)]
+
+    count = len(letters) - k + 1
+
+    if count <= 0:
+        return np.zeros(0, dtype = np.uint64)
+
+    codes = np.zeros(count, dtype = np.uint64)
+
+    for it in range(k):
+        codes <<= np.uint64(BITS)
+        codes |= letters[it:it + count]
+
+    return codes
+
+
+def build_index(records, k):
+    '''
+        build_index
+
+        Builds k-mer index of records.
+
+        Input:
+            records: list of (string, string) - (name, sequence) pairs.
+            k: int - k-mer length.
+
+        Output:
+            KmerIndex: index
+    '''
+
+    if not 1 <= k <= MAX_K:
+        raise ValueError("k has to be between 1 and " + str(MAX_K) + ".")
+
+    kmers = []
+    numbers = []
+    positions = []
+
+    for it, (name, sequence) in enumerate(records):
+        codes = kmer_codes(sequence, k)
+
+        kmers.append(codes)
+        numbers.append(np.full(len(codes), it, dtype = np.int32))
+        positions.append(np.arange(len(codes), dtype = np.int32))
+
+    kmers = np.concatenate(kmers) if kmers else np.zeros(0, dtype = np.uint64)
+    order = np.argsort(kmers, kind = "stable")
+
+    return KmerIndex(k, [ name for name, sequence in records ], np.array([ len(sequence) for name, sequence in records ], dtype = np.int64),
+                     kmers[order], np.concatenate(numbers)[order] if numbers else np.zeros(0, dtype = np.int32),
+                     np.concatenate(positions)[order] if positions else np.zeros(0, dtype = np.int32))
+
+
+def load_index(directory, mmap = True):
+    '''
+        load_index
+
+        Loads index saved with KmerIndex.save.
+
+        Input:
+            directory: string - index directory.
+            mmap: bool - memory-map arrays instead of reading them.
+
+        Output:
+            KmerIndex: index
+            dict: index metadata
+    '''
+
+    with open(os.path.join(directory, "meta.json"), "r") as file_handle:
+        meta = json.load(file_handle)
+
+    arrays = [ np.load(os.path.join(directory, name + ".npy"), mmap_mode = "r" if mmap else None)
+               for name in ("lengths", "kmers", "records", "positions") ]
+
+    return KmerIndex(meta["k"], meta["names"], *arrays), meta
+
+
+def index_path(directory, k):
+    '''
+        index_path
+
+        Returns directory of k-mer index of .fasta file.
+    '''
+
+    return directory + ".k" + str(k) + ".kmers"
+
+
+def open_index(directory, k, records, save = True):
+    '''
+        open_index
+
+        Loads (memory-mapped) k-mer index stored next to .fasta file. If it
+        does not exist or .fasta file has changed, index is built from
+        records and (optionally) saved.
+
+        Input:
+            directory: string - path to .fasta file.
+            k: int - k-mer length.
+            records: list of (string, string) - records of the file.
+            save: bool - save built index.
+
+        Output:
+            KmerIndex: index
+    '''
+
+    path = index_path(directory, k)
+
+    try:
+        index, meta = load_index(path)
+
+        if meta.get("size") == os.path.getsize(directory) and meta.get("mtime") == os.path.getmtime(directory) and \
+           index.names == [ name for name, sequence in records ]:
+            return index
+
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = build_index(records, k)
+
+    if save:
+        try:
+            index.save(path, source = directory)
+        except OSError:
+            pass
+
+    return index
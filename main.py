@@ -3,12 +3,10 @@ from os import path
 import re
 import click
 
-import numpy as np
-import matplotlib.pyplot as plt
-from scipy import signal
-
-from needleman_wunch import NeedlemanWunch
-import NCBI
+from needleman_wunch import NeedlemanWunch, MAX_PATHS
+from profiling import Profiler
+from result_cache import ResultCache
+from fasta import FastaReader
 
 sequence_regex = "^[ACDEFGHIKLMNPQRSTVWY\s]+$"
 
@@ -49,6 +47,8 @@ def prepare_sequence(sequence):
         return normalize_sequence( fasta_read(sequence)[0] )
 
     else:
+        import NCBI
+
         filepath = NCBI.download(sequence)
 
         if filepath == None or not path.isfile(filepath):
@@ -73,22 +73,8 @@ def fasta_read(directory):
     if not ( directory.endswith(".fasta") or directory.endswith(".FASTA") ):
         directory += ".fasta"
 
-    sequences = []
-    seq = ""
-
-    with open(directory, "r") as file_handle:
-        for line in file_handle.readlines():
-            
-            if line[0] == ">":
-                if len(seq) != 0:
-                    sequences.append(seq.upper())       
-                seq = ""
-        
-            else:
-                seq += line
-    
-    if len(seq) != 0:
-        sequences.append(seq.upper())
+    with FastaReader(directory) as reader:
+        sequences = [ sequence.decode("ascii") for header, sequence in reader if len(sequence) != 0 ]
 
     if len(sequences) == 0:
         raise click.BadParameter("File: " + directory + " does not contain any sequence or is not in right format (.fasta).")
@@ -145,8 +131,35 @@ def validate_score(ctx, param, value):
 @click.option('--mismatch_score', '--mms', prompt = 'Mismatch score', help = 'Mismatch score', type = int, callback = validate_score)
 @click.option('--gap_score', '--gs',       prompt = 'Gap score',      help = 'Gap score',      type = int, callback = validate_score)
 
+@click.option('--matrix', '--mx',         default = None, help = 'Substitution matrix name (e.g. BLOSUM62, PAM250) or path to matrix file. Replaces match/mismatch scores.')
+@click.option('--gap_open', '--go',       default = None, help = 'Gap opening score (gotoh and local engines, default: gap score)',   type = int)
+@click.option('--gap_extend', '--ge',     default = None, help = 'Gap extension score (gotoh and local engines, default: gap score)', type = int)
+
 @click.option('--mode', '--m', default = "top_score", prompt = 'Mode', show_default = True, type = click.Choice(['all', 'full_path', 'top_score'], case_sensitive=False), help = 'Result filtering mode.')
 @click.option('--print_graph', '--pg', default = False, prompt = 'Print graph', show_default = True, type=bool,  help = 'Print constructed graph.')
+@click.option('--max_paths', '--mp', default = MAX_PATHS, show_default = True, type = click.IntRange(min = 1), help = 'Print at most this many paths (all are counted).')
+@click.option('--sample', '--sp', default = None, type = click.IntRange(min = 1), help = 'Print this many randomly drawn paths instead (uniform with bitmask traceback).')
+@click.option('--engine', '--e', default = "full", show_default = True, type = click.Choice(['full', 'tiled', 'wavefront', 'hirschberg', 'banded', 'gotoh', 'local'], case_sensitive=False), help = 'Alignment engine.')
+@click.option('--band', '--b', default = 32, show_default = True, type = click.IntRange(min = 0), help = 'Band width (K) of banded engine.')
+@click.option('--workdir', '--wd', default = None, type = click.Path(file_okay = False), help = 'Directory of score and traceback files of tiled engine (default: temporary directory).')
+@click.option('--tile', '--tl', default = 1024, show_default = True, type = click.IntRange(min = 1), help = 'Tile size of tiled and wavefront engines.')
+@click.option('--workers', '--w', default = None, type = click.IntRange(min = 1), help = 'Workers of wavefront engine (default: number of CPUs).')
+@click.option('--backend', '--bk', default = "thread", show_default = True, type = click.Choice(['thread', 'process'], case_sensitive=False), help = 'Workers of wavefront engine: threads or processes with shared memory.')
+@click.option('--auto_widen', '--aw', is_flag = True, help = 'Double band width while path touches band edge (banded engine).')
+@click.option('--traceback', '--tb', default = None, type = click.Choice(['graph', 'bitmask'], case_sensitive=False), help = 'Path storage (default: graph with --mode=all or --print_graph, bitmask otherwise). Bitmask keeps one byte per cell and rebuilds paths at the end.')
+@click.option('--score_only', '--so', is_flag = True, help = 'Compute only the global score in linear memory (no paths, heatmap or out.txt).')
+@click.option('--xdrop', '--xd', default = None, type = click.IntRange(min = 0), help = 'X-drop threshold. Score-only run abandons pair when whole row falls more than X below the best score, graph skips such cells.')
+@click.option('--profile', '--pr', is_flag = True, help = 'Print time and memory of every phase (fill, traceback, paths, plot, save) and counters.')
+@click.option('--profile_json', '--pj', default = None, type = click.Path(dir_okay = False), help = 'Save profile metrics to .json file.')
+@click.option('--cprofile', '--cp', default = None, type = click.Path(dir_okay = False), help = 'Save cProfile dump of the run (see python -m pstats).')
+@click.option('--output', '--o', default = None, help = 'Append result record to this file ("-" for standard output) instead of writing out.txt.')
+@click.option('--format', '--f', default = "jsonl", show_default = True, type = click.Choice(['jsonl', 'tsv', 'sam'], case_sensitive=False), help = 'Format of --output records.')
+@click.option('--cache_dir', '--cd', default = None, type = click.Path(file_okay = False), help = 'Result cache directory. Cached alignments skip the dynamic programming (heatmap shows only the path).')
+@click.option('--cache_limit', '--cl', default = 256, show_default = True, type = click.IntRange(min = 1), help = 'Size limit of result cache (MB).')
+@click.option('--plot/--no-plot', default = True, show_default = True, help = 'Show score matrix heatmap. --no-plot never imports matplotlib (headless runs).')
+@click.option('--plot_file', '--pf', default = None, type = click.Path(dir_okay = False), help = 'Save heatmap to image file (.png, .svg, ...) instead of showing it (no interactive backend).')
+@click.option('--plot_size', '--ps', default = 1000, show_default = True, type = click.IntRange(min = 1), help = 'Maximal heatmap resolution; larger matrices are downsampled.')
+@click.option('--pool', '--pl', default = "max", show_default = True, type = click.Choice(['max', 'mean'], case_sensitive=False), help = 'Downsampling of large matrices (block max or mean).')
 
 def main(**kwargs):
 
@@ -163,6 +176,42 @@ def main(**kwargs):
          # Shorter version
          python main.py --s1=AAA --s2=CCC --ms=1 --mms=-1 --gs=-2 --m=top_score --pg=False
 
+         \b
+         # Headless run (no heatmap window)
+         python main.py --s1=AAA --s2=CCC --ms=1 --mms=-1 --gs=-2 --m=top_score --pg=False --no-plot
+
+         \b
+         # Protein alignment with substitution matrix and affine gaps
+         python main.py --s1=HEAGAWGHEE --s2=PAWHEAE --ms=0 --mms=0 --gs=-8 --mx=BLOSUM62 --e=gotoh --go=-11 --ge=-1 --m=top_score --pg=False
+
+         \b
+         # Score only (database screening) with X-drop
+         python main.py --s1=AAA --s2=CCC --ms=1 --mms=-1 --gs=-2 --m=top_score --pg=False --so --xd=20
+
+         \b
+         # Heatmap saved to file (headless), large matrices pooled to 800 pixels
+         python main.py --s1=seq1.fasta --s2=seq2.fasta --ms=1 --mms=-1 --gs=-2 --m=top_score --pg=False --tb=bitmask --pf=heatmap.png --ps=800
+
+         \b
+         # Rerun with the same parameters is read from the cache
+         python main.py --s1=AAA --s2=CCC --ms=1 --mms=-1 --gs=-2 --m=top_score --pg=False --no-plot --cd=.cache
+
+         \b
+         # Time and memory of every phase, saved also as .json
+         python main.py --s1=AAA --s2=CCC --ms=1 --mms=-1 --gs=-2 --m=top_score --pg=False --no-plot --pr --pj=profile.json
+
+         \b
+         # Local alignment (sequences can also be read from .fasta files or NCBI)
+         python main.py --s1=HEAGAWGHEE --s2=PAWHEAE --ms=0 --mms=0 --gs=-8 --mx=BLOSUM62 --e=local --go=-11 --ge=-1 --m=top_score --pg=False
+
+         \b
+         # Matrices larger than memory: out-of-core fill, files kept in ./matrices
+         python main.py --s1=seq1.fasta --s2=seq2.fasta --ms=1 --mms=-1 --gs=-2 --m=top_score --pg=False --e=tiled --tb=bitmask --wd=matrices
+
+         \b
+         # Append result as JSON line (also --f=tsv or --f=sam for CIGAR)
+         python main.py --s1=AAA --s2=CCC --ms=1 --mms=-1 --gs=-2 --m=top_score --pg=False --no-plot --o=results.jsonl
+
          \b
          # You can also run this script without any arguments.
          python main.py
@@ -173,10 +222,69 @@ def main(**kwargs):
           full_path    Display only results that covers whole sequences.
           top_score    Display only paths with higher score.
 
+         \b
+         Traceback (--traceback):
+          graph        Build graph of partial paths while filling the matrix
+                       (default with --mode=all or --print_graph).
+          bitmask      Store directions only and rebuild optimal global paths
+                       (default otherwise).
+
+         \b
+         Engine (--engine):
+          full         Fill whole score matrix (required for graph, all paths and heatmap).
+          tiled        As full, but matrices are memory-mapped files (--workdir) filled
+                       in --tile sized tiles, for matrices which do not fit in memory.
+          wavefront    As full, but anti-diagonals of tiles are filled in parallel
+                       (--workers, --backend). Result is the same as with full.
+          hirschberg   Find one optimal alignment in linear memory (no heatmap).
+          banded       Compute only cells within --band of the diagonal (no heatmap).
+                       Result is reported as exact or heuristic.
+          gotoh        Affine gaps: gap of length L scores --gap_open + (L - 1) * --gap_extend.
+          local        Local alignment (Smith-Waterman) with affine gaps, e.g. domain
+                       inside a protein. Reports aligned region of both sequences.
+
     '''
 
+    gap_open = kwargs['gap_open'] if kwargs['gap_open'] is not None else kwargs['gap_score']
+    gap_extend = kwargs['gap_extend'] if kwargs['gap_extend'] is not None else kwargs['gap_score']
+
+    if kwargs['engine'] in ("gotoh", "local") and gap_open > gap_extend:
+        raise click.BadParameter("Gap opening score can not be higher than gap extension score.", param_hint = "'--gap_open'")
+
+    if kwargs['engine'] == "local" and (gap_open >= 0 or gap_extend > 0):
+        raise click.BadParameter("Gap scores of local alignment must be negative.", param_hint = "'--gap_open'")
+
+    profile = kwargs.pop('profile')
+    profile_json = kwargs.pop('profile_json')
+    cprofile = kwargs.pop('cprofile')
+
+    if profile or profile_json is not None or cprofile is not None:
+        kwargs['profiler'] = Profiler(cprofile = cprofile)
+        kwargs['profiler'].start()
+
+    cache_dir = kwargs.pop('cache_dir')
+    cache_limit = kwargs.pop('cache_limit')
+
+    if cache_dir is not None:
+        kwargs['cache'] = ResultCache(cache_dir, disk_limit = cache_limit * 2 ** 20)
+
     NeedlemanWunch(**kwargs).forward()
 
+    if kwargs.get('cache') is not None:
+        stats = kwargs['cache'].stats()
+        kwargs['cache'].close()
+
+        print("Cache:", "hit" if stats["misses"] == 0 else "miss", "(" + str(stats["disk_entries"]) + " entries, " + str(stats["disk_size"] // 1024) + " kB)")
+
+    if kwargs.get('profiler') is not None:
+        kwargs['profiler'].stop()
+
+        if profile:
+            kwargs['profiler'].print_report()
+
+        if profile_json is not None:
+            kwargs['profiler'].save(profile_json)
+
 
 
 if __name__ == "__main__":
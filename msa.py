@@ -0,0 +1,470 @@
+import os
+import sys
+import types
+import itertools
+
+import click
+import numpy as np
+
+from main import validate_score, normalize_sequence
+from batch import read_records, run
+from kernels import fill_profile_matrix, DIAGONAL, UP
+from substitution import load_matrix, match_mismatch
+from profiling import Profiler
+
+# Letter of gap in aligned .fasta output.
+GAP = ord("-")
+
+# Letters per line of aligned .fasta output.
+LINE_WIDTH = 60
+
+
+def distance_matrix(sequences, scoring, options, workers, chunk_size):
+    '''
+        distance_matrix
+
+        Computes distances of all pairs of sequences from score-only
+        alignments (see batch.run): score S of a pair is compared with
+        scores of aligning both sequences with themselves,
+
+            d = max(0, 1 - S / ((S11 + S22) / 2))
+
+        so identical sequences have distance 0.
+
+        input:
+            sequences: list of string - sequences.
+            scoring: Scoring - substitution scores.
+            options: dict - NeedlemanWunch arguments (scores, matrix, ...).
+            workers: int - number of worker processes.
+            chunk_size: int - number of pairs sent to worker at once.
+
+        output:
+            np.ndarray (n, n): distance matrix
+    '''
+
+    n = len(sequences)
+
+    # Optimal alignment of sequence with itself is the identity.
+    self_scores = np.array([ float(scoring.matrix[codes, codes].sum()) for codes in map(scoring.encode, sequences) ])
+
+    records = [ (str(it), sequence) for it, sequence in enumerate(sequences) ]
+    pairs = ( (records[i], records[j]) for i, j in itertools.combinations(range(n), 2) )
+
+    scores = np.zeros( (n, n) )
+
+    def collect(record):
+        i, j = int(record["record1"]), int(record["record2"])
+        scores[i, j] = scores[j, i] = record["score"]
+
+    run(pairs, dict(options, score_only = True, xdrop = None), types.SimpleNamespace(write = collect), workers, chunk_size)
+
+    expected = np.maximum((self_scores[:, None] + self_scores[None, :]) / 2, 1)
+
+    distances = np.maximum(1 - scores / expected, 0)
+    np.fill_diagonal(distances, 0)
+
+    return distances
+
+
+def upgma(distances):
+    '''
+        upgma
+
+        Builds guide tree with UPGMA: the closest clusters are joined and
+        distance of the new cluster is the size weighted average of
+        distances of joined ones.
+
+        input:
+            distances: np.ndarray (n, n) - distance matrix.
+
+        output:
+            list of (int, int): joined nodes in order of joining (leaves are
+                0 ... n - 1, node created by k-th join is n + k)
+    '''
+
+    n = len(distances)
+
+    distances = np.array(distances, dtype = np.float64)
+    np.fill_diagonal(distances, np.inf)
+
+    nodes = list(range(n))
+    sizes = np.ones(n)
+    joins = []
+
+    for k in range(n - 1):
+        i, j = np.unravel_index(np.argmin(distances), distances.shape)
+        i, j = min(i, j), max(i, j)
+
+        joins.append( (nodes[i], nodes[j]) )
+
+        merged = (distances[i] * sizes[i] + distances[j] * sizes[j]) / (sizes[i] + sizes[j])
+        merged[i] = np.inf
+
+        distances[i] = distances[:, i] = merged
+        distances[j] = distances[:, j] = np.inf
+
+        sizes[i] += sizes[j]
+        nodes[i] = n + k
+
+    return joins
+
+
+def neighbor_joining(distances):
+    '''
+        neighbor_joining
+
+        Builds guide tree with neighbor-joining: pair minimizing
+        Q(i, j) = (r - 2) d(i, j) - R(i) - R(j) is joined (r - number of
+        active nodes, R - sum of distances of a node). Unrooted tree is
+        rooted at the last join.
+
+        input:
+            distances: np.ndarray (n, n) - distance matrix.
+
+        output:
+            list of (int, int): joined nodes in order of joining (see upgma)
+    '''
+
+    n = len(distances)
+
+    distances = np.array(distances, dtype = np.float64)
+
+    nodes = list(range(n))
+    active = np.ones(n, dtype = bool)
+    joins = []
+
+    for k in range(n - 1):
+        r = int(np.count_nonzero(active))
+
+        if r == 2:
+            i, j = np.flatnonzero(active)
+
+        else:
+            totals = np.where(active, distances.sum(axis = 1), 0)
+
+            q = (r - 2) * distances - totals[:, None] - totals[None, :]
+            q[~active] = np.inf
+            q[:, ~active] = np.inf
+            np.fill_diagonal(q, np.inf)
+
+            i, j = np.unravel_index(np.argmin(q), q.shape)
+            i, j = min(i, j), max(i, j)
+
+        joins.append( (nodes[i], nodes[j]) )
+
+        merged = np.where(active, (distances[i] + distances[j] - distances[i, j]) / 2, 0)
+        merged[i] = 0
+
+        distances[i] = distances[:, i] = merged
+        distances[j] = distances[:, j] = 0
+
+        active[j] = False
+        nodes[i] = n + k
+
+    return joins
+
+
+def extended_matrix(scoring, gap_score):
+    '''
+        extended_matrix
+
+        Builds substitution matrix extended with gap letter (the last row and
+        column): gap against letter scores gap_score, gap against gap 0.
+
+        input:
+            scoring: Scoring - substitution scores.
+            gap_score: int - score for gap.
+
+        output:
+            np.ndarray (len(alphabet) + 1, len(alphabet) + 1): matrix
+    '''
+
+    size = len(scoring.alphabet)
+
+    matrix = np.full( (size + 1, size + 1), float(gap_score) )
+    matrix[:size, :size] = scoring.matrix
+    matrix[size, size] = 0
+
+    return matrix
+
+
+def align_profiles(counts1, counts2, matrix):
+    '''
+        align_profiles
+
+        Aligns two profiles (columns of aligned groups of sequences) with
+        kernels.fill_profile_matrix. Score of a pair of columns is the sum
+        of scores of all pairs of their letters (sum-of-pairs, gap letter
+        included), score of a column aligned with gap is the sum for gaps
+        of all members of the other profile (gap against gap scores 0).
+
+        input:
+            counts1: np.ndarray (m, len(alphabet) + 1) - letter counts of
+                columns of profile 1.
+            counts2: np.ndarray (n, len(alphabet) + 1) - letter counts of
+                columns of profile 2.
+            matrix: np.ndarray - substitution matrix with gap letter (see
+                extended_matrix).
+
+        output:
+            np.ndarray (int): column of profile 1 in every aligned column (-1 - gap)
+            np.ndarray (int): column of profile 2 in every aligned column (-1 - gap)
+            float: alignment score (sum-of-pairs of pairs across profiles)
+    '''
+
+    gap = matrix[:, -1]
+
+    scores = counts2 @ matrix @ counts1.T
+    gaps1 = counts1 @ gap * counts2[0].sum()
+    gaps2 = counts2 @ gap * counts1[0].sum()
+
+    output, directions = fill_profile_matrix(scores, gaps1, gaps2)
+
+    index1 = []
+    index2 = []
+
+    i, j = len(counts2), len(counts1)
+
+    while i > 0 or j > 0:
+        bits = directions[i, j]
+
+        if bits & DIAGONAL:
+            i -= 1
+            j -= 1
+            index1.append(j)
+            index2.append(i)
+
+        elif bits & UP:
+            i -= 1
+            index1.append(-1)
+            index2.append(i)
+
+        else:
+            j -= 1
+            index1.append(j)
+            index2.append(-1)
+
+    return np.array(index1[::-1], dtype = np.int64), np.array(index2[::-1], dtype = np.int64), float(output[-1, -1])
+
+
+def merge_counts(counts, index, members, gap):
+    '''
+        merge_counts
+
+        Places letter counts of profile columns in aligned columns (gap
+        columns hold only gaps of all members).
+
+        input:
+            counts: np.ndarray (m, len(alphabet) + 1) - letter counts of columns.
+            index: np.ndarray (int) - column in every aligned column (-1 - gap).
+            members: int - number of sequences of profile.
+            gap: int - index of gap letter.
+
+        output:
+            np.ndarray (len(index), len(alphabet) + 1): letter counts
+    '''
+
+    merged = np.zeros( (len(index), counts.shape[1]) )
+
+    inside = index >= 0
+
+    merged[inside] = counts[index[inside]]
+    merged[~inside, gap] = members
+
+    return merged
+
+
+def progressive_alignment(sequences, scoring, gap_score, joins, profiler):
+    '''
+        progressive_alignment
+
+        Aligns sequences along guide tree: profiles of joined nodes are
+        aligned (align_profiles) and merged, gaps once inserted are kept.
+        Profile keeps letter counts of its columns and position of every
+        member letter in every column (-1 - gap).
+
+        input:
+            sequences: list of string - sequences.
+            scoring: Scoring - substitution scores.
+            gap_score: int - score for gap.
+            joins: list of (int, int) - guide tree (see upgma).
+            profiler: Profiler - collects counters.
+
+        output:
+            list of string: aligned sequences (in order of input)
+            float: sum-of-pairs score of alignment
+    '''
+
+    n = len(sequences)
+
+    matrix = extended_matrix(scoring, gap_score)
+    gap = len(scoring.alphabet)
+
+    profiles = {}
+
+    for it, sequence in enumerate(sequences):
+        codes = scoring.encode(sequence)
+
+        counts = np.zeros( (len(codes), gap + 1) )
+        counts[np.arange(len(codes)), codes] = 1
+
+        profiles[it] = ([it], np.arange(len(codes))[None, :], counts)
+
+    for k, (node1, node2) in enumerate(joins):
+        members1, positions1, counts1 = profiles.pop(node1)
+        members2, positions2, counts2 = profiles.pop(node2)
+
+        index1, index2 = align_profiles(counts1, counts2, matrix)[:2]
+
+        positions = np.concatenate([ np.where(index1 >= 0, positions1[:, index1], -1),
+                                     np.where(index2 >= 0, positions2[:, index2], -1) ])
+
+        counts = merge_counts(counts1, index1, len(members1), gap) + merge_counts(counts2, index2, len(members2), gap)
+
+        profiles[n + k] = (members1 + members2, positions, counts)
+
+        profiler.count("cells", len(counts1) * len(counts2))
+
+    (members, positions, counts), = profiles.values()
+
+    # Padding letter at the end is taken by gap positions (-1).
+    letters = np.full( (n, max(map(len, sequences)) + 1), GAP, dtype = np.uint8 )
+
+    for it, sequence in enumerate(sequences):
+        letters[it, :len(sequence)] = np.frombuffer(sequence.encode("ascii"), dtype = np.uint8)
+
+    aligned = [None] * n
+
+    for member, row in zip(members, positions):
+        aligned[member] = letters[member, row].tobytes().decode("ascii")
+
+    # Pairs of letters in every column, without pairs of letter with itself.
+    pairs = ((counts @ matrix) * counts).sum() - (counts @ np.diag(matrix)).sum()
+
+    return aligned, float(pairs / 2)
+
+
+def write_fasta(directory, headers, sequences):
+    '''
+        write_fasta
+
+        Writes sequences to .fasta file (LINE_WIDTH letters per line).
+
+        input:
+            directory: string - path to .fasta file ("-" for standard output).
+            headers: list of string - headers (without ">").
+            sequences: list of string - sequences.
+
+        output:
+            None
+    '''
+
+    file_handle = sys.stdout if directory == "-" else open(directory, "w")
+
+    try:
+        for header, sequence in zip(headers, sequences):
+            file_handle.write(">" + header + "\n")
+
+            for start in range(0, len(sequence), LINE_WIDTH):
+                file_handle.write(sequence[start:start + LINE_WIDTH] + "\n")
+
+    finally:
+        if file_handle is not sys.stdout:
+            file_handle.close()
+
+
+@click.command()
+
+@click.option('--fasta', '--fa', required = True, type = click.Path(exists = True, dir_okay = False), help = 'Multi-record .fasta file.')
+
+@click.option('--match_score', '--ms',     required = True, help = 'Match score',    type = int, callback = validate_score)
+@click.option('--mismatch_score', '--mms', required = True, help = 'Mismatch score', type = int, callback = validate_score)
+@click.option('--gap_score', '--gs',       required = True, help = 'Gap score',      type = int, callback = validate_score)
+
+@click.option('--matrix', '--mx',         default = None, help = 'Substitution matrix name (e.g. BLOSUM62, PAM250) or path to matrix file. Replaces match/mismatch scores.')
+
+@click.option('--tree', '--t', default = "upgma", show_default = True, type = click.Choice(['upgma', 'nj'], case_sensitive=False), help = 'Guide tree: UPGMA or neighbor-joining.')
+
+@click.option('--workers', '--w', default = os.cpu_count(), show_default = True, type = click.IntRange(min = 1), help = 'Number of worker processes of pairwise distances.')
+@click.option('--chunk_size', '--cs', default = 64, show_default = True, type = click.IntRange(min = 1), help = 'Pairs sent to worker at once.')
+@click.option('--output', '--o', default = "msa_out.fasta", show_default = True, type = click.Path(dir_okay = False), help = 'Aligned .fasta file ("-" for standard output).')
+@click.option('--profile_json', '--pj', default = None, type = click.Path(dir_okay = False), help = 'Save time and memory of stages to .json file.')
+
+def msa(fasta, tree, workers, chunk_size, output, profile_json, **kwargs):
+
+    '''
+        Progressive multiple sequence alignment
+
+        Aligns all records of multi-record .fasta file. Distances of all
+        pairs are computed from score-only alignments on process pool, guide
+        tree is built from them (UPGMA or neighbor-joining) and profiles are
+        aligned along the tree. Time and memory of every stage is reported.
+
+        Examples:
+
+         \b
+         # DNA family
+         python msa.py --fa=family.fasta --ms=1 --mms=-1 --gs=-2
+
+         \b
+         # Proteins with BLOSUM62, neighbor-joining tree, on 8 processes
+         python msa.py --fa=proteins.fasta --ms=1 --mms=-1 --gs=-4 --mx=BLOSUM62 --t=nj --w=8 --o=aligned.fasta
+    '''
+
+    profiler = Profiler()
+    profiler.start()
+
+    with profiler.phase("read"):
+        # Aligned records keep their whole headers (with descriptions).
+        records = read_records(fasta, full_header = True)
+
+        headers = [ header for header, sequence in records ]
+        sequences = [ normalize_sequence(sequence) for name, sequence in records ]
+
+        if len(sequences) < 2:
+            raise click.BadParameter("File: " + fasta + " must contain at least 2 sequences.", param_hint = "'--fasta'")
+
+        if kwargs['matrix'] is not None:
+            scoring = load_matrix(kwargs['matrix'])
+        else:
+            scoring = match_mismatch(kwargs['match_score'], kwargs['mismatch_score'])
+
+        try:
+            for sequence in sequences:
+                scoring.encode(sequence)
+
+        except ValueError as error:
+            raise click.BadParameter(str(error), param_hint = "'--fasta'")
+
+    profiler.count("sequences", len(sequences))
+    profiler.count("pairs", len(sequences) * (len(sequences) - 1) // 2)
+
+    options = dict(kwargs, mode = "top_score", print_graph = False)
+
+    with profiler.phase("distances"):
+        distances = distance_matrix(sequences, scoring, options, workers, chunk_size)
+
+    with profiler.phase("tree"):
+        joins = upgma(distances) if tree == "upgma" else neighbor_joining(distances)
+
+    with profiler.phase("progressive"):
+        aligned, score = progressive_alignment(sequences, scoring, kwargs['gap_score'], joins, profiler)
+
+    profiler.count("columns", len(aligned[0]))
+
+    with profiler.phase("write"):
+        write_fasta(output, headers, aligned)
+
+    profiler.stop()
+
+    print("Aligned", len(aligned), "sequences in", len(aligned[0]), "columns (sum-of-pairs score: " + str(score) + "). Results saved to", output, file = sys.stderr if output == "-" else sys.stdout)
+
+    profiler.print_report(file = sys.stderr if output == "-" else sys.stdout)
+
+    if profile_json is not None:
+        profiler.save(profile_json)
+
+
+if __name__ == "__main__":
+
+    msa()
@@ -1,11 +1,29 @@
 # Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
 
-import numpy as np
-import matplotlib.pyplot as plt
-from tqdm import tqdm
+import tempfile
 
+import numpy as np
 
 from binary_graph import BinaryGraph
+from traceback_matrix import TracebackMatrix
+from hirschberg import hirschberg
+from banded import banded
+from gotoh import gotoh
+from smith_waterman import smith_waterman
+from tiled import fill_tiled
+from wavefront import fill_wavefront
+from kernels import fill_score_matrix, score_only, DIAGONAL, LEFT, UP
+from substitution import load_matrix, match_mismatch
+from profiling import NULL_PROFILER
+from results import ResultWriter, AlignmentResult
+from result_cache import cache_key
+
+# Gap letter of aligned sequences.
+GAP = ord("-")
+
+# Default limit of reported paths (number of co-optimal paths grows
+# exponentially with sequence length).
+MAX_PATHS = 1000
 
 class NeedlemanWunch():
     '''
@@ -33,12 +51,53 @@ class NeedlemanWunch():
         self.gap_score = kwargs['gap_score']
         self.mode = kwargs['mode']
         self.print_graph = kwargs['print_graph']
+        self.traceback = kwargs.get('traceback')
+        self.engine = kwargs.get('engine', "full")
+        self.band = kwargs.get('band', 32)
+        self.auto_widen = kwargs.get('auto_widen', False)
+        self.show_plot = kwargs.get('plot', True)
+        self.plot_file = kwargs.get('plot_file')
+        self.plot_size = kwargs.get('plot_size', 1000)
+        self.pool = kwargs.get('pool', "max")
+        self.max_paths = kwargs.get('max_paths', MAX_PATHS)
+        self.sample = kwargs.get('sample')
+        self.score_only = kwargs.get('score_only', False)
+        self.xdrop = kwargs.get('xdrop')
+        self.profiler = kwargs.get('profiler') or NULL_PROFILER
+        self.output = kwargs.get('output')
+        self.format = kwargs.get('format', "jsonl")
+        self.name1 = kwargs.get('name1', "sequence1")
+        self.name2 = kwargs.get('name2', "sequence2")
+        self.workdir = kwargs.get('workdir')
+        self.tile = kwargs.get('tile', 1024)
+        self.workers = kwargs.get('workers')
+        self.backend = kwargs.get('backend', "thread")
+        self.cache = kwargs.get('cache')
+
+        # Start of the alignment (local engine aligns only a region).
+        self.origin = (0, 0)
+        self.gap_open = kwargs.get('gap_open') if kwargs.get('gap_open') is not None else self.gap_score
+        self.gap_extend = kwargs.get('gap_extend') if kwargs.get('gap_extend') is not None else self.gap_score
+
+        # Graph stores every partial path (their number grows exponentially),
+        # so it is built only when its structure or non-optimal paths are
+        # needed.
+        if self.traceback is None:
+            self.traceback = "graph" if self.mode == "all" or self.print_graph else "bitmask"
+
+        if kwargs.get('scoring') is not None:
+            self.scoring = kwargs['scoring']
+        elif kwargs.get('matrix') is not None:
+            self.scoring = load_matrix(kwargs['matrix'])
+        else:
+            self.scoring = match_mismatch(self.match_score, self.mismatch_score)
 
     def forward(self):
         '''
             forward method
 
-            Executing Needleman-Wunch algorithm.
+            Executing Needleman-Wunch algorithm (see align) and printing,
+            plotting and saving its result.
 
             Input:
                 None
@@ -52,154 +111,543 @@ class NeedlemanWunch():
         print("Sequence 2:", self.seq2)
         print()
 
-        output = np.zeros( (len(self.seq2), len(self.seq1)) )
-        s = np.zeros(3)
+        profiler = self.profiler
 
-        output[:, 0] = np.arange(0, len(self.seq2) * self.gap_score, self.gap_score)
-        output[0, :] = np.arange(0, len(self.seq1) * self.gap_score, self.gap_score)
+        result = self.align(keep_matrix = True, paths = True, progress = True)
 
-        graph = BinaryGraph(self.seq1, self.seq2, retainGraph = self.print_graph)
+        info = result.info
 
-        for i in tqdm(range(1, len(self.seq2))):
-            for j in range(1, len(self.seq1)):
-                
-                _i = i - 1
-                _j = j - 1
+        if self.score_only:
+            print("score: " + (str(result.score) if result.score is not None else "NA"))
 
-                s[0] = output[_i, _j] + (self.match_score if self.seq2[i] == self.seq1[j] else self.mismatch_score)
-                s[1] = output[i, _j] + self.gap_score
-                s[2] = output[_i, j] + self.gap_score
+            for name, value in info.items():
+                print(name.lower() + ":", value)
 
-                output[i, j] = max(s)
-                path = (s == output[i, j])
+            print()
 
-                if output [i,j]> min(i,j) * -3:
+            if self.output is not None:
+                with profiler.phase("save"):
+                    self.write_record(result.to_record(self.name1, self.name2))
 
-                    if (i == 1 or j == 1) and path[0]:
-                        graph.addRoot(i, j)
-                        
-                    elif path[0]:
-                        graph.addNode(i, j, _i, _j, self.seq1[j], self.seq2[i])
+            return
 
-                    if path[1]:
-                        graph.addNode(i, j, i, _j, self.seq1[j], "-")
-                        
-                    if path[2]:
-                        graph.addNode(i, j, _i, j, "-", self.seq2[i])
+        # Results cached before pruned graphs fell back to trace have no
+        # path, they are reported as empty one.
+        path = result.path if result.path is not None else ["", ""]
 
+        if result.graph is None:
+            # Single path engines and cached results (heatmap of cached
+            # result shows the path without the matrix).
+            print()
+            print(path[0] + "\n" + path[1] + "\n" + "score: " + str(result.score))
 
+            for name, value in info.items():
+                print(name.lower() + ":", value)
 
-        graph.scores = output
+            print()
+
+        else:
+            if self.print_graph:
+                with profiler.phase("print_graph"):
+                    print()
+                    result.graph.printTree()
 
-        if self.print_graph:
             print()
-            graph.printTree()
 
-        print()
-        path = graph.getPaths(self.mode, self.gap_score)
+            result.graph.printPaths(result.paths)
 
+        if self.show_plot:
+            with profiler.phase("plot"):
+                self.plot(result.matrix, path, result.origin)
 
-        self.plot(output, path)
-        self.save_to_file(path)
+        with profiler.phase("save"):
+            self.save_to_file(path, info)
 
-    def plot(self, matrix, path):
+    def align(self, keep_matrix = False, paths = False, progress = False):
         '''
-            plot methods
+            align method
 
-            Method for ploting computed score matrix
+            Aligns sequences and returns the result. Nothing is printed,
+            plotted or saved.
+
+            Without paths one optimal alignment is found (matrix engines
+            follow the first traceback path). With paths matrix engines
+            build whole traceback (graph or bitmask) and report paths
+            selected by mode, max_paths and sample.
 
             Input:
-                matrix: 2d vector - score matrix
-                path: list (2, n) - optimal path
+                keep_matrix: bool - keep score matrix and traceback
+                    structure in result.
+                paths: bool - report all paths (matrix engines).
+                progress: bool - show progress bar of graph construction.
 
             Output:
-                None
+                AlignmentResult: result of alignment
         '''
 
-        x = [0]
-        y = [0]
-        
-        for it in range( len( path[0] )):
-            
-            if path[0][it] != "-":
-                x.append( x[-1] + 1)
-                x[-2] += 0.25
+        profiler = self.profiler
+
+        profiler.count("cells", (len(self.seq1) - 1) * (len(self.seq2) - 1))
+
+        if self.score_only:
+            with profiler.phase("score"):
+                score, info = self.global_score()
+
+            return AlignmentResult(score, info = info)
+
+        if not paths or self.engine not in ("full", "tiled", "wavefront"):
+            with profiler.phase("align"):
+                path, score, info, output = self.best_path()
+
+            return AlignmentResult(score, path, self.statistics(path), info, self.origin, output if keep_matrix else None)
+
+        cached = self.cache_lookup("forward")
+
+        if cached is not None:
+            path = cached["path"]
+            stats = self.statistics(path) if path is not None else None
+
+            return AlignmentResult(cached["score"], path, stats, cached["info"], self.origin)
+
+        info = {}
+
+        with profiler.phase("fill"):
+            output, trace = self.fill_matrix()
+
+        with profiler.phase("traceback"):
+            if self.traceback == "bitmask":
+                graph = TracebackMatrix(self.seq1, self.seq2, trace)
+
             else:
-                x.append( x[-1] )
+                graph = self.build_graph(output, trace, progress)
+
+                profiler.count("nodes", len(graph.nodes) + len(graph.roots))
+
+        graph.scores = output
+
+        with profiler.phase("paths"):
+            found = graph.findPaths(self.mode, self.gap_score, self.max_paths, self.sample)
+
+            if self.traceback == "bitmask":
+                path_count = graph.path_count
 
-            if path[1][it] != "-":
-                y.append( y[-1] + 1 )
-                y[-2] += 0.25
             else:
-                y.append( y[-1] )
+                # Graph counts its stored (pruned, mode filtered) paths, the
+                # number of co-optimal global alignments is counted on trace.
+                matrix = TracebackMatrix(self.seq1, self.seq2, trace)
+                path_count = matrix.countPaths()
+
+                # Pruning can remove every path from the graph, the first
+                # optimal global alignment is then rebuilt from trace.
+                if len(found) == 0:
+                    found = [ next(matrix.iterPaths()) + [float(output[-1, -1])] ]
+
+        profiler.count("paths", path_count)
+
+        info["Paths"] = str(path_count)
 
-        labels_x = list(self.seq1)
-        labels_y = list(self.seq2)
+        if self.traceback != "bitmask":
+            info["Graph paths"] = str(graph.path_count)
 
-        fig, ax = plt.subplots(figsize=(min(16, 6 + len(self.seq1) // 15) , min(16, 6 + len(self.seq2) // 15) ))
-        im = ax.imshow(matrix)
+        path = found[0][:2]
+        score = float(found[0][2])
 
+        # Sampled paths are random, they are not cached.
+        if self.sample is None:
+            self.cache_store("forward", {"path": path, "score": score, "info": info})
+
+        stats = self.statistics(path)
+
+        if keep_matrix:
+            return AlignmentResult(score, path, stats, info, self.origin, output, found, path_count, graph)
+
+        return AlignmentResult(score, path, stats, info, self.origin, paths = found, path_count = path_count)
+
+    def global_score(self):
+        '''
+            global_score method
+
+            Computes only the global alignment score (linear gap score) in
+            O(min(n, m)) memory. Nothing is printed, plotted or saved.
+
+            Input:
+                None
+
+            Output:
+                float: alignment score (None if pair was abandoned by X-drop)
+                dict: additional report lines (name: value)
+        '''
 
-        ax.xaxis.tick_top()
-        ax.xaxis.set_label_position('top') 
+        cached = self.cache_lookup("score")
 
-        if len(labels_x) < 30 and len(labels_y) < 30:
+        if cached is not None:
+            return cached["score"], cached["info"]
 
-            ax.set_xticks( np.arange( len(labels_x) ))
-            ax.set_yticks( np.arange( len(labels_y) ))
+        info = {}
 
-            ax.set_xticklabels(labels_x)
-            ax.set_yticklabels(labels_y)
+        score, rows = score_only(self.seq1[1:], self.seq2[1:], self.scoring, self.gap_score, self.xdrop)
 
-            ax.set_xticklabels(labels_x)
-            ax.set_yticklabels(labels_y)
+        if score is None:
+            info["X-drop"] = "abandoned after " + str(rows) + " rows"
 
-            for i in range(len(labels_y)):
-                for j in range(len(labels_x)):
-                    text = ax.text(j, i, matrix[i, j],
-                                ha="center", va="center", color="w")
+        self.cache_store("score", {"score": score, "info": info})
+
+        return score, info
+
+    def best_path(self):
+        '''
+            best_path method
+
+            Finds one optimal alignment with selected engine. Nothing is
+            printed, plotted or saved.
+
+            Input:
+                None
+
+            Output:
+                list (2) of string: aligned sequences
+                float: alignment score
+                dict: additional report lines (name: value)
+                2d vector: score matrix (None if engine does not build it)
+        '''
+
+        cached = self.cache_lookup("path")
+
+        if cached is not None:
+            self.origin = tuple(cached["origin"])
+
+            return cached["path"], cached["score"], cached["info"], None
+
+        info = {}
+        output = None
+
+        if self.engine == "hirschberg":
+            path, score = hirschberg(self.seq1[1:], self.seq2[1:], self.scoring, self.gap_score)
+
+        elif self.engine == "banded":
+            path, score, exact, band = banded(self.seq1[1:], self.seq2[1:], self.scoring, self.gap_score, self.band, self.auto_widen)
+
+            info["Band"] = str(band) + (" (exact)" if exact else " (heuristic)")
+
+        elif self.engine == "gotoh":
+            path, score, output = gotoh(self.seq1[1:], self.seq2[1:], self.scoring, self.gap_open, self.gap_extend)
+
+        elif self.engine == "local":
+            path, score, self.origin = smith_waterman(self.seq1[1:], self.seq2[1:], self.scoring, self.gap_open, self.gap_extend)
+
+            length1 = len(path[0].replace("-", ""))
+            length2 = len(path[1].replace("-", ""))
+
+            if len(path[0]) == 0:
+                info["Region"] = "none (no positive scoring alignment)"
+
+            else:
+                info["Region"] = "Sequence 1: " + str(self.origin[0] + 1) + "-" + str(self.origin[0] + length1) + \
+                                 ", Sequence 2: " + str(self.origin[1] + 1) + "-" + str(self.origin[1] + length2)
 
         else:
-            ax.set_xlabel(self.seq1)
-            ax.set_ylabel(self.seq2)
+            output, trace = self.fill_matrix()
 
-        plt.scatter(x, y, c = "black", s = 20 / (len( path[0] ) // 15 + 1))
+            path = next(TracebackMatrix(self.seq1, self.seq2, trace).iterPaths())
+            score = float(output[-1, -1])
 
-        fig.tight_layout()
-        plt.show()
+        self.cache_store("path", {"path": path, "score": float(score), "info": info, "origin": list(self.origin)})
 
-    def save_to_file(self, path):
+        return path, score, info, output
 
-        l = len( path[0] )
+    def cache_key(self, kind):
+        '''
+            cache_key method
 
-        score = 0
-        match = 0
-        gaps = 0
-        mismach = 0
+            Computes key of result in cache (see result_cache.cache_key):
+            sequences, substitution matrix and parameters which change the
+            result of given kind ("forward", "path" or "score").
 
-        for it in range(l):
-            
-            if path[0][it] != "-" and path[1][it] != "-":
-                
-                if path[0][it] !=  path[1][it]:
-                    score += self.mismatch_score
-                    mismach += 1
-                
-                else:
-                    score += self.match_score
-                    match += 1
+            Input:
+                kind: string - kind of result.
+
+            Output:
+                string: key
+        '''
+
+        if kind == "score":
+            settings = {"gap_score": self.gap_score, "xdrop": self.xdrop}
+
+        else:
+            # Matrix engines give the same result.
+            engine = "full" if self.engine in ("full", "tiled", "wavefront") else self.engine
+
+            settings = {"gap_score": self.gap_score, "gap_open": self.gap_open, "gap_extend": self.gap_extend,
+                        "engine": engine, "band": self.band, "auto_widen": self.auto_widen}
+
+            if kind == "forward":
+                settings.update(mode = self.mode, traceback = self.traceback, max_paths = self.max_paths, xdrop = self.xdrop)
+
+        return cache_key(kind, self.seq1[1:], self.seq2[1:], self.scoring, settings)
+
+    def cache_lookup(self, kind):
+        '''
+            cache_lookup method
+
+            Returns cached result of given kind (None if there is no cache
+            or result is not cached).
+        '''
+
+        if self.cache is None:
+            return None
+
+        return self.cache.get(self.cache_key(kind))
+
+    def cache_store(self, kind, value):
+        '''
+            cache_store method
+
+            Stores result of given kind in cache (if there is one).
+        '''
+
+        if self.cache is not None:
+            self.cache.put(self.cache_key(kind), value)
+
+    def fill_matrix(self):
+        '''
+            fill_matrix method
+
+            Fills score and traceback matrices. With tiled engine they are
+            memory-mapped files in workdir (temporary directory removed
+            together with the object if workdir was not given), wavefront
+            engine fills tiles in parallel.
 
+            Input:
+                None
+
+            Output:
+                2d vector: score matrix
+                2d vector: traceback matrix
+        '''
+
+        if self.engine == "wavefront":
+            return fill_wavefront(self.seq1, self.seq2, self.scoring, self.gap_score, self.workers, self.tile, self.backend)
+
+        if self.engine != "tiled":
+            return fill_score_matrix(self.seq1, self.seq2, self.scoring, self.gap_score, traceback = True)
+
+        directory = self.workdir
+
+        if directory is None:
+            self.tempdir = tempfile.TemporaryDirectory(prefix = "needleman_wunch_")
+            directory = self.tempdir.name
+
+        return fill_tiled(self.seq1, self.seq2, self.scoring, self.gap_score, directory, self.tile)
+
+    def build_graph(self, output, trace, progress = True):
+        '''
+            build_graph method
+
+            Builds BinaryGraph of paths from filled score and traceback matrices.
+            Cells more than xdrop below the best score of previous rows are
+            skipped (without xdrop cells not higher than min(i, j) * -3 are).
+
+            Input:
+                output: 2d vector - score matrix
+                trace: 2d vector - traceback matrix
+                progress: bool - show progress bar (tqdm)
+
+            Output:
+                BinaryGraph: graph of paths
+        '''
+
+        from tqdm import tqdm
+
+        columns = np.arange(1, len(self.seq1))
+
+        graph = BinaryGraph(self.seq1, self.seq2, retainGraph = self.print_graph)
+
+        best = output[0].max()
+
+        for i in tqdm(range(1, len(self.seq2)), disable = not progress):
+
+            _i = i - 1
+
+            bits = trace[i].tolist()
+
+            if self.xdrop is not None:
+                pruned = output[i, 1:] >= best - self.xdrop
+                best = max(best, output[i].max())
             else:
-                score += self.gap_score
-                gaps += 1
+                pruned = output[i, 1:] > np.minimum(i, columns) * -3
+
+            for j in (np.flatnonzero(pruned) + 1).tolist():
+
+                _j = j - 1
+
+                if (i == 1 or j == 1) and bits[j] & DIAGONAL:
+                    graph.addRoot(i, j)
+
+                elif bits[j] & DIAGONAL:
+                    graph.addNode(i, j, _i, _j, self.seq1[j], self.seq2[i])
+
+                if bits[j] & LEFT:
+                    graph.addNode(i, j, i, _j, self.seq1[j], "-")
+
+                if bits[j] & UP:
+                    graph.addNode(i, j, _i, j, "-", self.seq2[i])
+
+        return graph
+
+    def plot(self, matrix, path, origin = (0, 0)):
+        '''
+            plot methods
+
+            Method for ploting computed score matrix (see heatmap.render).
+            Large matrices are pooled to plot_size pixels, figure is saved
+            to plot_file if it was given, otherwise shown.
+
+            Input:
+                matrix: 2d vector - score matrix (None if matrix was not
+                    computed, then only the path is drawn)
+                path: list (2, n) - optimal path
+                origin: (int, int) - cell where the path starts (Sequence 1,
+                    Sequence 2), not (0, 0) for local alignment
+
+            Output:
+                None
+        '''
+
+        from heatmap import render
+
+        render(matrix, path, self.seq1, self.seq2, origin, self.plot_file, self.plot_size, self.pool)
+
+    def statistics(self, path):
+        '''
+            statistics method
+
+            Counts matches, mismatches and gaps of alignment and computes
+            its score (vectorized over aligned strings). With gotoh engine
+            the first position of every gap scores gap_open and next ones
+            gap_extend (also with local engine).
+
+            Input:
+                path: list (2, n) - alignment
+
+            Output:
+                dict: match, mismatch, gaps, score and length of alignment
+        '''
+
+        a = np.frombuffer(path[0].encode("ascii"), dtype = np.uint8)
+        b = np.frombuffer(path[1].encode("ascii"), dtype = np.uint8)
+
+        gap1 = a == GAP
+        gap2 = b == GAP
+        pair = ~(gap1 | gap2)
+
+        match = int(np.count_nonzero(pair & (a == b)))
+        gaps = len(a) - int(np.count_nonzero(pair))
+
+        score = int(self.scoring.matrix[self.scoring.lookup[a[pair]], self.scoring.lookup[b[pair]]].sum())
+
+        if self.engine in ("gotoh", "local"):
+            # Gap position preceded by a gap in the same sequence extends it.
+            extended = np.zeros(len(a), dtype = bool)
+            extended[1:] = (gap1[1:] & gap1[:-1]) | (gap2[1:] & gap2[:-1])
+
+            extensions = int(np.count_nonzero(extended))
+
+            score += extensions * self.gap_extend + (gaps - extensions) * self.gap_open
+
+        else:
+            score += gaps * self.gap_score
+
+        return {"match": match, "mismatch": int(np.count_nonzero(pair)) - match, "gaps": gaps, "score": score, "length": len(a)}
+
+    def save_to_file(self, path, info = None):
+        '''
+            save_to_file method
+
+            Saves alignment statistics to out.txt, or streams them as one
+            record to output (see ResultWriter) if output was given.
+
+            Input:
+                path: list (2, n) - optimal path
+                info: dict - additional report lines (name: value)
+
+            Output:
+                None
+        '''
+
+        stats = self.statistics(path)
+
+        if self.output is not None:
+            self.write_record(AlignmentResult(stats["score"], path, stats, info, self.origin).to_record(self.name1, self.name2))
+
+            return
+
+        l = stats["length"]
+        match = stats["match"]
+        gaps = stats["gaps"]
+
+        lines = ["Sequence 1:" + self.seq1, "Sequence 2:" + self.seq2, "Match: " + str(match),
+                 "Mismatch: " + str(stats["mismatch"]), "Gap: " + str(gaps),
+                 "Score: " + str(stats["score"]), "Length: " + str(l),
+                 "Identity: " + str(match) + "/" + str(l) + " (" + str(match * 100 // max(l, 1)) + "%)",
+                 "Gaps: " + str(gaps) + "/" + str(l) + " (" + str(gaps * 100 // max(l, 1)) + "%)"]
+
+        if info is not None:
+            lines += [ name + ": " + value for name, value in info.items() ]
+
+        with open("out.txt", "w") as f:
+            f.write("\n".join(lines))
+
+    def write_record(self, record):
+        '''
+            write_record method
+
+            Appends record to output in selected format.
+
+            Input:
+                record: dict - result record (see AlignmentResult.to_record)
+
+            Output:
+                None
+        '''
+
+        with ResultWriter(self.output, self.format) as writer:
+            writer.write(record)
+
+
+def align(seq1, seq2, scoring = None, mode = "top_score", gap_score = -2, **kwargs):
+    '''
+        align
+
+        Aligns pair of sequences (see NeedlemanWunch.align). Nothing is
+        printed, plotted or saved.
+
+        Input:
+            seq1: string - Sequence 1.
+            seq2: string - Sequence 2.
+            scoring: Scoring, string (substitution matrix name or path, see
+                load_matrix) or (int, int) - match and mismatch scores
+                (None - match 1, mismatch -1).
+            mode: string - Mode for path finding (see BinaryGraph.findPaths).
+            gap_score: int - score for gap.
+            **kwargs: other NeedlemanWunch arguments (engine, traceback,
+                gap_open, ...) and keep_matrix, paths (see
+                NeedlemanWunch.align).
+
+        Output:
+            AlignmentResult: result of alignment
+    '''
+
+    if scoring is None:
+        scoring = match_mismatch(1, -1)
+    elif isinstance(scoring, str):
+        scoring = load_matrix(scoring)
+    elif isinstance(scoring, tuple):
+        scoring = match_mismatch(*scoring)
 
-        s = "Sequence 1:" + self.seq1 + "\nSequence 2:" + self.seq2 + "\nMatch: " + str(match)
-        s += "\nMismatch: " + str(mismach) + "\nGap: " + str(gaps)
-        s += "\nScore: " + str(score) + "\nLength: " + str(l)
-        s += "\nIdentity: " + str(match) + "/" + str(l) + " (" + str(match * 100 // l) + "%)"
-        s += "\nGaps: " + str(gaps) + "/" + str(l) + " (" + str(gaps * 100 // l) + "%)"
+    keep_matrix = kwargs.pop('keep_matrix', False)
+    paths = kwargs.pop('paths', False)
 
-        f = open("out.txt", "w")
-        f.write(s)
-        f.close()
+    aligner = NeedlemanWunch(sequence1 = seq1, sequence2 = seq2, match_score = None, mismatch_score = None, gap_score = gap_score,
+                             mode = mode, print_graph = False, scoring = scoring, **kwargs)
 
+    return aligner.align(keep_matrix, paths)
@@ -0,0 +1,271 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import sys
+import json
+import time
+import contextlib
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+class Profiler():
+    '''
+        Profiler class
+
+        Records wall time and memory high-water mark (tracemalloc peak and
+        process peak RSS) of named phases of a run, plus counters (cells,
+        nodes, paths, ...). Hooks are called with every finished phase, so
+        metrics can be forwarded to monitoring while the run is going on.
+        Optionally whole run is profiled with cProfile.
+    '''
+
+    enabled = True
+
+    def __init__(self, memory = True, cprofile = None):
+        '''
+            Constructor of Profiler class
+
+            Input:
+                memory: bool - trace memory of phases (tracemalloc slows
+                    down allocation heavy code).
+                cprofile: string - path of cProfile dump (None - no dump).
+
+            Output:
+                Profiler: Constructed object of class Profiler
+        '''
+
+        self.memory = memory
+        self.cprofile = cprofile
+
+        self.phases = []
+        self.counters = {}
+        self.hooks = []
+
+        self.profile = None
+        self.started = None
+        self.finished = None
+
+    def start(self):
+        '''
+            start method
+
+            Starts run (memory tracing and cProfile).
+
+            Input:
+                None
+
+            Output:
+                None
+        '''
+
+        self.started = time.perf_counter()
+
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        if self.cprofile is not None:
+            import cProfile
+
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def stop(self):
+        '''
+            stop method
+
+            Stops run and writes cProfile dump.
+
+            Input:
+                None
+
+            Output:
+                None
+        '''
+
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(self.cprofile)
+            self.profile = None
+
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+        self.finished = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        '''
+            phase method
+
+            Context manager recording time and memory of a phase.
+
+            Input:
+                name: string - phase name.
+
+            Output:
+                None
+        '''
+
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        else:
+            current = None
+
+        start = time.perf_counter()
+
+        try:
+            yield
+
+        finally:
+            record = {"name": name, "time": time.perf_counter() - start}
+
+            if current is not None:
+                after, peak = tracemalloc.get_traced_memory()
+
+                record["memory_peak"] = peak
+                record["memory_delta"] = after - current
+
+            if resource is not None:
+                record["rss_peak_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            self.phases.append(record)
+
+            for hook in self.hooks:
+                hook(record)
+
+    def count(self, name, value = 1):
+        '''
+            count method
+
+            Adds value to named counter.
+
+            Input:
+                name: string - counter name.
+                value: int - value to add.
+
+            Output:
+                None
+        '''
+
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_hook(self, hook):
+        '''
+            add_hook method
+
+            Registers function called with record (dict: name, time,
+            memory_peak, memory_delta, rss_peak_kb) of every finished phase.
+
+            Input:
+                hook: function - callback.
+
+            Output:
+                None
+        '''
+
+        self.hooks.append(hook)
+
+    def report(self):
+        '''
+            report method
+
+            Returns collected metrics.
+
+            Output:
+                dict: phases, counters and total time
+        '''
+
+        total = None
+
+        if self.started is not None:
+            total = (self.finished or time.perf_counter()) - self.started
+
+        return {"total_time": total, "phases": self.phases, "counters": self.counters}
+
+    def save(self, directory):
+        '''
+            save method
+
+            Saves metrics as JSON.
+
+            Input:
+                directory: string - path to .json file.
+
+            Output:
+                None
+        '''
+
+        with open(directory, "w") as file_handle:
+            json.dump(self.report(), file_handle, indent = 1)
+
+    def print_report(self, file = sys.stdout):
+        '''
+            print_report method
+
+            Prints phases and counters table.
+
+            Input:
+                file: file - output stream.
+
+            Output:
+                None
+        '''
+
+        report = self.report()
+
+        print("Profile", file = file)
+
+        for record in report["phases"]:
+            line = "  %-12s %10.4f s" % (record["name"], record["time"])
+
+            if "memory_peak" in record:
+                line += "  peak %10.1f kB" % (record["memory_peak"] / 1024)
+
+            if "rss_peak_kb" in record:
+                line += "  rss %10.1f MB" % (record["rss_peak_kb"] / 1024)
+
+            print(line, file = file)
+
+        if report["total_time"] is not None:
+            print("  %-12s %10.4f s" % ("total", report["total_time"]), file = file)
+
+        for name, value in report["counters"].items():
+            print("  %-12s %10d" % (name, value), file = file)
+
+class NullProfiler():
+    '''
+        NullProfiler class
+
+        Disabled profiler. Methods do nothing and phase returns shared
+        empty context manager, so instrumented code runs at full speed.
+    '''
+
+    enabled = False
+
+    phases = []
+    counters = {}
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def phase(self, name):
+        return NULL_PHASE
+
+    def count(self, name, value = 1):
+        pass
+
+    def add_hook(self, hook):
+        pass
+
+    def report(self):
+        return {"total_time": None, "phases": [], "counters": {}}
+
+NULL_PHASE = contextlib.nullcontext()
+NULL_PROFILER = NullProfiler()
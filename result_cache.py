@@ -0,0 +1,240 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import collections
+
+class ResultCache():
+    '''
+        ResultCache class
+
+        Cache of alignment results keyed by hash of sequences and scoring
+        parameters (see cache_key). Recently used results are kept in
+        memory (LRU of memory_items entries), all of them in sqlite database
+        limited to disk_limit bytes; least recently used entries are evicted
+        first. Values are JSON serializable dictionaries.
+    '''
+
+    def __init__(self, directory = None, memory_items = 1024, disk_limit = 256 * 2 ** 20):
+        '''
+            Constructor of ResultCache class
+
+            Input:
+                directory: string - cache directory (None - memory only).
+                memory_items: int - number of entries kept in memory.
+                disk_limit: int - size limit of database entries (bytes).
+
+            Output:
+                ResultCache: Constructed object of class ResultCache
+        '''
+
+        self.memory_items = memory_items
+        self.disk_limit = disk_limit
+
+        self.memory = collections.OrderedDict()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self.database = None
+        self.disk_size = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok = True)
+
+            self.database = sqlite3.connect(os.path.join(directory, "cache.sqlite"), timeout = 30)
+            self.database.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, size INTEGER, used REAL)")
+            self.database.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+            self.database.commit()
+
+            self.disk_size = self.database.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get(self, key):
+        '''
+            get method
+
+            Returns cached value (None if key is not cached).
+
+            Input:
+                key: string - key (see cache_key).
+
+            Output:
+                dict: cached value or None
+        '''
+
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.counters["memory_hits"] += 1
+
+            return self.memory[key]
+
+        if self.database is not None:
+            row = self.database.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+
+            if row is not None:
+                self.database.execute("UPDATE entries SET used = ? WHERE key = ?", (time.time(), key))
+                self.database.commit()
+
+                value = json.loads(row[0])
+
+                self.remember(key, value)
+                self.counters["disk_hits"] += 1
+
+                return value
+
+        self.counters["misses"] += 1
+
+        return None
+
+    def put(self, key, value):
+        '''
+            put method
+
+            Stores value in memory and on disk, evicting least recently used
+            entries over the limits.
+
+            Input:
+                key: string - key (see cache_key).
+                value: dict - JSON serializable value.
+
+            Output:
+                None
+        '''
+
+        self.remember(key, value)
+
+        if self.database is None:
+            return
+
+        text = json.dumps(value)
+        size = len(key) + len(text)
+
+        if size > self.disk_limit:
+            return
+
+        self.database.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, text, size, time.time()))
+        self.database.commit()
+
+        self.disk_size += size
+
+        if self.disk_size > self.disk_limit:
+            self.evict()
+
+    def remember(self, key, value):
+        '''
+            remember method
+
+            Stores value in memory LRU layer.
+        '''
+
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last = False)
+
+    def evict(self):
+        '''
+            evict method
+
+            Deletes least recently used database entries until they take at
+            most 90% of disk_limit (size is recounted first, database can be
+            shared by several processes).
+        '''
+
+        self.disk_size = self.database.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+        while self.disk_size > self.disk_limit * 0.9:
+            rows = self.database.execute("SELECT key, size FROM entries ORDER BY used LIMIT 64").fetchall()
+
+            if len(rows) == 0:
+                break
+
+            self.database.executemany("DELETE FROM entries WHERE key = ?", [ (key,) for key, size in rows ])
+
+            self.disk_size -= sum(size for key, size in rows)
+            self.counters["evictions"] += len(rows)
+
+        self.database.commit()
+
+    def stats(self):
+        '''
+            stats method
+
+            Returns hit/miss statistics.
+
+            Output:
+                dict: memory_hits, disk_hits, misses, evictions, hit_rate,
+                    memory_entries, disk_entries and disk_size (bytes)
+        '''
+
+        result = dict(self.counters)
+
+        lookups = result["memory_hits"] + result["disk_hits"] + result["misses"]
+
+        result["hit_rate"] = (result["memory_hits"] + result["disk_hits"]) / lookups if lookups else 0.0
+        result["memory_entries"] = len(self.memory)
+        result["disk_entries"] = 0
+        result["disk_size"] = 0
+
+        if self.database is not None:
+            result["disk_entries"], result["disk_size"] = self.database.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+
+        return result
+
+    def take_counters(self):
+        '''
+            take_counters method
+
+            Returns counters collected since the last call and resets them
+            (used to sum statistics of worker processes).
+        '''
+
+        counters = self.counters
+        self.counters = dict.fromkeys(counters, 0)
+
+        return counters
+
+    def close(self):
+        '''
+            close method
+
+            Closes database.
+        '''
+
+        if self.database is not None:
+            self.database.close()
+            self.database = None
+
+
+def cache_key(kind, seq1, seq2, scoring, settings):
+    '''
+        cache_key
+
+        Computes cache key: SHA-256 of normalized (upper case) sequences,
+        substitution matrix and other parameters which change the result.
+
+        Input:
+            kind: string - kind of result (e.g. "path", "score").
+            seq1: string - Sequence 1 (without padding).
+            seq2: string - Sequence 2 (without padding).
+            scoring: Scoring - substitution scores.
+            settings: dict - other parameters (JSON serializable).
+
+        Output:
+            string: key (hex digest)
+    '''
+
+    digest = hashlib.sha256()
+
+    digest.update(json.dumps([kind, seq1.upper(), seq2.upper(), scoring.alphabet, settings], sort_keys = True).encode("utf-8"))
+    digest.update(scoring.matrix.tobytes())
+
+    return digest.hexdigest()
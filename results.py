@@ -0,0 +1,305 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import os
+import sys
+import json
+import time
+
+import numpy as np
+
+FORMATS = ["jsonl", "tsv", "sam"]
+
+# Columns of TSV output.
+COLUMNS = ["record1", "record2", "score", "match", "mismatch", "gaps", "length", "identity"]
+
+# CIGAR operations: alignment (=, X), gap in Sequence 1 (I), gap in Sequence 2 (D).
+CIGAR_MATCH = ord("=")
+CIGAR_MISMATCH = ord("X")
+CIGAR_INSERTION = ord("I")
+CIGAR_DELETION = ord("D")
+
+class ResultWriter():
+    '''
+        ResultWriter class
+
+        Streams one record per alignment to file (appended) or to standard
+        output, as JSON Lines, TSV or SAM-like lines (Sequence 1 is the
+        reference, Sequence 2 the read). Output is buffered and flushed every
+        `flush_every` records or `flush_interval` seconds.
+    '''
+
+    def __init__(self, directory = "-", format = "jsonl", append = True, flush_every = 100, flush_interval = 1.0, columns = COLUMNS):
+        '''
+            Constructor of ResultWriter class
+
+            Input:
+                directory: string - path to output file or "-" (standard output).
+                format: string - one of FORMATS.
+                append: bool - append to existing file (otherwise it is
+                    overwritten).
+                flush_every: int - flush after this many records.
+                flush_interval: float - flush if last flush was earlier (seconds).
+                columns: list of string - columns of TSV output.
+
+            Output:
+                ResultWriter: Constructed object of class ResultWriter
+        '''
+
+        if format not in FORMATS:
+            raise ValueError("Unknown result format: " + format)
+
+        self.directory = directory
+        self.format = format
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.columns = columns
+
+        if directory == "-":
+            self.file_handle = sys.stdout
+            new = True
+        else:
+            new = not append or not os.path.isfile(directory) or os.path.getsize(directory) == 0
+            self.file_handle = open(directory, "a" if append else "w", buffering = 1 << 16)
+
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self.written = 0
+
+        if new:
+            self.write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write_header(self):
+        '''
+            write_header method
+
+            Writes header of new output (TSV columns, SAM @HD line).
+        '''
+
+        if self.format == "tsv":
+            self.file_handle.write("\t".join(self.columns) + "\n")
+
+        elif self.format == "sam":
+            self.file_handle.write("@HD\tVN:1.6\n")
+
+    def write(self, record):
+        '''
+            write method
+
+            Writes one record.
+
+            Input:
+                record: dict - result record (see make_record).
+
+            Output:
+                None
+        '''
+
+        if self.format == "jsonl":
+            line = json.dumps(record)
+
+        elif self.format == "tsv":
+            line = "\t".join(str(record.get(column, "")) for column in self.columns)
+
+        else:
+            line = sam_line(record)
+
+        self.file_handle.write(line + "\n")
+
+        self.written += 1
+        self.pending += 1
+
+        if self.pending >= self.flush_every or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        '''
+            flush method
+
+            Flushes buffered records.
+        '''
+
+        self.file_handle.flush()
+
+        self.pending = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        '''
+            close method
+
+            Flushes and closes output (standard output is not closed).
+        '''
+
+        self.flush()
+
+        if self.file_handle is not sys.stdout:
+            self.file_handle.close()
+
+
+class AlignmentResult():
+    '''
+        AlignmentResult class
+
+        Result of one alignment (see NeedlemanWunch.align): score, aligned
+        sequences, their statistics and optionally score matrix and all
+        reported paths. It holds no files or windows, printing, plotting
+        and saving is left to the caller.
+    '''
+
+    __slots__ = ("score", "alignment1", "alignment2", "stats", "info", "origin", "matrix", "paths", "path_count", "graph")
+
+    def __init__(self, score, path = None, stats = None, info = None, origin = (0, 0), matrix = None, paths = None, path_count = None, graph = None):
+        '''
+            Constructor of AlignmentResult class
+
+            Input:
+                score: float - alignment score (None if pair was abandoned by X-drop).
+                path: list (2) of string - aligned sequences (None in score-only mode).
+                stats: dict - alignment statistics (see NeedlemanWunch.statistics).
+                info: dict - additional report lines (name: value).
+                origin: (int, int) - start of alignment in Sequence 1 and Sequence 2.
+                matrix: 2d vector - score matrix (if it was kept).
+                paths: list of [string, string, float] - all reported paths and scores.
+                path_count: int - number of optimal paths (matrix engines).
+                graph: BinaryGraph or TracebackMatrix - traceback structure (if it was kept).
+
+            Output:
+                AlignmentResult: Constructed object of class AlignmentResult
+        '''
+
+        self.score = score
+        self.alignment1, self.alignment2 = path if path is not None else (None, None)
+        self.stats = stats
+        self.info = info if info is not None else {}
+        self.origin = tuple(origin)
+        self.matrix = matrix
+        self.paths = paths if paths is not None else ([ [path[0], path[1], score] ] if path is not None else [])
+        self.path_count = path_count
+        self.graph = graph
+
+    @property
+    def path(self):
+        '''
+            Aligned sequences as list (2) of string (None in score-only mode).
+        '''
+
+        if self.alignment1 is None:
+            return None
+
+        return [self.alignment1, self.alignment2]
+
+    def to_record(self, record1 = "sequence1", record2 = "sequence2"):
+        '''
+            to_record method
+
+            Builds result record (see make_record).
+
+            Input:
+                record1: string - name of Sequence 1.
+                record2: string - name of Sequence 2.
+
+            Output:
+                dict: record
+        '''
+
+        return make_record(record1, record2, self.score, self.stats, self.path, self.origin, self.info)
+
+    def __repr__(self):
+        return "AlignmentResult(score = " + repr(self.score) + ", path = " + repr(self.path) + ")"
+
+
+def make_record(record1, record2, score, stats = None, path = None, origin = (0, 0), info = None):
+    '''
+        make_record
+
+        Builds result record.
+
+        Input:
+            record1: string - name of Sequence 1.
+            record2: string - name of Sequence 2.
+            score: float - alignment score (None if not computed).
+            stats: dict - alignment statistics (see NeedlemanWunch.statistics).
+            path: list (2) of string - aligned sequences (None in score-only mode).
+            origin: (int, int) - start of alignment in Sequence 1 and Sequence 2.
+            info: dict - additional report lines (name: value).
+
+        Output:
+            dict: record
+    '''
+
+    record = {"record1": record1, "record2": record2, "score": score if score is not None else "NA"}
+
+    if stats is not None:
+        record.update(match = stats["match"], mismatch = stats["mismatch"], gaps = stats["gaps"], length = stats["length"],
+                      identity = round(stats["match"] / max(stats["length"], 1), 4))
+    else:
+        record.update(match = "NA", mismatch = "NA", gaps = "NA", length = "NA", identity = "NA")
+
+    if path is not None:
+        record.update(start1 = origin[0], start2 = origin[1], alignment1 = path[0], alignment2 = path[1])
+
+    if info:
+        record.update( (name.lower(), value) for name, value in info.items() )
+
+    return record
+
+
+def cigar(alignment1, alignment2):
+    '''
+        cigar
+
+        Builds extended CIGAR string of alignment (=, X, I, D operations).
+
+        Input:
+            alignment1: string - aligned Sequence 1 (reference).
+            alignment2: string - aligned Sequence 2 (read).
+
+        Output:
+            string: CIGAR ("*" for empty alignment)
+    '''
+
+    a = np.frombuffer(alignment1.encode("ascii"), dtype = np.uint8)
+    b = np.frombuffer(alignment2.encode("ascii"), dtype = np.uint8)
+
+    if len(a) == 0:
+        return "*"
+
+    operations = np.where(a == b, CIGAR_MATCH, CIGAR_MISMATCH).astype(np.uint8)
+    operations[a == ord("-")] = CIGAR_INSERTION
+    operations[b == ord("-")] = CIGAR_DELETION
+
+    starts = np.flatnonzero(np.concatenate(([True], operations[1:] != operations[:-1])))
+    lengths = np.diff(np.append(starts, len(operations)))
+
+    return "".join(str(length) + chr(operation) for length, operation in zip(lengths.tolist(), operations[starts].tolist()))
+
+
+def sam_line(record):
+    '''
+        sam_line
+
+        Formats record as SAM-like line: read (Sequence 2) aligned to
+        reference (Sequence 1) at 1-based position, alignment score in AS
+        tag, edit distance in NM tag and 1-based start of aligned part of
+        the read in qs tag (no soft clipping).
+    '''
+
+    if record.get("alignment1") is None:
+        return "\t".join([str(record["record2"]), "4", "*", "0", "0", "*", "*", "0", "0", "*", "*"])
+
+    sequence = record["alignment2"].replace("-", "") or "*"
+    distance = record["mismatch"] + record["gaps"]
+    score = record["score"]
+
+    if isinstance(score, float) and score.is_integer():
+        score = int(score)
+
+    return "\t".join([str(record["record2"]), "0", str(record["record1"]), str(record["start1"] + 1), "255",
+                      cigar(record["alignment1"], record["alignment2"]), "*", "0", "0", sequence, "*",
+                      "AS:i:" + str(score), "NM:i:" + str(distance), "qs:i:" + str(record["start2"] + 1)])
@@ -0,0 +1,190 @@
+import os
+import time
+
+import click
+
+from needleman_wunch import NeedlemanWunch
+from main import validate_score, prepare_sequence
+from batch import read_records, run
+from results import ResultWriter
+from kmer_index import open_index, MAX_K
+
+
+def read_queries(query):
+    '''
+        read_queries
+
+        Reads queries from multi-record .fasta file, or a single query given
+        as sequence or NCBI id (see prepare_sequence).
+
+        input:
+            query: string - path to .fasta file, sequence or NCBI id.
+
+        output:
+            list of (string, string): (name, sequence) pairs
+    '''
+
+    if os.path.isfile(query):
+        return read_records(query)
+
+    return [ ("query", prepare_sequence(query)) ]
+
+
+def top_records(scores, top):
+    '''
+        top_records
+
+        Returns indices of records with `top` best scores (records tied with
+        the last one are included).
+
+        input:
+            scores: list of float - scores of records.
+            top: int - number of records.
+
+        output:
+            set of int: record indices
+    '''
+
+    if len(scores) == 0:
+        return set()
+
+    threshold = sorted(scores, reverse = True)[min(top, len(scores)) - 1]
+
+    return { it for it, score in enumerate(scores) if score >= threshold }
+
+
+def exhaustive_recall(queries, records, candidates, options, top):
+    '''
+        exhaustive_recall
+
+        Scores every query against every record with the engine of the
+        search and computes fraction of `top` best records of every query
+        which passed the prefilter. Linear gap engines are scored in linear
+        memory (score only), affine ones (gotoh, local) align the pair.
+
+        input:
+            queries: list of (string, string) - queries.
+            records: list of (string, string) - database records.
+            candidates: list of set of int - candidate records of every query.
+            options: dict - NeedlemanWunch arguments.
+            top: int - number of best records checked.
+
+        output:
+            int: number of best records found by prefilter
+            int: number of best records
+    '''
+
+    found = 0
+    total = 0
+
+    settings = dict(options, score_only = options["engine"] not in ("gotoh", "local"), xdrop = None)
+
+    for (name, sequence), passed in zip(queries, candidates):
+        scores = []
+
+        for record, database in records:
+            aligner = NeedlemanWunch(sequence1 = sequence, sequence2 = database, **settings)
+            scores.append(aligner.align().score)
+
+        best = top_records(scores, top)
+
+        found += len(best & passed)
+        total += len(best)
+
+    return found, total
+
+
+@click.command()
+
+@click.option('--query', '--q', required = True, help = 'Query: .fasta file (every record is a query), sequence or NCBI id.')
+@click.option('--database', '--db', required = True, type = click.Path(exists = True, dir_okay = False), help = 'Database .fasta file.')
+
+@click.option('--match_score', '--ms',     required = True, help = 'Match score',    type = int, callback = validate_score)
+@click.option('--mismatch_score', '--mms', required = True, help = 'Mismatch score', type = int, callback = validate_score)
+@click.option('--gap_score', '--gs',       required = True, help = 'Gap score',      type = int, callback = validate_score)
+
+@click.option('--matrix', '--mx',         default = None, help = 'Substitution matrix name (e.g. BLOSUM62, PAM250) or path to matrix file. Replaces match/mismatch scores.')
+@click.option('--gap_open', '--go',       default = None, help = 'Gap opening score (gotoh and local engines, default: gap score)',   type = int)
+@click.option('--gap_extend', '--ge',     default = None, help = 'Gap extension score (gotoh and local engines, default: gap score)', type = int)
+
+@click.option('--engine', '--e', default = "full", show_default = True, type = click.Choice(['full', 'hirschberg', 'banded', 'gotoh', 'local'], case_sensitive=False), help = 'Alignment engine of candidates.')
+@click.option('--band', '--b', default = 32, show_default = True, type = click.IntRange(min = 0), help = 'Band width (K) of banded engine.')
+
+@click.option('--k', default = 11, show_default = True, type = click.IntRange(1, MAX_K), help = 'k-mer length (e.g. 11 for DNA, 3-5 for proteins).')
+@click.option('--min_hits', '--mh', default = 2, show_default = True, type = click.IntRange(min = 1), help = 'Shared k-mers on one diagonal required to align a record.')
+@click.option('--diagonal_width', '--dw', default = 16, show_default = True, type = click.IntRange(min = 1), help = 'Width of diagonal bin (tolerated indels).')
+@click.option('--max_occurrences', '--mo', default = 1000, show_default = True, type = click.IntRange(min = 1), help = 'Ignore k-mers occurring more often in database (repeats).')
+
+@click.option('--recall', '--rc', is_flag = True, help = 'Also score all pairs (exhaustive search) and report recall of prefilter.')
+@click.option('--top', '--t', default = 10, show_default = True, type = click.IntRange(min = 1), help = 'Number of best records per query checked by --recall.')
+
+@click.option('--workers', '--w', default = os.cpu_count(), show_default = True, type = click.IntRange(min = 1), help = 'Number of worker processes.')
+@click.option('--chunk_size', '--cs', default = 16, show_default = True, type = click.IntRange(min = 1), help = 'Pairs sent to worker at once.')
+@click.option('--output', '--o', default = "search_out.tsv", show_default = True, type = click.Path(dir_okay = False), help = 'Output file ("-" for standard output).')
+@click.option('--format', '--f', default = "tsv", show_default = True, type = click.Choice(['jsonl', 'tsv', 'sam'], case_sensitive=False), help = 'Output format.')
+
+def search(query, database, k, min_hits, diagonal_width, max_occurrences, recall, top, workers, chunk_size, output, format, **kwargs):
+
+    '''
+        Query vs database search
+
+        Finds database records sharing k-mers with the query on nearby
+        diagonals (k-mer index is built once and stored next to the database
+        as <database>.k<k>.kmers) and aligns only those candidates.
+
+        Examples:
+
+         \b
+         python search.py --q=query.fasta --db=database.fasta --ms=1 --mms=-1 --gs=-2
+
+         \b
+         # Check how many of 10 best records (exhaustive search) are found
+         python search.py --q=query.fasta --db=database.fasta --ms=1 --mms=-1 --gs=-2 --rc --t=10
+    '''
+
+    gap_open = kwargs['gap_open'] if kwargs['gap_open'] is not None else kwargs['gap_score']
+    gap_extend = kwargs['gap_extend'] if kwargs['gap_extend'] is not None else kwargs['gap_score']
+
+    if kwargs['engine'] in ("gotoh", "local") and gap_open > gap_extend:
+        raise click.BadParameter("Gap opening score can not be higher than gap extension score.", param_hint = "'--gap_open'")
+
+    if kwargs['engine'] == "local" and (gap_open >= 0 or gap_extend > 0):
+        raise click.BadParameter("Gap scores of local alignment must be negative.", param_hint = "'--gap_open'")
+
+    queries = read_queries(query)
+    records = read_records(database)
+
+    start = time.perf_counter()
+
+    index = open_index(database, k, records)
+
+    pairs = []
+    candidates = []
+
+    for name, sequence in queries:
+        found = index.candidates(sequence, min_hits, diagonal_width, max_occurrences)
+
+        candidates.append({ record for record, hits in found })
+        pairs += [ ((name, sequence), records[record]) for record, hits in found ]
+
+    prefilter = time.perf_counter() - start
+
+    options = dict(kwargs, mode = "top_score", print_graph = False)
+
+    with ResultWriter(output, format, append = False) as writer:
+        done = run(pairs, options, writer, workers, chunk_size)
+
+    total = len(queries) * len(records)
+
+    print("Prefilter:", "%.3f s" % prefilter)
+    print("Aligned", done, "of", total, "pairs (%.1f%%)." % (100 * done / max(total, 1)), "Results saved to", output)
+
+    if recall:
+        found, best = exhaustive_recall(queries, records, candidates, options, top)
+
+        print("Recall@" + str(top) + ":", "%.3f" % (found / max(best, 1)), "(" + str(found) + "/" + str(best) + ")")
+
+
+if __name__ == "__main__":
+
+    search()
@@ -0,0 +1,566 @@
+import os
+import json
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import click
+
+from main import validate_score
+from batch import align_chunk
+from substitution import load_matrix, match_mismatch
+
+# Options which can be changed by a request.
+REQUEST_OPTIONS = ["match_score", "mismatch_score", "gap_score", "matrix", "gap_open", "gap_extend",
+                   "engine", "band", "auto_widen", "score_only", "xdrop"]
+
+ENGINES = ["full", "hirschberg", "banded", "gotoh", "local"]
+
+# Substitution matrices a request can select by default (see --matrices).
+MATRICES = ["BLOSUM45", "BLOSUM50", "BLOSUM62", "BLOSUM80", "BLOSUM90", "PAM30", "PAM70", "PAM250"]
+
+STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+          500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def validate_options(options):
+    '''
+        validate_options
+
+        Checks alignment options (see main.py and batch.py).
+
+        input:
+            options: dict - NeedlemanWunch arguments.
+
+        output:
+            None, ValueError is raised for invalid options
+    '''
+
+    for name in ("match_score", "mismatch_score", "gap_score"):
+        if not isinstance(options[name], int):
+            raise ValueError(name + " has to be an integer.")
+
+    if options["engine"] not in ENGINES:
+        raise ValueError("Unknown engine: " + str(options["engine"]))
+
+    gap_open = options["gap_open"] if options["gap_open"] is not None else options["gap_score"]
+    gap_extend = options["gap_extend"] if options["gap_extend"] is not None else options["gap_score"]
+
+    if options["engine"] in ("gotoh", "local") and gap_open > gap_extend:
+        raise ValueError("Gap opening score can not be higher than gap extension score.")
+
+    if options["engine"] == "local" and (gap_open >= 0 or gap_extend > 0):
+        raise ValueError("Gap scores of local alignment must be negative.")
+
+
+def warm_up(options):
+    '''
+        warm_up
+
+        Initializer of worker process: imports the engine and aligns a short
+        pair, so the first request does not pay for it.
+    '''
+
+    align_chunk([(("warm_up", "ACGT"), ("warm_up", "AGT"))], dict(options, cache_dir = None))
+
+
+def align_pairs(chunk, options):
+    '''
+        align_pairs
+
+        Aligns batch of pairs in worker process (see batch.align_chunk).
+        Pairs of a batch come from different requests, so error of one pair
+        is returned in its place instead of failing the whole batch.
+
+        input:
+            chunk: list of ((string, string), (string, string)) - pairs of records.
+            options: dict - NeedlemanWunch arguments.
+
+        output:
+            list of (dict, string): result record or error message of every pair
+            dict: cache counters of the batch
+    '''
+
+    results = []
+    counters = {}
+
+    for pair in chunk:
+        try:
+            records, pair_counters = align_chunk([pair], options)
+
+        except Exception as error:
+            results.append( (None, str(error) or type(error).__name__) )
+            continue
+
+        results.append( (records[0], None) )
+
+        for name, value in pair_counters.items():
+            counters[name] = counters.get(name, 0) + value
+
+    return results, counters
+
+
+class AlignmentServer():
+    '''
+        AlignmentServer class
+
+        HTTP/JSON alignment server. Requests are parsed by asyncio front end,
+        their pairs are queued and collected into batches (up to batch_size
+        pairs or batch_delay seconds, pairs with the same options), which are
+        aligned on a warm process pool (align_pairs). At most
+        max_in_flight batches are aligned at once; when the queue is full
+        new requests are rejected with 503 (backpressure). Request bodies
+        larger than max_body and pairs with more than max_cells cells of
+        the score matrix are rejected with 413. When a worker dies, pairs
+        of its batch fail with 500 and the pool is started again.
+
+        API:
+            POST /align  {"pairs": [{"sequence1", "sequence2", "name1", "name2"}, ...],
+                          "options": {...}}  ->  {"results": [record, ...]}
+                         (single pair can be given as "sequence1", "sequence2")
+            GET /health  ->  {"status": "ok", "queue": n, "in_flight": n}
+            GET /stats   ->  request, pair, batch and cache counters
+    '''
+
+    def __init__(self, options, workers = None, batch_size = 64, batch_delay = 0.005, max_in_flight = None,
+                 queue_size = 10000, max_pairs = 1000, matrices = MATRICES, max_body = 16 * 2 ** 20, max_cells = 25 * 10 ** 6):
+        '''
+            Constructor of AlignmentServer class
+
+            Input:
+                options: dict - default NeedlemanWunch arguments.
+                workers: int - number of worker processes (default: number of CPUs).
+                batch_size: int - maximal number of pairs of a batch.
+                batch_delay: float - time a batch waits for more pairs (seconds).
+                max_in_flight: int - maximal number of batches aligned at once
+                    (default: 2 * workers).
+                queue_size: int - maximal number of queued pairs.
+                max_pairs: int - maximal number of pairs of a request.
+                matrices: list of string - substitution matrices (names or
+                    paths) a request can select, besides the default one.
+                max_body: int - maximal size of request body (bytes).
+                max_cells: int - maximal number of score matrix cells of a
+                    pair (product of sequence lengths).
+
+            Output:
+                AlignmentServer: Constructed object of class AlignmentServer
+        '''
+
+        self.options = options
+        self.workers = workers or os.cpu_count()
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.queue_size = queue_size
+        self.max_pairs = max_pairs
+        self.max_body = max_body
+        self.max_cells = max_cells
+
+        # Matrix of a request is looked up case-insensitively, so loaded
+        # matrices are limited to this list.
+        self.matrices = { str(matrix).upper(): matrix for matrix in matrices }
+
+        self.counters = {"requests": 0, "pairs": 0, "batches": 0, "rejected": 0, "errors": 0}
+        self.cache_counters = {}
+
+        self.in_flight = 0
+        self.started = time.time()
+
+        self.queue = None
+        self.slots = None
+        self.executor = None
+
+    async def serve(self, host = "127.0.0.1", port = 8765, socket = None):
+        '''
+            serve method
+
+            Starts worker pool and serves requests until cancelled.
+
+            Input:
+                host: string - address to listen on.
+                port: int - TCP port.
+                socket: string - path of Unix socket (used instead of TCP).
+
+            Output:
+                None
+        '''
+
+        self.queue = asyncio.Queue(maxsize = self.queue_size)
+        self.slots = asyncio.Semaphore(self.max_in_flight)
+
+        self.executor = self.start_pool()
+
+        loop = asyncio.get_running_loop()
+
+        # Start all workers now (warm pool).
+        await asyncio.gather(*[ loop.run_in_executor(self.executor, time.sleep, 0) for it in range(self.workers) ])
+
+        if socket is not None:
+            server = await asyncio.start_unix_server(self.handle, path = socket)
+            print("Listening on", socket)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            print("Listening on http://" + host + ":" + str(port))
+
+        batcher = asyncio.create_task(self.batcher())
+
+        try:
+            async with server:
+                await server.serve_forever()
+
+        finally:
+            batcher.cancel()
+            self.executor.shutdown(cancel_futures = True)
+
+    def start_pool(self):
+        '''
+            start_pool method
+
+            Starts worker pool (workers are warmed up by warm_up).
+
+            Output:
+                ProcessPoolExecutor: worker pool
+        '''
+
+        return ProcessPoolExecutor(max_workers = self.workers, initializer = warm_up, initargs = (self.options,))
+
+    async def handle(self, reader, writer):
+        '''
+            handle method
+
+            Serves HTTP/1.1 requests of one connection (keep-alive).
+        '''
+
+        try:
+            while True:
+                line = await reader.readline()
+
+                if not line:
+                    break
+
+                method, path, version = line.decode("latin-1").split()
+
+                headers = {}
+
+                while True:
+                    line = await reader.readline()
+
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+
+                    name, value = line.decode("latin-1").split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+
+                if length > self.max_body:
+                    # Body is not read, so the connection is closed after
+                    # the response.
+                    status, payload = 413, {"error": "Request body is larger than " + str(self.max_body) + " bytes."}
+                    headers["connection"] = "close"
+
+                else:
+                    body = await reader.readexactly(length)
+
+                    status, payload = await self.dispatch(method, path, body)
+
+                data = json.dumps(payload).encode("utf-8")
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+
+                response = "HTTP/1.1 " + str(status) + " " + STATUS[status] + "\r\nContent-Type: application/json\r\n" + \
+                           "Content-Length: " + str(len(data)) + "\r\n"
+
+                if status == 503:
+                    response += "Retry-After: 1\r\n"
+
+                if close:
+                    response += "Connection: close\r\n"
+
+                writer.write(response.encode("latin-1") + b"\r\n" + data)
+                await writer.drain()
+
+                if close:
+                    break
+
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, body):
+        '''
+            dispatch method
+
+            Handles one request.
+
+            Output:
+                int: HTTP status
+                dict: response
+        '''
+
+        if path == "/health":
+            return 200, {"status": "ok", "queue": self.queue.qsize(), "in_flight": self.in_flight}
+
+        if path == "/stats":
+            return 200, self.stats()
+
+        if path != "/align":
+            return 404, {"error": "Unknown path: " + path}
+
+        if method != "POST":
+            return 405, {"error": "Use POST."}
+
+        self.counters["requests"] += 1
+
+        try:
+            request = json.loads(body or b"{}")
+
+            pairs = request.get("pairs")
+
+            if pairs is None:
+                pairs = [request]
+
+            if len(pairs) > self.max_pairs:
+                return 413, {"error": "At most " + str(self.max_pairs) + " pairs per request."}
+
+            unknown = set(request.get("options", {})) - set(REQUEST_OPTIONS)
+
+            if unknown:
+                raise ValueError("Unknown options: " + ", ".join(sorted(unknown)))
+
+            options = dict(self.options, **request.get("options", {}))
+            validate_options(options)
+
+            options["matrix"] = self.matrix(options["matrix"])
+
+            chunk = [ ((pair.get("name1", "sequence1"), str(pair["sequence1"]).upper()),
+                       (pair.get("name2", "sequence2"), str(pair["sequence2"]).upper())) for pair in pairs ]
+
+            for (name1, seq1), (name2, seq2) in chunk:
+                if len(seq1) * len(seq2) > self.max_cells:
+                    return 413, {"error": "Pair " + str(name1) + ", " + str(name2) + " has more than " + str(self.max_cells) + " cells."}
+
+            # Invalid sequences are rejected here, before they share a
+            # batch with pairs of other requests.
+            scoring = load_matrix(options["matrix"]) if options["matrix"] is not None else \
+                      match_mismatch(options["match_score"], options["mismatch_score"])
+
+            for (name1, seq1), (name2, seq2) in chunk:
+                scoring.encode(seq1)
+                scoring.encode(seq2)
+
+        except (ValueError, KeyError, TypeError, AttributeError, ImportError, OSError) as error:
+            self.counters["errors"] += 1
+            return 400, {"error": str(error)}
+
+        if self.queue_size - self.queue.qsize() < len(chunk):
+            self.counters["rejected"] += 1
+            return 503, {"error": "Server is busy, retry later."}
+
+        loop = asyncio.get_running_loop()
+        key = json.dumps(options, sort_keys = True)
+
+        futures = []
+
+        for pair in chunk:
+            future = loop.create_future()
+            self.queue.put_nowait((key, options, pair, future))
+            futures.append(future)
+
+        self.counters["pairs"] += len(chunk)
+
+        results = await asyncio.gather(*futures, return_exceptions = True)
+
+        for result in results:
+            if isinstance(result, BrokenProcessPool):
+                self.counters["errors"] += 1
+                return 500, {"error": "Worker process terminated abruptly, retry later."}
+
+            if isinstance(result, Exception):
+                self.counters["errors"] += 1
+                return 400, {"error": str(result)}
+
+        return 200, {"results": results}
+
+    def matrix(self, name):
+        '''
+            matrix method
+
+            Checks substitution matrix of a request: it has to be the default
+            one or one of allowed matrices (paths sent by clients are never
+            opened).
+
+            Input:
+                name: string - matrix name or path (None - match/mismatch scores).
+
+            Output:
+                string: matrix as given to the server, ValueError is raised
+                    for other matrices
+        '''
+
+        if name is None or name == self.options["matrix"]:
+            return name
+
+        if not isinstance(name, str) or name.upper() not in self.matrices:
+            raise ValueError("Unknown substitution matrix: " + str(name) + " (allowed: " + ", ".join(self.matrices.values()) + ").")
+
+        return self.matrices[name.upper()]
+
+    async def batcher(self):
+        '''
+            batcher method
+
+            Collects queued pairs into batches and sends them to the pool.
+            Waits while max_in_flight batches are being aligned, so pairs
+            stay in the bounded queue.
+        '''
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            items = [await self.queue.get()]
+            deadline = loop.time() + self.batch_delay
+
+            while len(items) < self.batch_size:
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), max(deadline - loop.time(), 0)))
+                except asyncio.TimeoutError:
+                    break
+
+            groups = {}
+
+            for key, options, pair, future in items:
+                groups.setdefault(key, (options, []))[1].append((pair, future))
+
+            for options, group in groups.values():
+                await self.slots.acquire()
+
+                self.in_flight += 1
+                asyncio.create_task(self.align(options, group))
+
+    async def align(self, options, group):
+        '''
+            align method
+
+            Aligns one batch on the pool and resolves futures of its pairs.
+        '''
+
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+
+        try:
+            results, counters = await loop.run_in_executor(executor, align_pairs, [ pair for pair, future in group ], options)
+
+            for name, value in counters.items():
+                self.cache_counters[name] = self.cache_counters.get(name, 0) + value
+
+            for (pair, future), (record, error) in zip(group, results):
+                if future.done():
+                    continue
+
+                if error is not None:
+                    future.set_exception(ValueError(error))
+                else:
+                    future.set_result(record)
+
+        except Exception as error:
+            # Dead worker (e.g. killed for memory) breaks the whole pool,
+            # it is replaced once by the first batch which notices it.
+            if isinstance(error, BrokenProcessPool) and self.executor is executor:
+                self.executor = self.start_pool()
+                executor.shutdown(wait = False)
+
+            for pair, future in group:
+                if not future.done():
+                    future.set_exception(error)
+
+        finally:
+            self.counters["batches"] += 1
+            self.in_flight -= 1
+            self.slots.release()
+
+    def stats(self):
+        '''
+            stats method
+
+            Returns server counters.
+        '''
+
+        return dict(self.counters, queue = self.queue.qsize(), in_flight = self.in_flight, workers = self.workers,
+                    uptime = time.time() - self.started, cache = self.cache_counters)
+
+
+@click.command()
+
+@click.option('--host', '--h', default = "127.0.0.1", show_default = True, help = 'Address to listen on.')
+@click.option('--port', '--p', default = 8765, show_default = True, type = click.IntRange(1, 65535), help = 'TCP port.')
+@click.option('--socket', '--sk', default = None, type = click.Path(dir_okay = False), help = 'Listen on Unix socket instead of TCP port.')
+
+@click.option('--match_score', '--ms',     default = 1,  show_default = True, help = 'Default match score',    type = int, callback = validate_score)
+@click.option('--mismatch_score', '--mms', default = -1, show_default = True, help = 'Default mismatch score', type = int, callback = validate_score)
+@click.option('--gap_score', '--gs',       default = -2, show_default = True, help = 'Default gap score',      type = int, callback = validate_score)
+
+@click.option('--matrix', '--mx',         default = None, help = 'Default substitution matrix name (e.g. BLOSUM62, PAM250) or path to matrix file.')
+@click.option('--matrices', '--mxs',      default = ",".join(MATRICES), show_default = True, help = 'Comma separated substitution matrices (names or paths) a request can select.')
+@click.option('--gap_open', '--go',       default = None, help = 'Default gap opening score (gotoh and local engines)',   type = int)
+@click.option('--gap_extend', '--ge',     default = None, help = 'Default gap extension score (gotoh and local engines)', type = int)
+
+@click.option('--engine', '--e', default = "full", show_default = True, type = click.Choice(ENGINES, case_sensitive=False), help = 'Default alignment engine.')
+@click.option('--band', '--b', default = 32, show_default = True, type = click.IntRange(min = 0), help = 'Band width (K) of banded engine.')
+
+@click.option('--workers', '--w', default = os.cpu_count(), show_default = True, type = click.IntRange(min = 1), help = 'Number of worker processes.')
+@click.option('--batch_size', '--bs', default = 64, show_default = True, type = click.IntRange(min = 1), help = 'Maximal number of pairs sent to worker at once.')
+@click.option('--batch_delay', '--bd', default = 5, show_default = True, type = click.IntRange(min = 0), help = 'Time a batch waits for more pairs (ms).')
+@click.option('--max_in_flight', '--mf', default = None, type = click.IntRange(min = 1), help = 'Maximal number of batches aligned at once (default: 2 * workers).')
+@click.option('--queue_size', '--qs', default = 10000, show_default = True, type = click.IntRange(min = 1), help = 'Maximal number of queued pairs; further requests get 503.')
+@click.option('--max_pairs', '--mp', default = 1000, show_default = True, type = click.IntRange(min = 1), help = 'Maximal number of pairs of a request.')
+@click.option('--max_body', '--mb', default = 16, show_default = True, type = click.IntRange(min = 1), help = 'Maximal size of request body (MB); larger requests get 413.')
+@click.option('--max_cells', '--mc', default = 25 * 10 ** 6, show_default = True, type = click.IntRange(min = 1), help = 'Maximal number of score matrix cells (length1 * length2) of a pair; larger pairs get 413.')
+
+@click.option('--cache_dir', '--cd', default = None, type = click.Path(file_okay = False), help = 'Result cache directory.')
+@click.option('--cache_limit', '--cl', default = 256, show_default = True, type = click.IntRange(min = 1), help = 'Size limit of result cache (MB).')
+
+def server(host, port, socket, workers, batch_size, batch_delay, max_in_flight, queue_size, max_pairs, matrices, max_body, max_cells, **kwargs):
+
+    '''
+        Alignment server
+
+        Serves alignments over local HTTP/JSON API (or Unix socket) from a warm
+        process pool, so short alignments do not pay for interpreter startup.
+        Options given here are defaults, every request can override them.
+        See client.py for a Python client.
+
+        Examples:
+
+         \b
+         python server.py --w=8
+         curl -d '{"sequence1": "ACGT", "sequence2": "AGT"}' http://127.0.0.1:8765/align
+
+         \b
+         # Proteins, Unix socket
+         python server.py --mx=BLOSUM62 --e=gotoh --go=-11 --ge=-1 --sk=/tmp/align.sock
+    '''
+
+    options = dict(kwargs, mode = "top_score", print_graph = False, auto_widen = False, score_only = False, xdrop = None)
+
+    try:
+        validate_options(options)
+    except ValueError as error:
+        raise click.BadParameter(str(error))
+
+    matrices = [ matrix.strip() for matrix in matrices.split(",") if matrix.strip() ]
+
+    instance = AlignmentServer(options, workers, batch_size, batch_delay / 1000, max_in_flight, queue_size, max_pairs, matrices,
+                               max_body * 2 ** 20, max_cells)
+
+    try:
+        asyncio.run(instance.serve(host, port, socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+
+    server()
@@ -0,0 +1,158 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import numpy as np
+
+from gotoh import gotoh
+
+# Minus infinity of score rows (far from overflow in int16 and int32).
+LOW = -2 ** 14
+
+def smith_waterman(seq1, seq2, scoring, gap_open, gap_extend):
+    '''
+        smith_waterman
+
+        Local alignment (Smith-Waterman) with affine gaps. Sequence 1 is the
+        query: its profile is built once and every row of the matrix
+        (one letter of Sequence 2) is computed with a few vector operations,
+        horizontal gaps with running maximum (as in gotoh), which requires
+        gap_open <= gap_extend.
+
+        Rows are kept in int16 with scores saturated at 0; when the best
+        score comes close to int16 limit the pass is repeated in int32.
+        The pass finds score and end of the best alignment, reverse pass
+        anchored at the end finds its start and the region is aligned with
+        gotoh.
+
+        Input:
+            seq1: string - Sequence 1 string (without padding).
+            seq2: string - Sequence 2 string (without padding).
+            scoring: Scoring - substitution scores.
+            gap_open: int - score for the first position of a gap (negative).
+            gap_extend: int - score for every next position of a gap.
+
+        Output:
+            list (2) of string: aligned sequences (empty if no positive
+                scoring alignment exists)
+            float: alignment score
+            (int, int): start of alignment in Sequence 1 and Sequence 2
+    '''
+
+    if gap_open >= 0 or gap_extend > 0:
+        raise ValueError("Gap scores of local alignment must be negative.")
+
+    if gap_open > gap_extend:
+        raise ValueError("gap_open can not be higher than gap_extend")
+
+    codes1 = scoring.encode(seq1)
+    codes2 = scoring.encode(seq2)
+
+    if len(codes1) == 0 or len(codes2) == 0:
+        return ["", ""], 0.0, (0, 0)
+
+    profile = scoring.profile(codes1)
+
+    result = _scan(profile, codes2, gap_open, gap_extend, np.int16, False)
+
+    if result is None:
+        result = _scan(profile, codes2, gap_open, gap_extend, np.int32, False)
+
+    best, end1, end2 = result
+
+    if best <= 0:
+        return ["", ""], 0.0, (0, 0)
+
+    # Alignments starting at the end and going backwards never score more
+    # than best, the one that reaches it starts the local alignment.
+    reverse = scoring.profile(codes1[end1::-1])
+
+    score, length1, length2 = _scan(reverse, codes2[end2::-1], gap_open, gap_extend, np.int32, True)
+
+    start1 = end1 - length1
+    start2 = end2 - length2
+
+    path, score, output = gotoh(seq1[start1:end1 + 1], seq2[start2:end2 + 1], scoring, gap_open, gap_extend)
+
+    return path, float(best), (start1, start2)
+
+
+def _scan(profile, codes2, gap_open, gap_extend, dtype, anchored):
+    '''
+        _scan
+
+        Pass over rows of Sequence 2 keeping one row of H (best score) and F
+        (vertical gap) states.
+
+        Local pass clamps scores at 0. Anchored pass computes alignments
+        starting at the first cell (global start, free end).
+
+        Output:
+            int: best score
+            int: position of the best cell in Sequence 1
+            int: position of the best cell in Sequence 2
+            None if int16 pass came close to overflow
+    '''
+
+    m = profile.shape[1]
+
+    go = dtype(gap_open)
+    ge = dtype(gap_extend)
+
+    # Row values minus gap extensions must fit the type.
+    limit = None
+
+    if dtype == np.int16:
+        limit = np.iinfo(np.int16).max - int(np.abs(profile).max()) - m * abs(gap_extend) - abs(gap_open)
+
+        if limit <= 0:
+            return None
+
+    extensions = (np.arange(m + 1) * gap_extend).astype(dtype)
+
+    padded = np.zeros( (profile.shape[0], m + 1), dtype = dtype )
+    padded[:, 1:] = profile
+
+    H = np.zeros(m + 1, dtype = dtype)
+    F = np.full(m + 1, LOW, dtype = dtype)
+    E = np.full(m + 1, LOW, dtype = dtype)
+    row = np.empty(m + 1, dtype = dtype)
+
+    if anchored:
+        # Row above Sequence 2: horizontal gap from the first cell.
+        H[1:] = go + extensions[:-1]
+
+    best = LOW if anchored else 0
+    best1 = 0
+    best2 = 0
+
+    for i, code in enumerate(codes2.tolist()):
+        # Vertical gaps come from the previous row.
+        np.maximum(F + ge, H + go, out = F)
+
+        row[1:] = H[:-1]
+        row += padded[code]
+
+        np.maximum(row, F, out = row)
+
+        if anchored:
+            row[0] = F[0]
+        else:
+            np.maximum(row, 0, out = row)
+            row[0] = 0
+
+        # Horizontal gaps: E[j] = max_k<j( row[k] + open + (j - 1 - k) * extend ).
+        running = np.maximum.accumulate(row - extensions)
+        E[1:] = running[:-1] + extensions[:-1] + go
+
+        np.maximum(row, E, out = H)
+
+        top = int(H[1:].max())
+
+        if top > best:
+            best = top
+            best1 = int(H[1:].argmax())
+            best2 = i
+
+        if limit is not None and top > limit:
+            return None
+
+    return best, best1, best2
@@ -0,0 +1,193 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import os
+import string
+import functools
+
+import numpy as np
+
+# Alphabet of match/mismatch scoring: every letter (and stop codon)
+# matches only itself.
+DEFAULT_ALPHABET = string.ascii_uppercase + "*"
+
+class Scoring():
+    '''
+        Scoring class
+
+        Substitution scores of an alphabet. Sequences are encoded once into
+        alphabet indices (uint8) and scores of a whole row of the dynamic
+        programming matrix are taken from query profile with a single index.
+    '''
+
+    def __init__(self, alphabet, matrix):
+        '''
+            Constructor of Scoring class
+
+            Input:
+                alphabet: string - letters of the alphabet.
+                matrix: 2d vector (len(alphabet), len(alphabet)) - substitution
+                    scores (matrix[a, b] - score of aligning letter a with b).
+
+            Output:
+                Scoring: Constructed object of class Scoring
+        '''
+
+        self.alphabet = alphabet
+        self.matrix = np.asarray(matrix, dtype = np.int32)
+
+        # Letters outside the alphabet are mapped to wildcard (X or *)
+        # if the alphabet has one.
+        wildcard = 255
+
+        for letter in "X*":
+            if letter in alphabet:
+                wildcard = alphabet.index(letter)
+                break
+
+        self.lookup = np.full(256, wildcard, dtype = np.uint8)
+
+        for it, letter in enumerate(alphabet):
+            self.lookup[ord(letter.upper())] = it
+            self.lookup[ord(letter.lower())] = it
+
+    def encode(self, sequence):
+        '''
+            encode method
+
+            Converts sequence to alphabet indices.
+
+            Input:
+                sequence: string or bytes - sequence to encode.
+
+            Output:
+                np.ndarray (uint8): alphabet indices of sequence letters
+        '''
+
+        if isinstance(sequence, str):
+            sequence = sequence.encode("ascii")
+
+        codes = self.lookup[np.frombuffer(sequence, dtype = np.uint8)]
+
+        if np.any(codes == 255):
+            raise ValueError("Sequence contains letters which are not in the substitution matrix.")
+
+        return codes
+
+    def profile(self, codes):
+        '''
+            profile method
+
+            Builds query profile: row a holds scores of letter a against
+            every position of encoded sequence.
+
+            Input:
+                codes: np.ndarray (uint8) - encoded sequence.
+
+            Output:
+                np.ndarray (int32) (len(alphabet), len(codes)): query profile
+        '''
+
+        return self.matrix[:, codes]
+
+    def score(self, letter1, letter2):
+        '''
+            score method
+
+            Returns substitution score of two letters.
+        '''
+
+        return int(self.matrix[self.lookup[ord(letter1)], self.lookup[ord(letter2)]])
+
+    def best(self):
+        '''
+            best method
+
+            Returns the highest substitution score.
+        '''
+
+        return int(self.matrix.max())
+
+
+def match_mismatch(match_score, mismatch_score, alphabet = DEFAULT_ALPHABET):
+    '''
+        match_mismatch
+
+        Builds scoring with flat match and mismatch scores.
+
+        Input:
+            match_score: int - score for match.
+            mismatch_score: int - score for mismatch.
+            alphabet: string - letters of the alphabet.
+
+        Output:
+            Scoring: scoring object
+    '''
+
+    matrix = np.full( (len(alphabet), len(alphabet)), mismatch_score, dtype = np.int32 )
+    np.fill_diagonal(matrix, match_score)
+
+    return Scoring(alphabet, matrix)
+
+
+def read_matrix(directory):
+    '''
+        read_matrix
+
+        Reads substitution matrix in NCBI/EMBOSS text format: lines starting
+        with # are comments, the first line lists column letters, every
+        next line starts with row letter followed by scores.
+
+        Input:
+            directory: string - path to matrix file.
+
+        Output:
+            Scoring: scoring object
+    '''
+
+    columns = None
+    rows = {}
+
+    with open(directory, "r") as file_handle:
+        for line in file_handle:
+            line = line.split("#")[0].strip()
+
+            if len(line) == 0:
+                continue
+
+            fields = line.split()
+
+            if columns is None:
+                columns = fields
+            else:
+                rows[fields[0]] = [ int(float(value)) for value in fields[1:] ]
+
+    if columns is None or sorted(rows) != sorted(columns) or any(len(row) != len(columns) for row in rows.values()):
+        raise ValueError("File: " + directory + " is not a valid substitution matrix.")
+
+    return Scoring("".join(columns), [ rows[letter] for letter in columns ])
+
+
+@functools.lru_cache(maxsize = None)
+def load_matrix(name):
+    '''
+        load_matrix
+
+        Loads substitution matrix from file or by name (BLOSUM62, PAM250, ...
+        - all matrices distributed with Biopython). Loaded matrices are
+        cached.
+
+        Input:
+            name: string - path to matrix file or matrix name.
+
+        Output:
+            Scoring: scoring object
+    '''
+
+    if os.path.isfile(name):
+        return read_matrix(name)
+
+    from Bio.Align import substitution_matrices
+
+    matrix = substitution_matrices.load(name.upper())
+
+    return Scoring("".join(matrix.alphabet), np.rint(np.asarray(matrix)))
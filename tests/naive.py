@@ -0,0 +1,231 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import random
+
+from substitution import Scoring, match_mismatch
+
+# Reference implementations (cell by cell dynamic programming) used to
+# check the vectorized engines. Traceback directions as in kernels.py.
+DIAGONAL = 1
+LEFT = 2
+UP = 4
+
+NEG = float("-inf")
+
+
+def random_scoring(generator, alphabet = "ACGT"):
+    '''
+        random_scoring
+
+        Builds random symmetric substitution matrix (positive diagonal).
+    '''
+
+    scores = [ [ 0 ] * len(alphabet) for letter in alphabet ]
+
+    for a in range(len(alphabet)):
+        scores[a][a] = generator.randint(1, 5)
+
+        for b in range(a):
+            scores[a][b] = scores[b][a] = generator.randint(-4, 1)
+
+    return Scoring(alphabet, scores)
+
+
+def random_pairs(count, seed, alphabet = "ACGT", max_length = 24):
+    '''
+        random_pairs
+
+        Generates pairs of related sequences (mutated copies) with random
+        substitution matrix or match/mismatch scores and random gap score.
+
+        output:
+            generator of (string, string, Scoring, int): sequences, scoring
+            and gap score
+    '''
+
+    generator = random.Random(seed)
+
+    for it in range(count):
+        seq1 = "".join(generator.choice(alphabet) for it in range(generator.randint(1, max_length)))
+        seq2 = "".join(letter if generator.random() < 0.7 else generator.choice(alphabet) * generator.randint(0, 2) for letter in seq1) \
+               or generator.choice(alphabet)
+
+        if generator.random() < 0.5:
+            seq1, seq2 = seq2, seq1
+
+        if generator.random() < 0.5:
+            scoring = random_scoring(generator, alphabet)
+        else:
+            scoring = match_mismatch(generator.randint(1, 5), generator.randint(-4, 1))
+
+        yield seq1, seq2, scoring, generator.randint(-4, -1)
+
+
+def naive_global(seq1, seq2, score, gap):
+    '''
+        naive_global
+
+        Cell by cell Needleman-Wunch recurrence.
+
+        input:
+            seq1, seq2: string - sequences (without padding).
+            score: function (letter, letter) -> int - substitution score
+                (e.g. Scoring.score).
+            gap: int - score for gap.
+
+        output:
+            list of list: score matrix (len(seq2) + 1, len(seq1) + 1)
+            list of list: direction bits of every cell
+    '''
+
+    rows, cols = len(seq2) + 1, len(seq1) + 1
+
+    output = [ [ 0 ] * cols for it in range(rows) ]
+    trace = [ [ 0 ] * cols for it in range(rows) ]
+
+    for i in range(rows):
+        for j in range(cols):
+            if i == 0 and j == 0:
+                continue
+
+            moves = {}
+
+            if i > 0 and j > 0:
+                moves[DIAGONAL] = output[i - 1][j - 1] + score(seq1[j - 1], seq2[i - 1])
+            if j > 0:
+                moves[LEFT] = output[i][j - 1] + gap
+            if i > 0:
+                moves[UP] = output[i - 1][j] + gap
+
+            output[i][j] = max(moves.values())
+            trace[i][j] = sum(move for move, value in moves.items() if value == output[i][j])
+
+    return output, trace
+
+
+def naive_affine(seq1, seq2, score, gap_open, gap_extend, local = False):
+    '''
+        naive_affine
+
+        Cell by cell Gotoh recurrence (global, or Smith-Waterman if local).
+
+        output:
+            int: alignment score
+    '''
+
+    rows, cols = len(seq2) + 1, len(seq1) + 1
+
+    H = [ [ NEG ] * cols for it in range(rows) ]
+    E = [ [ NEG ] * cols for it in range(rows) ]
+    F = [ [ NEG ] * cols for it in range(rows) ]
+
+    best = 0
+
+    for i in range(rows):
+        for j in range(cols):
+            if i == 0 and j == 0:
+                H[i][j] = 0
+                continue
+
+            if j > 0:
+                E[i][j] = max(E[i][j - 1] + gap_extend, H[i][j - 1] + gap_open)
+            if i > 0:
+                F[i][j] = max(F[i - 1][j] + gap_extend, H[i - 1][j] + gap_open)
+
+            H[i][j] = max(E[i][j], F[i][j])
+
+            if i > 0 and j > 0:
+                H[i][j] = max(H[i][j], H[i - 1][j - 1] + score(seq1[j - 1], seq2[i - 1]))
+
+            if local:
+                H[i][j] = max(H[i][j], 0)
+                best = max(best, H[i][j])
+
+    return best if local else H[-1][-1]
+
+
+def alignment_score(path, score, gap_open, gap_extend = None):
+    '''
+        alignment_score
+
+        Scores aligned sequences (affine gaps if gap_extend is given).
+    '''
+
+    gap_extend = gap_open if gap_extend is None else gap_extend
+
+    total = 0
+
+    for it, (a, b) in enumerate(zip(*path)):
+        if a == "-" or b == "-":
+            extends = it > 0 and ((a == "-" and path[0][it - 1] == "-") or (b == "-" and path[1][it - 1] == "-"))
+            total += gap_extend if extends else gap_open
+        else:
+            total += score(a, b)
+
+    return total
+
+
+def check_path(path, seq1, seq2):
+    '''
+        check_path
+
+        Checks that aligned sequences spell seq1 and seq2 and never align
+        two gaps.
+    '''
+
+    assert len(path[0]) == len(path[1])
+    assert path[0].replace("-", "") == seq1
+    assert path[1].replace("-", "") == seq2
+    assert not any(a == "-" and b == "-" for a, b in zip(*path))
+
+
+def naive_paths(seq1, seq2, trace, i = None, j = None):
+    '''
+        naive_paths
+
+        Lists all co-optimal global alignments recursively from direction
+        bits (see naive_global).
+    '''
+
+    if i is None:
+        i, j = len(seq2), len(seq1)
+
+    if i == 0 and j == 0:
+        return [ ("", "") ]
+
+    paths = []
+    bits = trace[i][j]
+
+    if bits & DIAGONAL:
+        paths += [ (a + seq1[j - 1], b + seq2[i - 1]) for a, b in naive_paths(seq1, seq2, trace, i - 1, j - 1) ]
+    if bits & LEFT:
+        paths += [ (a + seq1[j - 1], b + "-") for a, b in naive_paths(seq1, seq2, trace, i, j - 1) ]
+    if bits & UP:
+        paths += [ (a + "-", b + seq2[i - 1]) for a, b in naive_paths(seq1, seq2, trace, i - 1, j) ]
+
+    return paths
+
+
+def naive_count(trace):
+    '''
+        naive_count
+
+        Counts co-optimal global alignments from direction bits.
+    '''
+
+    rows, cols = len(trace), len(trace[0])
+    counts = [ [ 0 ] * cols for it in range(rows) ]
+    counts[0][0] = 1
+
+    for i in range(rows):
+        for j in range(cols):
+            bits = trace[i][j]
+
+            if bits & DIAGONAL:
+                counts[i][j] += counts[i - 1][j - 1]
+            if bits & LEFT:
+                counts[i][j] += counts[i][j - 1]
+            if bits & UP:
+                counts[i][j] += counts[i - 1][j]
+
+    return counts[-1][-1]
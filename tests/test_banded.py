@@ -0,0 +1,29 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import pytest
+
+from banded import banded
+from naive import random_pairs, naive_global, alignment_score, check_path
+
+PAIRS = list(random_pairs(120, seed = 5))
+
+
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", PAIRS)
+def test_banded(seq1, seq2, scoring, gap):
+    expected = naive_global(seq1, seq2, scoring.score, gap)[0][-1][-1]
+
+    for band, auto_widen in ((0, False), (2, False), (1, True)):
+        path, result, exact, width = banded(seq1, seq2, scoring, gap, band, auto_widen)
+
+        check_path(path, seq1, seq2)
+        assert alignment_score(path, scoring.score, gap) == result
+        assert result <= expected
+
+        # Result reported as exact is optimal.
+        if exact:
+            assert result == expected
+
+    # Band covering the whole matrix is exact.
+    path, result, exact, width = banded(seq1, seq2, scoring, gap, len(seq1) + len(seq2))
+
+    assert exact and result == expected
@@ -0,0 +1,14 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+from benchmarks.engines import MODES, make_cases
+
+
+def test_make_cases():
+    cases = make_cases([100], [0.9], MODES, ["graph", "bitmask", "hirschberg"], 40, 5000, [20])
+
+    # Only graph traceback depends on mode, it is also run at its own lengths.
+    assert sorted( (case["engine"], case["mode"] or "-", case["length"]) for case in cases ) == \
+           sorted([ ("graph", mode, length) for mode in MODES for length in (20, 100) ] + [("bitmask", "-", 100), ("hirschberg", "-", 100)])
+
+    assert all( "skip" in case for case in cases if case["engine"] == "graph" and case["length"] == 100 )
+    assert not any( "skip" in case for case in cases if case["engine"] != "graph" or case["length"] == 20 )
@@ -0,0 +1,30 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import pytest
+
+from gotoh import gotoh
+from substitution import match_mismatch
+from naive import random_pairs, naive_global, naive_affine, alignment_score, check_path
+
+PAIRS = list(random_pairs(120, seed = 6))
+
+
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", PAIRS)
+def test_gotoh(seq1, seq2, scoring, gap):
+    gap_open, gap_extend = gap - 2, gap
+
+    expected = naive_affine(seq1, seq2, scoring.score, gap_open, gap_extend)
+
+    path, result, output = gotoh(seq1, seq2, scoring, gap_open, gap_extend)
+
+    check_path(path, seq1, seq2)
+    assert result == expected == output[-1, -1]
+    assert alignment_score(path, scoring.score, gap_open, gap_extend) == expected
+
+    # Equal opening and extension scores give linear gaps.
+    assert gotoh(seq1, seq2, scoring, gap, gap)[1] == naive_global(seq1, seq2, scoring.score, gap)[0][-1][-1]
+
+
+def test_gap_open_above_extend():
+    with pytest.raises(ValueError):
+        gotoh("ACGT", "AGT", match_mismatch(1, -1), -1, -2)
@@ -0,0 +1,27 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import numpy as np
+import pytest
+
+from heatmap import pool_matrix, path_line
+
+
+@pytest.mark.parametrize("rows, cols, size", [(7, 5, 10), (10, 7, 3), (1, 9, 2), (12, 12, 5)])
+def test_pool_matrix(rows, cols, size):
+    matrix = np.random.RandomState(rows * cols).randint(-20, 20, (rows, cols))
+
+    for method, reduce in (("max", np.max), ("mean", np.mean)):
+        pooled, step = pool_matrix(matrix, size, method)
+
+        assert max(pooled.shape) <= size
+
+        expected = [ [ reduce(matrix[r:r + step, c:c + step]) for c in range(0, cols, step) ] for r in range(0, rows, step) ]
+
+        assert np.allclose(pooled, expected)
+
+
+def test_path_line():
+    x, y = path_line(["AC-GT", "A-CG-"], (2, 1))
+
+    assert list(x) == [2, 3, 4, 4, 5, 6]
+    assert list(y) == [1, 2, 2, 3, 4, 4]
@@ -0,0 +1,35 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import numpy as np
+import pytest
+
+import hirschberg as module
+from hirschberg import hirschberg
+from kernels import score_last_row
+from naive import random_pairs, naive_global, alignment_score, check_path
+
+PAIRS = list(random_pairs(120, seed = 4))
+
+
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", PAIRS)
+def test_score_last_row(seq1, seq2, scoring, gap):
+    expected = naive_global(seq1, seq2, scoring.score, gap)[0][-1]
+
+    profile = scoring.profile(scoring.encode(seq1))
+
+    assert np.array_equal(score_last_row(profile, scoring.encode(seq2), gap), expected)
+
+
+@pytest.mark.parametrize("base_cells", [1, 16, module.BASE_CELLS])
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", PAIRS)
+def test_hirschberg(seq1, seq2, scoring, gap, base_cells, monkeypatch):
+    # Small base forces splitting of short sequences.
+    monkeypatch.setattr(module, "BASE_CELLS", base_cells)
+
+    expected = naive_global(seq1, seq2, scoring.score, gap)[0][-1][-1]
+
+    path, result = hirschberg(seq1, seq2, scoring, gap)
+
+    check_path(path, seq1, seq2)
+    assert result == expected
+    assert alignment_score(path, scoring.score, gap) == expected
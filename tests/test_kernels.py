@@ -0,0 +1,109 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import numpy as np
+import pytest
+
+from kernels import fill_score_matrix, fill_profile_matrix, score_only
+from substitution import Scoring, match_mismatch
+from tiled import fill_tiled
+from wavefront import fill_wavefront
+from naive import random_pairs, naive_global
+
+PAIRS = list(random_pairs(120, seed = 1))
+
+
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", PAIRS)
+def test_fill_score_matrix(seq1, seq2, scoring, gap):
+    expected, expected_trace = naive_global(seq1, seq2, scoring.score, gap)
+
+    output, trace = fill_score_matrix(" " + seq1, " " + seq2, scoring, gap, traceback = True)
+
+    assert np.array_equal(output, expected)
+    assert np.array_equal(trace, expected_trace)
+    assert np.array_equal(fill_score_matrix(" " + seq1, " " + seq2, scoring, gap), expected)
+
+
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", PAIRS[:40])
+def test_fill_tiled(seq1, seq2, scoring, gap, tmp_path):
+    expected, expected_trace = naive_global(seq1, seq2, scoring.score, gap)
+
+    for tile in (1, 3, 7):
+        output, trace = fill_tiled(" " + seq1, " " + seq2, scoring, gap, str(tmp_path / str(tile)), tile)
+
+        assert np.array_equal(output, expected)
+        assert np.array_equal(trace, expected_trace)
+
+
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", PAIRS[:40])
+def test_fill_wavefront(seq1, seq2, scoring, gap):
+    expected, expected_trace = naive_global(seq1, seq2, scoring.score, gap)
+
+    for tile in (1, 3, 7):
+        output, trace = fill_wavefront(" " + seq1, " " + seq2, scoring, gap, workers = 2, tile = tile)
+
+        assert np.array_equal(output, expected)
+        assert np.array_equal(trace, expected_trace)
+
+
+def test_wavefront_process_backend():
+    for seq1, seq2, scoring, gap in PAIRS[:3]:
+        expected, expected_trace = naive_global(seq1, seq2, scoring.score, gap)
+
+        output, trace = fill_wavefront(" " + seq1, " " + seq2, scoring, gap, workers = 2, tile = 4, backend = "process")
+
+        assert np.array_equal(output, expected)
+        assert np.array_equal(trace, expected_trace)
+
+
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", PAIRS)
+def test_score_only(seq1, seq2, scoring, gap):
+    expected = naive_global(seq1, seq2, scoring.score, gap)[0][-1][-1]
+
+    assert score_only(seq1, seq2, scoring, gap) == (expected, max(len(seq1), len(seq2)))
+
+    # Pair which is not abandoned by X-drop has exact score.
+    score, rows = score_only(seq1, seq2, scoring, gap, xdrop = 3)
+
+    assert score is None or score == expected
+    assert score_only(seq1, seq2, scoring, gap, xdrop = 1000)[0] == expected
+
+
+def test_score_only_asymmetric_matrix():
+    # Shorter sequence is placed along the row, scores keep their orientation
+    # (matrix[letter of Sequence 2, letter of Sequence 1], as in fill_score_matrix).
+    scoring = Scoring("AC", [[2, -3], [1, 2]])
+
+    for seq1, seq2 in (("CACCC", "CCAA"), ("CCAA", "CACCC"), ("AACCA", "CA")):
+        expected = naive_global(seq1, seq2, lambda a, b: scoring.score(b, a), -2)[0][-1][-1]
+
+        assert score_only(seq1, seq2, scoring, -2)[0] == expected == fill_score_matrix(" " + seq1, " " + seq2, scoring, -2)[-1, -1]
+
+
+def test_xdrop_abandons_dissimilar_pair():
+    score, rows = score_only("A" * 50, "C" * 50, match_mismatch(1, -1), -2, xdrop = 5)
+
+    assert score is None and rows < 50
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_fill_profile_matrix(seed):
+    generator = np.random.default_rng(seed)
+
+    n, m = generator.integers(1, 15, size = 2)
+
+    scores = generator.integers(-5, 6, size = (n, m))
+    gaps1 = generator.integers(-4, 0, size = m)
+    gaps2 = generator.integers(-4, 0, size = n)
+
+    expected = np.zeros( (n + 1, m + 1) )
+    expected[0, 1:] = np.cumsum(gaps1)
+    expected[1:, 0] = np.cumsum(gaps2)
+
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            expected[i, j] = max(expected[i - 1, j - 1] + scores[i - 1, j - 1], expected[i, j - 1] + gaps1[j - 1],
+                                 expected[i - 1, j] + gaps2[i - 1])
+
+    output, trace = fill_profile_matrix(scores, gaps1, gaps2)
+
+    assert np.array_equal(output, expected)
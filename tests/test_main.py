@@ -0,0 +1,67 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from main import main
+
+ARGUMENTS = ["--s1=ACGTACGTTA", "--s2=ACGTCGTA", "--ms=1", "--mms=-1", "--gs=-2", "--m=top_score", "--pg=False", "--no-plot"]
+
+
+def run(*arguments):
+    result = CliRunner().invoke(main, ARGUMENTS + list(arguments))
+
+    assert result.exit_code == 0, result.output + repr(result.exception)
+
+    return result.output
+
+
+@pytest.mark.parametrize("engine", ["full", "tiled", "wavefront", "hirschberg", "banded", "gotoh", "local"])
+def test_output_jsonl(engine, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    run("--e=" + engine, "--go=-3", "--ge=-1", "--o=results.jsonl")
+    run("--e=" + engine, "--go=-3", "--ge=-1", "--o=results.jsonl", "--tb=bitmask")
+
+    records = [ json.loads(line) for line in open("results.jsonl") ]
+
+    assert len(records) == 2
+    assert records[0]["score"] == records[1]["score"]
+
+    for record in records:
+        assert record["alignment1"].replace("-", "") in "ACGTACGTTA"
+        assert record["alignment2"].replace("-", "") in "ACGTCGTA"
+    assert not (tmp_path / "out.txt").exists()
+
+
+def test_output_tsv_and_sam(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    run("--o=results.tsv", "--f=tsv")
+    run("--o=results.tsv", "--f=tsv", "--so")
+    run("--o=results.sam", "--f=sam")
+
+    header, *rows = open("results.tsv").read().splitlines()
+
+    assert header.split("\t")[:3] == ["record1", "record2", "score"]
+    assert [ float(row.split("\t")[2]) for row in rows ] == [4, 4]
+
+    header, row = open("results.sam").read().splitlines()
+
+    assert header.startswith("@HD")
+    assert "AS:i:4" in row.split("\t")
+
+
+def test_out_txt(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    output = run()
+
+    assert "score: 4.0" in output
+
+    lines = open("out.txt").read().splitlines()
+
+    assert "Score: 4" in lines
+    assert "Paths: 2" in lines
@@ -0,0 +1,36 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+from click.testing import CliRunner
+
+from msa import msa
+from fasta import FastaReader
+
+FAMILY = ">seq1 first record\nACGTACGTAC\n>seq2 second record|x=1\nACGTCGTAC\n>seq3\nACGAACGTTAC\n"
+
+
+def run_msa(tmp_path, *arguments):
+    family = tmp_path / "family.fasta"
+    family.write_text(FAMILY)
+
+    output = tmp_path / "aligned.fasta"
+
+    result = CliRunner().invoke(msa, ["--fa", str(family), "--ms", "1", "--mms", "-1", "--gs", "-2", "--w", "1", "--o", str(output), *arguments])
+
+    assert result.exit_code == 0, result.output
+
+    with FastaReader(str(output)) as reader:
+        return [ (header, sequence.decode("ascii")) for header, sequence in reader ]
+
+
+def test_progressive_alignment(tmp_path):
+    for tree in ("upgma", "nj"):
+        records = run_msa(tmp_path, "--tree", tree)
+
+        assert len(set(len(sequence) for header, sequence in records)) == 1
+        assert [ sequence.replace("-", "") for header, sequence in records ] == ["ACGTACGTAC", "ACGTCGTAC", "ACGAACGTTAC"]
+
+
+def test_aligned_fasta_keeps_headers(tmp_path):
+    records = run_msa(tmp_path)
+
+    assert [ header for header, sequence in records ] == ["seq1 first record", "seq2 second record|x=1", "seq3"]
@@ -0,0 +1,58 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import pytest
+
+from NCBI import Cache, match_records, split_records
+
+
+def test_match_records():
+    records = split_records(">NM_1.2 first\nACGT\n>NM_2.1 second\nAGT\n")
+
+    assert match_records(["NM_2", "NM_1.2"], records) == {"NM_1.2": records[0][1], "NM_2": records[1][1]}
+
+    # Unknown ids are skipped.
+    assert match_records(["NM_1", "NM_2", "NM_3"], records) == {"NM_1": records[0][1], "NM_2": records[1][1]}
+
+    # No accession matched (e.g. GI numbers requested), same count.
+    assert match_records(["123", "456"], records) == {"123": records[0][1], "456": records[1][1]}
+
+    with pytest.raises(ValueError):
+        match_records(["NM_1", "NM_3"], records)
+
+    with pytest.raises(ValueError):
+        match_records(["123", "456", "789"], records)
+
+
+def test_cache_eviction(tmp_path):
+    cache = Cache(str(tmp_path), max_size = 0)
+
+    first = cache.put("nucleotide", "NM_1", ">NM_1\nACGT\n")
+    second = cache.put("nucleotide", "NM_2", ">NM_2\nAGT\n")
+
+    # Zero limit keeps only the record just stored.
+    assert cache.get("nucleotide", "NM_1") is None
+    assert cache.get("nucleotide", "NM_2") == second != first
+    assert cache.size == len(">NM_2\nAGT\n")
+
+
+def test_cache_scans_only_over_limit(tmp_path, monkeypatch):
+    cache = Cache(str(tmp_path), max_size = 100)
+
+    cache.put("nucleotide", "NM_0", ">NM_0\nACGT\n")
+
+    scans = []
+    entries = cache.entries
+    monkeypatch.setattr(cache, "entries", lambda: scans.append(1) or entries())
+
+    for it in range(1, 6):
+        cache.put("nucleotide", "NM_" + str(it), ">NM_" + str(it) + "\nACGT\n")
+
+    assert len(scans) == 0
+    assert cache.size == 6 * len(">NM_0\nACGT\n")
+
+    for it in range(6, 12):
+        cache.put("nucleotide", "NM_" + str(it), ">NM_" + str(it) + "\nACGT\n")
+
+    assert len(scans) > 0
+    assert cache.size <= 100
+    assert cache.get("nucleotide", "NM_11") is not None
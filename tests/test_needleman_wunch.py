@@ -0,0 +1,148 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import json
+import math
+
+import pytest
+
+from needleman_wunch import NeedlemanWunch, MAX_PATHS, align
+from result_cache import ResultCache
+from naive import random_pairs, naive_global, alignment_score, check_path
+
+
+@pytest.mark.parametrize("engine", ["full", "hirschberg", "banded", "gotoh"])
+def test_align(engine):
+    result = align("ACGTAC", "ACTAC", engine = engine)
+
+    assert result.score == 3
+    check_path(result.path, "ACGTAC", "ACTAC")
+    assert alignment_score(result.path, lambda a, b: 1 if a == b else -1, -2) == 3
+    assert result.stats["score"] == 3
+    assert result.to_record("a", "b")["record1"] == "a"
+
+
+def test_align_paths():
+    graph = align("HEAGAWGHEEAWHEAE", "PAWHEAEHEAGAWGHE", paths = True, keep_matrix = True, traceback = "graph")
+    bitmask = align("HEAGAWGHEEAWHEAE", "PAWHEAEHEAGAWGHE", paths = True, traceback = "bitmask")
+
+    assert graph.score == bitmask.score
+    assert graph.path_count == bitmask.path_count == 6
+    assert graph.matrix is not None and bitmask.matrix is None
+    assert { (a, b) for a, b, score in graph.paths } <= { (a, b) for a, b, score in bitmask.paths }
+
+    for a, b, score in bitmask.paths:
+        assert score == bitmask.score
+        check_path([a, b], "HEAGAWGHEEAWHEAE", "PAWHEAEHEAGAWGHE")
+
+
+def test_align_score_only():
+    result = align("ACGTAC", "ACTAC", score_only = True)
+
+    assert result.score == 3 and result.path is None
+
+
+def aligner(**kwargs):
+    settings = dict(sequence1 = "ACGTAC", sequence2 = "ACTAC", match_score = 1, mismatch_score = -1, gap_score = -2,
+                    mode = "top_score", print_graph = False, plot = False)
+    settings.update(kwargs)
+
+    return NeedlemanWunch(**settings)
+
+
+def test_forward_writes_output_record(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    for traceback in ("graph", "bitmask"):
+        aligner(output = "results.jsonl", traceback = traceback).forward()
+
+    aligner(output = "results.jsonl", engine = "hirschberg").forward()
+
+    records = [ json.loads(line) for line in open("results.jsonl") ]
+
+    assert len(records) == 3
+    assert not (tmp_path / "out.txt").exists()
+
+    for record in records:
+        assert record["score"] == 3
+        assert record["alignment1"].replace("-", "") == "ACGTAC"
+        assert record["alignment2"].replace("-", "") == "ACTAC"
+
+
+def test_path_count_is_exact_for_both_tracebacks():
+    for traceback in ("graph", "bitmask"):
+        result = align("HEAGAWGHEEAWHEAE", "PAWHEAEHEAGAWGHE", paths = True, traceback = traceback)
+
+        assert result.path_count == 6
+        assert result.info["Paths"] == "6"
+
+
+def test_reported_paths_are_bounded_by_default():
+    # C(200, 10) co-optimal alignments.
+    result = align("A" * 200, "A" * 190, paths = True, traceback = "bitmask")
+
+    assert len(result.paths) == MAX_PATHS
+    assert result.path_count == math.comb(200, 10)
+
+
+def test_graph_paths_are_optimal():
+    # Graph traceback prunes cells, its paths are a subset of bitmask ones.
+    for seq1, seq2, scoring, gap in random_pairs(40, seed = 2, max_length = 12):
+        expected = naive_global(seq1, seq2, scoring.score, gap)[0][-1][-1]
+
+        graph = align(seq1, seq2, scoring, gap_score = gap, paths = True, traceback = "graph")
+        bitmask = align(seq1, seq2, scoring, gap_score = gap, paths = True, traceback = "bitmask")
+
+        assert graph.path_count == bitmask.path_count
+        assert set( (a, b) for a, b, score in graph.paths ) <= set( (a, b) for a, b, score in bitmask.paths )
+
+        for a, b, score in graph.paths:
+            check_path([a, b], seq1, seq2)
+            assert score == expected
+
+
+def test_forward_with_pruned_graph(tmp_path, monkeypatch):
+    # Graph pruning leaves no path for this pair, optimal one is rebuilt from trace.
+    monkeypatch.chdir(tmp_path)
+
+    aligner(sequence1 = "HEAGAWGHEE", sequence2 = "PAWHEAE", traceback = "graph", output = "results.jsonl").forward()
+    aligner(sequence1 = "HEAGAWGHEE", sequence2 = "PAWHEAE", traceback = "graph").forward()
+
+    record = json.loads(open("results.jsonl").read())
+
+    assert record["score"] == -6
+    assert record["graph paths"] == "0"
+    check_path([record["alignment1"], record["alignment2"]], "HEAGAWGHEE", "PAWHEAE")
+
+    lines = open("out.txt").read().splitlines()
+
+    assert "Score: -6" in lines
+    assert "Length: 0" not in lines
+
+
+def test_cached_pruned_graph(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    for it in range(2):
+        with ResultCache(str(tmp_path / "cache")) as cache:
+            aligner(sequence1 = "HEAGAWGHEE", sequence2 = "PAWHEAE", traceback = "graph", output = "results.jsonl", cache = cache).forward()
+
+            hits = cache.stats()["disk_hits"]
+
+    first, second = [ json.loads(line) for line in open("results.jsonl") ]
+
+    assert hits == 1
+    assert first == second
+    assert first["score"] == -6
+
+
+def test_default_traceback():
+    assert aligner().traceback == "bitmask"
+    assert aligner(mode = "full_path").traceback == "bitmask"
+    assert aligner(mode = "all").traceback == "graph"
+    assert aligner(print_graph = True).traceback == "graph"
+
+    # Repetitive pair has too many partial paths for the graph.
+    result = align("AC" * 14, "AC" * 12, paths = True)
+
+    assert len(result.paths) == result.path_count == 325
+    assert "Graph paths" not in result.info
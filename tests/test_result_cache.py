@@ -0,0 +1,49 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+from result_cache import ResultCache, cache_key
+from substitution import match_mismatch
+
+
+def test_memory_lru():
+    cache = ResultCache(memory_items = 2)
+
+    cache.put("a", {"score": 1})
+    cache.put("b", {"score": 2})
+    cache.get("a")
+    cache.put("c", {"score": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"score": 1}
+    assert cache.get("c") == {"score": 3}
+
+    stats = cache.stats()
+
+    assert (stats["memory_hits"], stats["misses"], stats["memory_entries"]) == (3, 1, 2)
+
+
+def test_disk_entries_survive_and_are_evicted(tmp_path):
+    with ResultCache(str(tmp_path)) as cache:
+        cache.put("a", {"score": 1})
+
+    with ResultCache(str(tmp_path), disk_limit = 100) as cache:
+        assert cache.get("a") == {"score": 1}
+        assert cache.stats()["disk_hits"] == 1
+
+        for it in range(20):
+            cache.put(str(it), {"score": it})
+
+        stats = cache.stats()
+
+        assert stats["evictions"] > 0
+        assert stats["disk_size"] <= 100
+
+
+def test_cache_key():
+    scoring = match_mismatch(1, -1)
+    key = cache_key("path", "acgt", "ACG", scoring, {"gap": -2})
+
+    assert key == cache_key("path", "ACGT", "ACG", scoring, {"gap": -2})
+    assert key != cache_key("path", "ACG", "ACGT", scoring, {"gap": -2})
+    assert key != cache_key("score", "ACGT", "ACG", scoring, {"gap": -2})
+    assert key != cache_key("path", "ACGT", "ACG", match_mismatch(2, -1), {"gap": -2})
+    assert key != cache_key("path", "ACGT", "ACG", scoring, {"gap": -1})
@@ -0,0 +1,42 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import json
+
+from results import ResultWriter, make_record, cigar, sam_line
+
+
+def test_cigar():
+    assert cigar("ACGT-ACG", "ACTTAA--") == "2=1X1=1I1=2D"
+    assert cigar("", "") == "*"
+
+
+def test_writer_appends_records(tmp_path):
+    directory = str(tmp_path / "results.tsv")
+
+    stats = {"match": 3, "mismatch": 1, "gaps": 0, "length": 4}
+
+    for it in range(2):
+        with ResultWriter(directory, "tsv", flush_every = 1) as writer:
+            writer.write(make_record("a", "b" + str(it), 2, stats, ["ACGT", "ACTT"]))
+
+    header, *rows = open(directory).read().splitlines()
+
+    assert header.split("\t")[0] == "record1"
+    assert [ row.split("\t")[:3] for row in rows ] == [["a", "b0", "2"], ["a", "b1", "2"]]
+
+
+def test_jsonl_and_sam(tmp_path):
+    directory = str(tmp_path / "results.jsonl")
+
+    record = make_record("ref", "read", 3.0, {"match": 4, "mismatch": 0, "gaps": 1, "length": 5}, ["AC-GT", "ACAGT"], (2, 0))
+
+    with ResultWriter(directory) as writer:
+        writer.write(record)
+
+    assert json.loads(open(directory).read()) == record
+
+    fields = sam_line(record).split("\t")
+
+    assert fields[:6] == ["read", "0", "ref", "3", "255", "2=1I2="]
+    assert fields[9] == "ACAGT"
+    assert "AS:i:3" in fields and "NM:i:1" in fields
@@ -0,0 +1,22 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+from search import exhaustive_recall, top_records
+
+OPTIONS = dict(match_score = 1, mismatch_score = -1, gap_score = -2, matrix = None, gap_open = -3, gap_extend = -1,
+               engine = "full", band = 32, mode = "top_score", print_graph = False)
+
+# Record 0 contains the query (best local score), record 1 has the best
+# global score.
+QUERIES = [("query", "ACGTACGT")]
+RECORDS = [("contains", "T" * 30 + "ACGTACGT" + "T" * 30), ("similar", "ACGAACGA")]
+
+
+def test_top_records():
+    assert top_records([1, 5, 3, 5], 1) == {1, 3}
+    assert top_records([1, 5, 3], 2) == {1, 2}
+    assert top_records([], 3) == set()
+
+
+def test_recall_uses_search_engine():
+    for engine, found in (("full", 0), ("gotoh", 0), ("local", 1)):
+        assert exhaustive_recall(QUERIES, RECORDS, [{0}], dict(OPTIONS, engine = engine), 1) == (found, 1)
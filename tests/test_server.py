@@ -0,0 +1,139 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from server import AlignmentServer, align_pairs
+
+OPTIONS = dict(match_score = 1, mismatch_score = -1, gap_score = -2, matrix = None, gap_open = None, gap_extend = None,
+               engine = "full", band = 32, mode = "top_score", print_graph = False, auto_widen = False, score_only = False,
+               xdrop = None, cache_dir = None, cache_limit = 256)
+
+
+def serve_requests(bodies, batch_delay = 0.05, **kwargs):
+    # Front end and batcher without sockets; pairs are aligned on threads.
+    async def run():
+        server = AlignmentServer(OPTIONS, workers = 1, batch_delay = batch_delay, **kwargs)
+        server.queue = asyncio.Queue(maxsize = server.queue_size)
+        server.slots = asyncio.Semaphore(server.max_in_flight)
+        server.executor = ThreadPoolExecutor(max_workers = 1)
+
+        batcher = asyncio.create_task(server.batcher())
+
+        try:
+            return await asyncio.gather(*[ server.dispatch("POST", "/align", json.dumps(body).encode("utf-8")) for body in bodies ])
+
+        finally:
+            batcher.cancel()
+            server.executor.shutdown()
+
+    return asyncio.run(run())
+
+
+def test_requests_are_batched():
+    (status1, single), (status2, several) = serve_requests([{"sequence1": "ACGTT", "sequence2": "acgtt"},
+                                                            {"pairs": [{"sequence1": "ACGT", "sequence2": "AGT", "name1": "a", "name2": "b"},
+                                                                       {"sequence1": "AC", "sequence2": "AC"}],
+                                                             "options": {"engine": "gotoh", "gap_open": -3, "gap_extend": -1}}])
+
+    assert status1 == status2 == 200
+    assert single["results"][0]["score"] == 5
+    assert [ record["score"] for record in several["results"] ] == [0, 2]
+    assert several["results"][0]["record1"] == "a"
+
+
+def test_invalid_requests():
+    responses = serve_requests([{"sequence1": "ACGT"},
+                                {"sequence1": "ACGT", "sequence2": "ACGT", "options": {"workers": 2}},
+                                {"sequence1": "ACGT", "sequence2": "ACGT", "options": {"engine": "unknown"}},
+                                {"pairs": [{"sequence1": "A", "sequence2": "A"}] * 3}], max_pairs = 2)
+
+    assert [ status for status, response in responses ] == [400, 400, 400, 413]
+
+
+def test_invalid_sequence_does_not_fail_other_requests():
+    (status1, valid), (status2, invalid) = serve_requests([{"sequence1": "ACGTT", "sequence2": "ACGTT"},
+                                                           {"sequence1": "ACGTT", "sequence2": "ACGTÉ"}])
+
+    assert status1 == 200
+    assert valid["results"][0]["score"] == 5
+    assert status2 == 400
+
+
+def test_align_pairs_reports_errors_per_pair():
+    results, counters = align_pairs([(("a", "ACGT"), ("b", "ACGT")), (("c", "ACGT"), ("d", "ACÉ")), (("e", "AC"), ("f", "AC"))], OPTIONS)
+
+    assert [ record["score"] if record else None for record, error in results ] == [4, None, 2]
+    assert results[1][1] is not None
+
+
+def test_request_matrix_is_restricted():
+    (status, response), = serve_requests([{"sequence1": "ACGT", "sequence2": "ACGT", "options": {"matrix": "/etc/passwd"}}])
+
+    assert status == 400
+    assert "Unknown substitution matrix" in response["error"]
+
+
+def test_oversized_pair_is_rejected():
+    (status, response), = serve_requests([{"pairs": [{"sequence1": "ACGT", "sequence2": "ACG"},
+                                                     {"sequence1": "A" * 10, "sequence2": "A" * 11, "name1": "a", "name2": "b"}]}],
+                                         max_cells = 100)
+
+    assert status == 413
+    assert "a, b" in response["error"]
+
+
+def test_oversized_body_is_rejected():
+    async def run():
+        server = AlignmentServer(OPTIONS, workers = 1, max_body = 100)
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+
+        async with listener:
+            reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+
+            writer.write(b"POST /align HTTP/1.1\r\nContent-Length: 101\r\n\r\n")
+            await writer.drain()
+
+            response = await reader.read()
+            writer.close()
+
+        return response
+
+    head, body = asyncio.run(run()).split(b"\r\n\r\n", 1)
+
+    assert head.startswith(b"HTTP/1.1 413")
+    assert b"Connection: close" in head
+    assert "100 bytes" in json.loads(body)["error"]
+
+
+class BrokenPool(ThreadPoolExecutor):
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+
+def test_broken_pool_is_replaced():
+    async def run():
+        server = AlignmentServer(OPTIONS, workers = 1, batch_delay = 0.01)
+        server.queue = asyncio.Queue(maxsize = server.queue_size)
+        server.slots = asyncio.Semaphore(server.max_in_flight)
+        server.executor = BrokenPool(max_workers = 1)
+        server.start_pool = lambda: ThreadPoolExecutor(max_workers = 1)
+
+        batcher = asyncio.create_task(server.batcher())
+
+        try:
+            body = json.dumps({"sequence1": "ACGT", "sequence2": "ACGT"}).encode("utf-8")
+
+            return [ await server.dispatch("POST", "/align", body) for it in range(2) ]
+
+        finally:
+            batcher.cancel()
+            server.executor.shutdown()
+
+    (status1, failed), (status2, valid) = asyncio.run(run())
+
+    assert status1 == 500
+    assert status2 == 200
+    assert valid["results"][0]["score"] == 4
@@ -0,0 +1,45 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import pytest
+
+from smith_waterman import smith_waterman
+from substitution import match_mismatch
+from naive import random_pairs, naive_affine, alignment_score
+
+PAIRS = list(random_pairs(120, seed = 8))
+
+
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", PAIRS)
+def test_smith_waterman(seq1, seq2, scoring, gap):
+    gap_open, gap_extend = gap - 2, gap
+
+    expected = naive_affine(seq1, seq2, scoring.score, gap_open, gap_extend, local = True)
+
+    path, score, (start1, start2) = smith_waterman(seq1, seq2, scoring, gap_open, gap_extend)
+
+    assert score == expected
+    assert alignment_score(path, scoring.score, gap_open, gap_extend) == expected
+    assert seq1[start1:].startswith(path[0].replace("-", ""))
+    assert seq2[start2:].startswith(path[1].replace("-", ""))
+
+
+def test_region_inside_sequences():
+    path, score, origin = smith_waterman("TTTTACGTACGTTTTT", "GGACGTACGGG", match_mismatch(2, -3), -5, -2)
+
+    assert path == ["ACGTACG", "ACGTACG"]
+    assert score == 14
+    assert origin == (4, 2)
+
+
+def test_no_positive_alignment():
+    assert smith_waterman("AAAA", "CCCC", match_mismatch(1, -1), -2, -1) == (["", ""], 0.0, (0, 0))
+
+
+def test_int16_overflow():
+    # Scores above int16 range are recomputed in int32.
+    seq = "ACGT" * 100
+
+    path, score, origin = smith_waterman(seq, seq, match_mismatch(100, -4), -5, -2)
+
+    assert score == 100 * len(seq)
+    assert origin == (0, 0)
@@ -0,0 +1,49 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import numpy as np
+import pytest
+
+from substitution import Scoring, match_mismatch, read_matrix
+
+
+def test_read_matrix(tmp_path):
+    directory = tmp_path / "matrix.txt"
+    directory.write_text("# test matrix\n   A  C  *\nA  2 -1 -3\nC -1  3 -3\n* -3 -3  1\n")
+
+    scoring = read_matrix(str(directory))
+
+    assert scoring.alphabet == "AC*"
+    assert scoring.score("A", "C") == scoring.score("c", "a") == -1
+    assert scoring.score("C", "C") == 3
+    assert scoring.best() == 3
+
+    # Letters outside the alphabet are scored as the wildcard.
+    assert scoring.score("G", "A") == -3
+
+
+def test_read_invalid_matrix(tmp_path):
+    directory = tmp_path / "matrix.txt"
+    directory.write_text("   A  C\nA  2 -1\n")
+
+    with pytest.raises(ValueError):
+        read_matrix(str(directory))
+
+
+def test_encode_and_profile():
+    scoring = Scoring("ACGT", [[1, -1, -2, -2], [-1, 1, -2, -2], [-2, -2, 1, -1], [-2, -2, -1, 1]])
+
+    codes = scoring.encode("ACGTTa")
+
+    assert codes.tolist() == [0, 1, 2, 3, 3, 0]
+    assert np.array_equal(scoring.profile(codes)[2], [-2, -2, 1, -1, -1, -2])
+
+    # Without wildcard unknown letters are rejected.
+    with pytest.raises(ValueError):
+        scoring.encode("ACGN")
+
+
+def test_match_mismatch():
+    scoring = match_mismatch(2, -3)
+
+    assert scoring.score("W", "W") == 2
+    assert scoring.score("W", "Y") == -3
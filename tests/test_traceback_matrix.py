@@ -0,0 +1,69 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import pytest
+
+from kernels import fill_score_matrix
+from traceback_matrix import TracebackMatrix
+from substitution import match_mismatch
+from naive import random_pairs, naive_global, naive_paths, naive_count, alignment_score, check_path
+
+PAIRS = list(random_pairs(60, seed = 3, max_length = 12))
+
+# Longer pairs, too many paths to list.
+LONG_PAIRS = list(random_pairs(20, seed = 7, alphabet = "AC", max_length = 60))
+
+
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", PAIRS)
+def test_iter_paths(seq1, seq2, scoring, gap):
+    expected, expected_trace = naive_global(seq1, seq2, scoring.score, gap)
+
+    output, trace = fill_score_matrix(" " + seq1, " " + seq2, scoring, gap, traceback = True)
+
+    paths = [ tuple(path) for path in TracebackMatrix(" " + seq1, " " + seq2, trace).iterPaths() ]
+
+    assert len(set(paths)) == len(paths)
+    assert sorted(paths) == sorted(naive_paths(seq1, seq2, expected_trace))
+
+    for path in paths:
+        check_path(path, seq1, seq2)
+        assert alignment_score(path, scoring.score, gap) == expected[-1][-1]
+
+
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", PAIRS + LONG_PAIRS)
+def test_count_paths(seq1, seq2, scoring, gap):
+    expected_trace = naive_global(seq1, seq2, scoring.score, gap)[1]
+
+    output, trace = fill_score_matrix(" " + seq1, " " + seq2, scoring, gap, traceback = True)
+
+    assert TracebackMatrix(" " + seq1, " " + seq2, trace).countPaths() == naive_count(expected_trace)
+
+
+@pytest.mark.parametrize("seq1, seq2, scoring, gap", LONG_PAIRS)
+def test_bounded_paths_and_sampling(seq1, seq2, scoring, gap, capsys):
+    output, trace = fill_score_matrix(" " + seq1, " " + seq2, scoring, gap, traceback = True)
+
+    matrix = TracebackMatrix(" " + seq1, " " + seq2, trace)
+    matrix.scores = output
+
+    first = matrix.getPaths("top_score", gap, max_paths = 5)
+    printed = capsys.readouterr().out.split()
+
+    assert matrix.path_count == matrix.countPaths()
+    assert first == next(matrix.iterPaths())
+    assert printed.count("score:") == min(5, matrix.path_count)
+
+    for path in matrix.samplePaths(10, seed = 0):
+        check_path(path, seq1, seq2)
+        assert alignment_score(path, scoring.score, gap) == output[-1, -1]
+
+
+def test_sampling_reaches_every_path():
+    scoring = match_mismatch(1, -1)
+
+    output, trace = fill_score_matrix(" AAAC", " AAC", scoring, -1, traceback = True)
+
+    matrix = TracebackMatrix(" AAAC", " AAC", trace)
+    paths = set( tuple(path) for path in matrix.iterPaths() )
+
+    assert matrix.countPaths() == len(paths) > 1
+    assert set( tuple(path) for path in matrix.samplePaths(200, seed = 1) ) == paths
@@ -0,0 +1,158 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import os
+
+import numpy as np
+
+from kernels import DIAGONAL, LEFT, UP
+
+def fill_tiled(seq1, seq2, scoring, gap_score, directory, tile = 1024):
+    '''
+        fill_tiled
+
+        Out-of-core version of kernels.fill_score_matrix. Score and traceback
+        matrices are memory-mapped .npy files (scores.npy, trace.npy) in
+        directory and are filled in tiles of tile x tile cells. Every tile is
+        computed in a small in-memory buffer (rows of the tile with the same
+        running maximum trick as fill_score_matrix) and then written to the
+        files, so only the boundary of the tiles is kept in memory: the last
+        computed row of every column (one row of the matrix) and the right
+        column of the previous tile. Result is equal to fill_score_matrix.
+
+        Matrices are returned as read-only memory maps, so traceback and plot
+        read only the cells they need.
+
+        Input:
+            seq1: string - Sequence 1 string (with leading padding character).
+            seq2: string - Sequence 2 string (with leading padding character).
+            scoring: Scoring - substitution scores.
+            gap_score: int - score for gap.
+            directory: string - directory of matrix files (created if missing).
+            tile: int - tile size (rows and columns).
+
+        Output:
+            np.memmap (len(seq2), len(seq1)): score matrix
+            np.memmap (uint8) (len(seq2), len(seq1)): traceback matrix
+    '''
+
+    rows = len(seq2)
+    cols = len(seq1)
+
+    os.makedirs(directory, exist_ok = True)
+
+    scores_path = os.path.join(directory, "scores.npy")
+    trace_path = os.path.join(directory, "trace.npy")
+
+    output = np.lib.format.open_memmap(scores_path, mode = "w+", dtype = np.float64, shape = (rows, cols))
+    trace = np.lib.format.open_memmap(trace_path, mode = "w+", dtype = np.uint8, shape = (rows, cols))
+
+    profile = scoring.profile(scoring.encode(seq1[1:]))
+    codes2 = scoring.encode(seq2[1:])
+
+    # Boundary row: the last computed score of every column.
+    top = np.arange(cols) * float(gap_score)
+
+    output[0, :] = top
+    trace[0, :] = LEFT
+    trace[0, 0] = 0
+
+    scores = np.empty( (tile + 1, tile + 1) )
+    bits = np.empty( (tile, tile), dtype = np.uint8 )
+
+    for i0 in range(1, rows, tile):
+        i1 = min(i0 + tile, rows)
+        h = i1 - i0
+
+        # Boundary column: column 0 of the matrix for the first tile.
+        left = np.arange(i0 - 1, i1) * float(gap_score)
+
+        output[i0:i1, 0] = left[1:]
+        trace[i0:i1, 0] = UP
+
+        corner = top[0]
+        top[0] = left[-1]
+
+        for j0 in range(1, cols, tile):
+            j1 = min(j0 + tile, cols)
+            w = j1 - j0
+
+            buffer = scores[:h + 1, :w + 1]
+            directions = bits[:h, :w]
+
+            buffer[0, 0] = corner
+            buffer[0, 1:] = top[j0:j1]
+            buffer[1:, 0] = left[1:]
+
+            fill_tile(buffer, directions, profile[:, j0 - 1:j1 - 1], codes2[i0 - 1:i1 - 1], gap_score)
+
+            output[i0:i1, j0:j1] = buffer[1:, 1:]
+            trace[i0:i1, j0:j1] = directions
+
+            corner = top[j1 - 1]
+            top[j0:j1] = buffer[h, 1:]
+            left = buffer[:, w].copy()
+
+    output.flush()
+    trace.flush()
+
+    del output, trace
+
+    return open_tiled(directory)
+
+
+def fill_tile(buffer, directions, profile, codes, gap_score):
+    '''
+        fill_tile
+
+        Fills one tile of score matrix in place, row by row (see
+        kernels.fill_score_matrix).
+
+        Input:
+            buffer: np.ndarray (h + 1, w + 1) - scores of the tile with the
+                row above it and the column left of it (both filled).
+            directions: np.ndarray (uint8) (h, w) - traceback of the tile (output).
+            profile: np.ndarray (alphabet, w) - query profile of columns of the tile.
+            codes: np.ndarray (uint8) (h) - encoded letters of rows of the tile.
+            gap_score: int - score for gap.
+
+        Output:
+            None
+    '''
+
+    gaps = np.arange(buffer.shape[1]) * gap_score
+
+    for r in range(1, buffer.shape[0]):
+        prev = buffer[r - 1]
+        row = buffer[r]
+
+        diagonal = prev[:-1] + profile[codes[r - 1]]
+        up = prev[1:] + gap_score
+
+        np.maximum(diagonal, up, out = row[1:])
+
+        row -= gaps
+        np.maximum.accumulate(row, out = row)
+        row += gaps
+
+        cell = directions[r - 1]
+        np.multiply(diagonal == row[1:], np.uint8(DIAGONAL), out = cell)
+        cell |= (row[:-1] + gap_score == row[1:]) * np.uint8(LEFT)
+        cell |= (up == row[1:]) * np.uint8(UP)
+
+
+def open_tiled(directory):
+    '''
+        open_tiled
+
+        Opens matrices filled by fill_tiled (read-only memory maps).
+
+        Input:
+            directory: string - directory of matrix files.
+
+        Output:
+            np.memmap: score matrix
+            np.memmap (uint8): traceback matrix
+    '''
+
+    return np.load(os.path.join(directory, "scores.npy"), mmap_mode = "r"), \
+           np.load(os.path.join(directory, "trace.npy"), mmap_mode = "r")
@@ -0,0 +1,300 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import random
+import itertools
+
+import numpy as np
+
+from kernels import DIAGONAL, LEFT, UP
+
+class TracebackMatrix():
+    '''
+        TracebackMatrix class
+
+        Compact replacement of BinaryGraph. Stores only direction bitmask
+        of every cell of score matrix (one byte per cell) and rebuilds
+        alignments from it when they are requested.
+    '''
+
+    def __init__(self, seq1, seq2, trace):
+        '''
+            Constructor of TracebackMatrix class
+
+            Input:
+                seq1: string - Sequence 1 string.
+                seq2: string - Sequence 2 string.
+                trace: np.ndarray (uint8) - traceback matrix filled by
+                    kernels.fill_score_matrix.
+
+            Output:
+                TracebackMatrix: Constructed object of class TracebackMatrix
+        '''
+
+        self.seq1 = seq1
+        self.seq2 = seq2
+
+        self.scores = []
+        self.trace = trace
+
+        self.counts = None
+        self.path_count = 0
+
+    def iterPaths(self):
+        '''
+            iterPaths method
+
+            Walks traceback matrix from the last cell to the first one
+            and yields every optimal global alignment. Paths preferring
+            diagonal moves are yielded first.
+
+            Input:
+                None
+
+            Output:
+                generator of list (2) of string - aligned sequences
+        '''
+
+        stack = [(len(self.seq2) - 1, len(self.seq1) - 1, 0, 0)]
+        moves = []
+
+        while len(stack) != 0:
+            i, j, depth, move = stack.pop()
+
+            del moves[depth:]
+
+            if move != 0:
+                moves.append(move)
+
+            if i == 0 and j == 0:
+                yield self.buildAlignment(moves)
+                continue
+
+            bits = int(self.trace[i, j])
+            depth = len(moves)
+
+            if bits & UP:
+                stack.append((i - 1, j, depth, UP))
+
+            if bits & LEFT:
+                stack.append((i, j - 1, depth, LEFT))
+
+            if bits & DIAGONAL:
+                stack.append((i - 1, j - 1, depth, DIAGONAL))
+
+    def countPaths(self, keep = False):
+        '''
+            countPaths method
+
+            Counts optimal paths from the first cell to every cell without
+            enumerating them: count[i, j] is the sum of counts of cells which
+            lead to (i, j). Counts are exact (Python integers).
+
+            Input:
+                keep: bool - keep counts of all cells (required for sampling),
+                    otherwise only two rows are kept.
+
+            Output:
+                int: number of optimal global alignments
+        '''
+
+        rows, cols = self.trace.shape
+
+        prev = np.ones(cols, dtype = object)
+
+        if keep:
+            self.counts = np.empty( (rows, cols), dtype = object )
+            self.counts[0] = prev
+
+        for i in range(1, rows):
+            bits = self.trace[i]
+            row = np.zeros(cols, dtype = object)
+
+            diagonal = (bits[1:] & DIAGONAL) != 0
+            row[1:][diagonal] = prev[:-1][diagonal]
+
+            up = (bits & UP) != 0
+            row[up] += prev[up]
+
+            for j in (np.flatnonzero(bits[1:] & LEFT) + 1).tolist():
+                row[j] += row[j - 1]
+
+            if keep:
+                self.counts[i] = row
+
+            prev = row
+
+        return prev[-1]
+
+    def samplePaths(self, number, seed = None):
+        '''
+            samplePaths method
+
+            Draws optimal global alignments uniformly at random (with
+            replacement). Walking back from the last cell, every previous
+            cell is chosen with probability proportional to the number of
+            paths leading to it.
+
+            Input:
+                number: int - number of alignments to draw.
+                seed: int - seed of random generator.
+
+            Output:
+                generator of list (2) of string - aligned sequences
+        '''
+
+        if self.counts is None:
+            self.countPaths(keep = True)
+
+        generator = random.Random(seed)
+
+        for it in range(number):
+            i = len(self.seq2) - 1
+            j = len(self.seq1) - 1
+
+            moves = []
+
+            while i != 0 or j != 0:
+                bits = int(self.trace[i, j])
+                choice = generator.randrange(self.counts[i, j])
+
+                for move, _i, _j in ((DIAGONAL, i - 1, j - 1), (LEFT, i, j - 1), (UP, i - 1, j)):
+                    if bits & move:
+                        if choice < self.counts[_i, _j]:
+                            break
+
+                        choice -= self.counts[_i, _j]
+
+                moves.append(move)
+                i, j = _i, _j
+
+            yield self.buildAlignment(moves)
+
+    def buildAlignment(self, moves):
+        '''
+            buildAlignment method
+
+            Converts list of moves (from the last cell backwards) into
+            pair of aligned sequences.
+
+            Input:
+                moves: list of int - traceback directions.
+
+            Output:
+                list (2) of string - aligned sequences
+        '''
+
+        letters_x = []
+        letters_y = []
+
+        i = 0
+        j = 0
+
+        for move in reversed(moves):
+            if move == DIAGONAL:
+                i += 1
+                j += 1
+                letters_x.append(self.seq1[j])
+                letters_y.append(self.seq2[i])
+
+            elif move == LEFT:
+                j += 1
+                letters_x.append(self.seq1[j])
+                letters_y.append("-")
+
+            else:
+                i += 1
+                letters_x.append("-")
+                letters_y.append(self.seq2[i])
+
+        return ["".join(letters_x), "".join(letters_y)]
+
+    def getPaths(self, mode, gap_score, max_paths = None, sample = None):
+        '''
+            getPaths method
+
+            Finds and prints optimal paths (see findPaths).
+
+            Input:
+                mode: string - Mode for path finding (see BinaryGraph.getPaths).
+                gap_score: float - score for gap.
+                max_paths: int - print at most max_paths first paths (None - no limit).
+                sample: int - print `sample` uniformly drawn paths instead.
+
+            Output:
+                First registered path string
+        '''
+
+        paths = self.findPaths(mode, gap_score, max_paths, sample)
+
+        self.printPaths(paths)
+
+        return paths[0][:2] if len(paths) else None
+
+    def findPaths(self, mode, gap_score, max_paths = None, sample = None):
+        '''
+            findPaths method
+
+            Finds optimal paths. Traceback always starts in the last cell
+            of score matrix, so every path covers both sequences fully and
+            has the top score, whatever the mode is. Paths are counted
+            (path_count) and generated one at a time, so result is bounded
+            by max_paths or sample.
+
+            Input:
+                mode: string - Mode for path finding (see BinaryGraph.findPaths).
+                gap_score: float - score for gap.
+                max_paths: int - return at most max_paths first paths (None - no limit).
+                sample: int - return `sample` uniformly drawn paths instead.
+
+            Output:
+                list of [string, string, float]: aligned sequences and score
+        '''
+
+        score = float(self.scores[len(self.seq2) - 1, len(self.seq1) - 1])
+
+        if sample is not None:
+            self.path_count = self.countPaths(keep = True)
+            paths = self.samplePaths(sample)
+
+        else:
+            self.path_count = self.countPaths()
+            paths = itertools.islice(self.iterPaths(), max_paths)
+
+        return [ [path[0], path[1], score] for path in paths ]
+
+    def printPaths(self, paths):
+        '''
+            printPaths method
+
+            Prints paths found by findPaths.
+
+            Input:
+                paths: list of [string, string, float] - paths.
+
+            Output:
+                None
+        '''
+
+        for letters_x, letters_y, score in paths:
+            print(letters_x)
+            print(letters_y)
+            print("score: " + str(score) + "\n")
+
+        print()
+
+    def printTree(self):
+        '''
+            printTree method
+
+            Prints traceback matrix (for testing purpose). Every cell is
+            a sum of directions: 1 - diagonal, 2 - left, 4 - up.
+
+            Input:
+                None
+
+            Output:
+                None
+        '''
+
+        print("TracebackMatrix")
+        print(np.asarray(self.trace))
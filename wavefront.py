@@ -0,0 +1,179 @@
+# Copyright (C) 2021, Grzegorz Stefański - All Rights Reserved
+
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from kernels import LEFT, UP
+from tiled import fill_tile
+
+# Matrices shared with worker processes (see _attach).
+_WORKER = {}
+
+def fill_wavefront(seq1, seq2, scoring, gap_score, workers = None, tile = 1024, backend = "thread"):
+    '''
+        fill_wavefront
+
+        Parallel version of kernels.fill_score_matrix. Matrix is split into
+        tile x tile blocks; a block depends only on blocks above and left of
+        it, so all blocks of one anti-diagonal of blocks are filled
+        concurrently (tiled.fill_tile), then the next anti-diagonal starts.
+        Result is equal to fill_score_matrix.
+
+        With thread backend workers share the matrices directly (NumPy
+        releases GIL inside vector operations, so wide tiles scale best).
+        With process backend matrices are placed in shared memory, which
+        is copied to ordinary arrays at the end.
+
+        Input:
+            seq1: string - Sequence 1 string (with leading padding character).
+            seq2: string - Sequence 2 string (with leading padding character).
+            scoring: Scoring - substitution scores.
+            gap_score: int - score for gap.
+            workers: int - number of workers (default: number of CPUs).
+            tile: int - tile size (rows and columns).
+            backend: string - "thread" or "process".
+
+        Output:
+            np.ndarray (len(seq2), len(seq1)): score matrix
+            np.ndarray (uint8) (len(seq2), len(seq1)): traceback matrix
+    '''
+
+    if backend not in ("thread", "process"):
+        raise ValueError("Unknown backend: " + backend)
+
+    rows = len(seq2)
+    cols = len(seq1)
+
+    workers = workers or os.cpu_count()
+
+    profile = scoring.profile(scoring.encode(seq1[1:]))
+    codes2 = scoring.encode(seq2[1:])
+
+    if backend == "thread":
+        output = np.empty( (rows, cols) )
+        trace = np.empty( (rows, cols), dtype = np.uint8 )
+
+        _border(output, trace, gap_score)
+
+        state = {"output": output, "trace": trace, "profile": profile, "codes2": codes2, "gap_score": gap_score}
+
+        with ThreadPoolExecutor(max_workers = workers) as executor:
+            _sweep(rows, cols, tile, lambda *block: executor.submit(_fill_block, state, *block))
+
+        return output, trace
+
+    from multiprocessing import shared_memory
+
+    memory = [ shared_memory.SharedMemory(create = True, size = max(rows * cols * size, 1)) for size in (8, 1) ]
+
+    try:
+        output = np.ndarray( (rows, cols), dtype = np.float64, buffer = memory[0].buf )
+        trace = np.ndarray( (rows, cols), dtype = np.uint8, buffer = memory[1].buf )
+
+        _border(output, trace, gap_score)
+
+        with ProcessPoolExecutor(max_workers = workers, initializer = _attach,
+                                 initargs = (memory[0].name, memory[1].name, rows, cols, profile, codes2, gap_score)) as executor:
+            _sweep(rows, cols, tile, lambda *block: executor.submit(_process_block, *block))
+
+        result = output.copy(), trace.copy()
+
+        del output, trace
+
+    finally:
+        for block in memory:
+            block.close()
+            block.unlink()
+
+    return result
+
+
+def _border(output, trace, gap_score):
+    '''
+        _border
+
+        Fills the first row and column of score and traceback matrices.
+    '''
+
+    output[0, :] = np.arange(output.shape[1]) * gap_score
+    output[:, 0] = np.arange(output.shape[0]) * gap_score
+
+    trace[0, :] = LEFT
+    trace[:, 0] = UP
+    trace[0, 0] = 0
+
+
+def _sweep(rows, cols, tile, submit):
+    '''
+        _sweep
+
+        Submits blocks (i0, i1, j0, j1) anti-diagonal by anti-diagonal and
+        waits for every anti-diagonal to finish. Errors of workers are
+        raised.
+    '''
+
+    blocks_y = range(1, rows, tile)
+    blocks_x = range(1, cols, tile)
+
+    for diagonal in range(len(blocks_y) + len(blocks_x) - 1):
+        futures = []
+
+        for y in range(max(0, diagonal - len(blocks_x) + 1), min(diagonal + 1, len(blocks_y))):
+            i0 = blocks_y[y]
+            j0 = blocks_x[diagonal - y]
+
+            futures.append(submit(i0, min(i0 + tile, rows), j0, min(j0 + tile, cols)))
+
+        wait(futures)
+
+        for future in futures:
+            future.result()
+
+
+def _fill_block(state, i0, i1, j0, j1):
+    '''
+        _fill_block
+
+        Fills block of matrices from its upper and left neighbours.
+    '''
+
+    output = state["output"]
+
+    buffer = np.empty( (i1 - i0 + 1, j1 - j0 + 1) )
+    buffer[0] = output[i0 - 1, j0 - 1:j1]
+    buffer[1:, 0] = output[i0:i1, j0 - 1]
+
+    directions = np.empty( (i1 - i0, j1 - j0), dtype = np.uint8 )
+
+    fill_tile(buffer, directions, state["profile"][:, j0 - 1:j1 - 1], state["codes2"][i0 - 1:i1 - 1], state["gap_score"])
+
+    output[i0:i1, j0:j1] = buffer[1:, 1:]
+    state["trace"][i0:i1, j0:j1] = directions
+
+
+def _attach(scores_name, trace_name, rows, cols, profile, codes2, gap_score):
+    '''
+        _attach
+
+        Initializer of worker process: attaches shared matrices.
+    '''
+
+    from multiprocessing import shared_memory
+
+    memory = [ shared_memory.SharedMemory(name = scores_name), shared_memory.SharedMemory(name = trace_name) ]
+
+    _WORKER.update(memory = memory, profile = profile, codes2 = codes2, gap_score = gap_score,
+                   output = np.ndarray( (rows, cols), dtype = np.float64, buffer = memory[0].buf ),
+                   trace = np.ndarray( (rows, cols), dtype = np.uint8, buffer = memory[1].buf ))
+
+
+def _process_block(i0, i1, j0, j1):
+    '''
+        _process_block
+
+        Fills block in worker process (see _fill_block).
+    '''
+
+    _fill_block(_WORKER, i0, i1, j0, j1)